@@ -2,6 +2,7 @@
 Authentication endpoints
 """
 
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
@@ -35,10 +36,10 @@ async def register(
 ):
     """Register a new user"""
     try:
-        user = auth_service.register_user(user_data)
+        user = await auth_service.register_user(user_data)
         
         # Create tokens for the new user
-        tokens = auth_service.login_user(UserLogin(email=user_data.email, password=user_data.password))
+        tokens = await auth_service.login_user(UserLogin(email=user_data.email, password=user_data.password))
         
         return tokens
     except Exception as e:
@@ -56,7 +57,7 @@ async def login(
 ):
     """Login user"""
     try:
-        tokens = auth_service.login_user(login_data)
+        tokens = await auth_service.login_user(login_data)
         
         # Set HTTP-only cookie
         response.set_cookie(
@@ -159,7 +160,7 @@ async def update_preferences(
         
         token = credentials.credentials
         user_id = get_current_user_id(token)
-        user = auth_service.update_user_preferences(user_id, preferences.dict(exclude_unset=True))
+        user = auth_service.update_user_preferences(user_id, preferences.model_dump(exclude_unset=True))
         
         return user
     except Exception as e:
@@ -195,7 +196,7 @@ async def change_password(
         
         # Verify current password
         from app.core.security import verify_password
-        if not verify_password(password_data.current_password, user.hashed_password):
+        if not await asyncio.to_thread(verify_password, password_data.current_password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
@@ -203,7 +204,7 @@ async def change_password(
         
         # Update password
         from app.core.security import get_password_hash
-        user.hashed_password = get_password_hash(password_data.new_password)
+        user.hashed_password = await asyncio.to_thread(get_password_hash, password_data.new_password)
         auth_service.db.commit()
         
         return {"message": "Password updated successfully"}
@@ -213,7 +213,7 @@ async def update_concept_node(
             concept_map_id, 
             node_id, 
             user_id, 
-            node_data.dict(exclude_unset=True)
+            node_data.model_dump(exclude_unset=True)
         )
         return node
     except Exception as e:
@@ -301,7 +301,7 @@ async def update_concept_connection(
             concept_map_id, 
             connection_id, 
             user_id, 
-            connection_data.dict(exclude_unset=True)
+            connection_data.model_dump(exclude_unset=True)
         )
         return connection
     except Exception as e:
@@ -3,7 +3,7 @@ Grade management endpoints for academic transcript
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
@@ -32,6 +32,7 @@ async def get_grades(
     subject_id: Optional[str] = Query(None, description="Filter by subject ID"),
     academic_year: Optional[str] = Query(None, description="Filter by academic year"),
     semester: Optional[str] = Query(None, description="Filter by semester"),
+    is_passed: Optional[bool] = Query(None, description="Filter by passed/failed status"),
     credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
     grade_service: GradeService = Depends(get_grade_service)
 ):
@@ -41,33 +42,16 @@ async def get_grades(
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
         
         user_id = get_current_user_id(credentials.credentials)
-        grades = grade_service.get_grades(user_id, subject_id, academic_year, semester)
+        grades = grade_service.get_grades(user_id, subject_id, academic_year, semester, is_passed)
         
         # Convert to response format with subject name
-        response_grades = []
-        for grade in grades:
-            grade_dict = {
-                "id": grade.id,
-                "user_id": grade.user_id,
-                "subject_id": grade.subject_id,
-                "subject_name": grade.subject.name if grade.subject else None,
-                "exam_name": grade.exam_name,
-                "grade": grade.grade,
-                "max_grade": grade.max_grade,
-                "credits": grade.credits,
-                "exam_date": grade.exam_date,
-                "academic_year": grade.academic_year,
-                "semester": grade.semester,
-                "professor": grade.professor,
-                "notes": grade.notes,
-                "percentage": grade.percentage,
-                "is_passed": grade.is_passed,
-                "created_at": grade.created_at,
-                "updated_at": grade.updated_at
-            }
-            response_grades.append(GradeResponse(**grade_dict))
-        
-        return response_grades
+        return [
+            GradeResponse.from_orm_fast(
+                grade,
+                subject_name=grade.subject.name if grade.subject else None
+            )
+            for grade in grades
+        ]
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -90,27 +74,10 @@ async def create_grade(
         grade = grade_service.create_grade(user_id, grade_data)
         
         # Convert to response format
-        grade_dict = {
-            "id": grade.id,
-            "user_id": grade.user_id,
-            "subject_id": grade.subject_id,
-            "subject_name": grade.subject.name if grade.subject else None,
-            "exam_name": grade.exam_name,
-            "grade": grade.grade,
-            "max_grade": grade.max_grade,
-            "credits": grade.credits,
-            "exam_date": grade.exam_date,
-            "academic_year": grade.academic_year,
-            "semester": grade.semester,
-            "professor": grade.professor,
-            "notes": grade.notes,
-            "percentage": grade.percentage,
-            "is_passed": grade.is_passed,
-            "created_at": grade.created_at,
-            "updated_at": grade.updated_at
-        }
-        
-        return GradeResponse(**grade_dict)
+        return GradeResponse.from_orm_fast(
+            grade,
+            subject_name=grade.subject.name if grade.subject else None
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -139,27 +106,10 @@ async def get_grade(
             )
         
         # Convert to response format
-        grade_dict = {
-            "id": grade.id,
-            "user_id": grade.user_id,
-            "subject_id": grade.subject_id,
-            "subject_name": grade.subject.name if grade.subject else None,
-            "exam_name": grade.exam_name,
-            "grade": grade.grade,
-            "max_grade": grade.max_grade,
-            "credits": grade.credits,
-            "exam_date": grade.exam_date,
-            "academic_year": grade.academic_year,
-            "semester": grade.semester,
-            "professor": grade.professor,
-            "notes": grade.notes,
-            "percentage": grade.percentage,
-            "is_passed": grade.is_passed,
-            "created_at": grade.created_at,
-            "updated_at": grade.updated_at
-        }
-        
-        return GradeResponse(**grade_dict)
+        return GradeResponse.from_orm_fast(
+            grade,
+            subject_name=grade.subject.name if grade.subject else None
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -183,27 +133,10 @@ async def update_grade(
         grade = grade_service.update_grade(grade_id, user_id, grade_data)
         
         # Convert to response format
-        grade_dict = {
-            "id": grade.id,
-            "user_id": grade.user_id,
-            "subject_id": grade.subject_id,
-            "subject_name": grade.subject.name if grade.subject else None,
-            "exam_name": grade.exam_name,
-            "grade": grade.grade,
-            "max_grade": grade.max_grade,
-            "credits": grade.credits,
-            "exam_date": grade.exam_date,
-            "academic_year": grade.academic_year,
-            "semester": grade.semester,
-            "professor": grade.professor,
-            "notes": grade.notes,
-            "percentage": grade.percentage,
-            "is_passed": grade.is_passed,
-            "created_at": grade.created_at,
-            "updated_at": grade.updated_at
-        }
-        
-        return GradeResponse(**grade_dict)
+        return GradeResponse.from_orm_fast(
+            grade,
+            subject_name=grade.subject.name if grade.subject else None
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -252,7 +185,8 @@ async def get_grade_stats(
         
         user_id = get_current_user_id(credentials.credentials)
         stats = grade_service.get_grade_stats(user_id, subject_id)
-        return stats
+        # Already validated; serialize straight to JSON bytes
+        return Response(content=stats.model_dump_json(), media_type="application/json")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -68,7 +68,7 @@ async def oauth_callback(
             "access_token": access_token,
             "refresh_token": refresh_token,
             "token_type": "bearer",
-            "user": UserResponse.model_validate(user)
+            "user": UserResponse.from_orm_fast(user)
         }
         
         # In a real application, you might want to redirect to frontend with tokens
@@ -113,7 +113,7 @@ async def oauth_callback_post(
             "access_token": access_token,
             "refresh_token": refresh_token,
             "token_type": "bearer",
-            "user": UserResponse.model_validate(user)
+            "user": UserResponse.from_orm_fast(user)
         }
         
         return response_data
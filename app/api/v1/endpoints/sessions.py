@@ -2,8 +2,9 @@
 Study session management endpoints
 """
 
+from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
@@ -30,6 +31,8 @@ def get_session_service(db: Session = Depends(get_db)) -> SessionService:
 @router.get("/", response_model=List[StudySessionResponse])
 async def get_sessions(
     subject_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of sessions to return"),
+    cursor: Optional[datetime] = Query(None, description="Return sessions started before this time"),
     credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
     session_service: SessionService = Depends(get_session_service)
 ):
@@ -42,7 +45,7 @@ async def get_sessions(
         
 
         user_id = get_current_user_id(credentials.credentials)
-        sessions = session_service.get_sessions(user_id, subject_id)
+        sessions = session_service.get_sessions(user_id, subject_id, limit, cursor)
         return sessions
     except Exception as e:
         raise HTTPException(
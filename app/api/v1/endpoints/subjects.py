@@ -3,7 +3,7 @@ Subject management endpoints
 """
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
@@ -152,7 +152,8 @@ async def get_subject_stats(
         
         user_id = get_current_user_id(credentials.credentials)
         stats = subject_service.get_subject_stats(subject_id, user_id)
-        return stats
+        # Already validated; serialize straight to JSON bytes
+        return Response(content=stats.model_dump_json(), media_type="application/json")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
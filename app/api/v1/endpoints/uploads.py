@@ -3,7 +3,7 @@ Upload management endpoints
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Form, Query
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
@@ -27,6 +27,7 @@ def get_upload_service(db: Session = Depends(get_db)) -> UploadService:
 
 @router.post("/", response_model=UploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_file(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     name: str = Form(...),
     type: str = Form(...),
@@ -49,7 +50,7 @@ async def upload_file(
             subject_id=subject_id
         )
         
-        upload = await upload_service.create_upload(user_id, upload_data, file)
+        upload = await upload_service.create_upload(user_id, upload_data, file, background_tasks)
         return upload
     except Exception as e:
         raise HTTPException(
@@ -61,6 +62,8 @@ async def upload_file(
 @router.get("/", response_model=List[UploadResponse])
 async def get_uploads(
     subject_id: Optional[str] = None,
+    keyword: Optional[str] = Query(None, description="Filter by extracted keyword"),
+    search: Optional[str] = Query(None, description="Full-text search in extracted text"),
     credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
     upload_service: UploadService = Depends(get_upload_service)
 ):
@@ -70,7 +73,7 @@ async def get_uploads(
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
         
         user_id = get_current_user_id(credentials.credentials)
-        uploads = upload_service.get_uploads(user_id, subject_id)
+        uploads = upload_service.get_uploads(user_id, subject_id, keyword, search)
         return uploads
     except Exception as e:
         raise HTTPException(
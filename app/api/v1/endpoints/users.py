@@ -78,7 +78,6 @@ async def update_profile(
                 setattr(user, field, value)
         
         auth_service.db.commit()
-        auth_service.db.refresh(user)
         
         return user
     except Exception as e:
@@ -133,7 +132,7 @@ async def update_preferences(
         
 
         user_id = get_current_user_id(credentials.credentials)
-        user = auth_service.update_user_preferences(user_id, preferences.dict(exclude_unset=True))
+        user = auth_service.update_user_preferences(user_id, preferences.model_dump(exclude_unset=True))
         
         return user.preferences
     except Exception as e:
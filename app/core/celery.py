@@ -2,8 +2,16 @@
 Celery configuration for background tasks
 """
 
-from celery import Celery
+from celery import Celery, Task
+from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
+from sqlalchemy.orm import Session, scoped_session
 from app.core.config import settings
+from app.core.database import SessionLocal
+
+# Thread-local session registry; each task gets a fresh session that
+# DBTask.after_return closes and removes once the task finishes
+_task_sessions = scoped_session(SessionLocal)
 
 # Create Celery instance
 celery = Celery(
@@ -13,7 +21,8 @@ celery = Celery(
     include=[
         "app.tasks.file_processing",
         "app.tasks.ai_processing",
-        "app.tasks.notifications"
+        "app.tasks.notifications",
+        "app.tasks.statistics"
     ]
 )
 
@@ -29,4 +38,49 @@ celery.conf.update(
     task_soft_time_limit=25 * 60,  # 25 minutes
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
+    beat_schedule={
+        "refresh-subject-stats-nightly": {
+            "task": "app.tasks.statistics.refresh_subject_stats",
+            "schedule": crontab(hour=3, minute=0),
+        },
+        "flush-email-queue": {
+            "task": "app.tasks.notifications.flush_email_queue",
+            "schedule": 2.0,
+        },
+        "refresh-progress-view": {
+            "task": "app.tasks.statistics.refresh_progress_view",
+            "schedule": crontab(minute="*/15"),
+        },
+    },
 )
+
+
+class DBTask(Task):
+    """Task base class that provides a worker-scoped database session"""
+    
+    @property
+    def db(self) -> Session:
+        """The current worker's session"""
+        return _task_sessions()
+    
+    def after_return(self, *args, **kwargs):
+        """Roll back anything left open and return the connection to the pool"""
+        _task_sessions.remove()
+
+
+@worker_process_init.connect
+def warm_services(**kwargs):
+    """Build the shared services, and their S3 client, once per worker process"""
+    from app.services.ai_service import get_ai_service
+    from app.services.storage_service import get_storage_service
+    
+    get_ai_service()
+    get_storage_service()
+
+
+@worker_process_shutdown.connect
+def stop_pdf_pool(**kwargs):
+    """Stop the PDF extraction pool with its worker process"""
+    from app.services.ai_service import shutdown_pdf_pool
+    
+    shutdown_pdf_pool()
@@ -2,6 +2,7 @@
 Application configuration settings
 """
 
+from functools import cached_property
 from typing import List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
@@ -15,6 +16,7 @@ class Settings(BaseSettings):
     APP_NAME: str = "Swift Study Box"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = False
+    REQUEST_LOGGING: bool = False  # Per-request logging, always on in DEBUG
     
     # API
     API_V1_STR: str = "/api/v1"
@@ -31,6 +33,7 @@ class Settings(BaseSettings):
     
     # OpenAI
     OPENAI_API_KEY: Optional[str] = None
+    AI_CACHE_TTL: int = 7 * 24 * 3600  # seconds to reuse identical completions
     
     # AWS S3
     AWS_ACCESS_KEY_ID: Optional[str] = None
@@ -76,10 +79,16 @@ class Settings(BaseSettings):
         "png", "gif", "mp4", "avi", "mov"
     ]
     
+    # Worker processes for text extraction of long PDFs (1 disables the pool)
+    PDF_EXTRACT_WORKERS: int = min(os.cpu_count() or 1, 4)
+    
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     RATE_LIMIT_BURST: int = 10
     
+    # Build responses from ORM rows without re-validating them
+    FAST_RESPONSE_CONSTRUCTION: bool = True
+    
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
     def assemble_cors_origins(cls, v):
@@ -101,6 +110,11 @@ class Settings(BaseSettings):
             return [i.strip() for i in v.split(",")]
         return v
     
+    @cached_property
+    def ALLOWED_FILE_TYPES_SET(self) -> frozenset:
+        """Lower-cased allowed extensions for O(1) membership checks"""
+        return frozenset(map(str.lower, self.ALLOWED_FILE_TYPES))
+    
     model_config = {
         "env_file": ".env",
         "case_sensitive": True
@@ -2,25 +2,36 @@
 Database configuration and session management
 """
 
+import orjson
 from sqlalchemy import create_engine, MetaData
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import sessionmaker, Session, raiseload
 from sqlalchemy.pool import StaticPool
 import redis
-from typing import Generator
+from typing import Generator, TypeVar
 
 from app.core.config import settings
 
+def _dump_json(value) -> str:
+    """Serialize JSON/JSONB column values with orjson"""
+    # Stdlib json turns int keys into strings too; orjson needs the option
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
     poolclass=StaticPool,
     connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-    echo=settings.DEBUG
+    echo=settings.DEBUG,
+    insertmanyvalues_page_size=1000,  # rows per multi-VALUES INSERT in bulk inserts
+    json_serializer=_dump_json,
+    json_deserializer=orjson.loads
 )
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create session factory; objects keep their (RETURNING-populated) state
+# after commit instead of being reloaded on next attribute access
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # Create base class for models
 Base = declarative_base()
@@ -47,6 +58,18 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+StatementT = TypeVar("StatementT")
+
+
+def safe_list(stmt: StatementT, *eager) -> StatementT:
+    """Apply eager loaders to a list query and forbid any other lazy load.
+    
+    Relationships not named in ``eager`` raise on access instead of issuing
+    one SELECT per row, so N+1 regressions fail loudly.
+    """
+    return stmt.options(*eager, raiseload("*"))
+
+
 def get_redis() -> redis.Redis:
     """Get Redis client"""
     return redis_client
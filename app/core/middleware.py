@@ -14,7 +14,9 @@ from app.core.config import settings
 from app.core.database import get_redis
 from app.core.exceptions import RateLimitError
 
-logger = structlog.get_logger()
+# Lazy proxy: the processor chain is resolved and cached on first use,
+# after app.main has configured structlog
+logger = structlog.get_logger(component="middleware")
 
 
 class LoggingMiddleware(BaseHTTPMiddleware):
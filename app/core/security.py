@@ -3,7 +3,7 @@ Security utilities for authentication and authorization
 """
 
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Optional, Tuple, Union, Any
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
@@ -14,8 +14,18 @@ from starlette.requests import Request
 from app.core.config import settings
 from app.core.exceptions import AuthenticationError
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing: Argon2id (OWASP parameters) for new hashes; bcrypt hashes
+# still verify and are flagged for rehash. The hash prefix records the scheme.
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=3,
+    argon2__memory_cost=65536,
+    argon2__parallelism=2,
+    argon2__digest_size=32,
+    argon2__salt_size=16
+)
 
 # JWT token scheme
 security = HTTPBearer()
@@ -26,6 +36,11 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash if its scheme is outdated"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
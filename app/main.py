@@ -5,8 +5,9 @@ Swift Study Box Backend - Main FastAPI Application
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
-import time
+from fastapi.responses import JSONResponse, Response
+import json
+import logging
 import structlog
 from contextlib import asynccontextmanager
 
@@ -15,6 +16,7 @@ from app.core.database import init_db
 from app.api.v1.api import api_router
 from app.core.exceptions import SwiftStudyBoxException
 from app.core.middleware import RateLimitMiddleware, LoggingMiddleware
+from app.services.oauth_service import close_http_client
 
 # Configure structured logging
 structlog.configure(
@@ -31,7 +33,10 @@ structlog.configure(
     ],
     context_class=dict,
     logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
+    # Filtering logger turns calls below the threshold into no-ops
+    wrapper_class=structlog.make_filtering_bound_logger(
+        logging.DEBUG if settings.DEBUG else logging.INFO
+    ),
     cache_logger_on_first_use=True,
 )
 
@@ -49,6 +54,7 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    await close_http_client()
     logger.info("Shutting down Swift Study Box Backend")
 
 
@@ -72,13 +78,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_middleware(
-    TrustedHostMiddleware,
-    allowed_hosts=settings.ALLOWED_HOSTS
-)
+# A wildcard host list makes TrustedHostMiddleware a no-op, so skip it
+if settings.ALLOWED_HOSTS and settings.ALLOWED_HOSTS != ["*"]:
+    app.add_middleware(
+        TrustedHostMiddleware,
+        allowed_hosts=settings.ALLOWED_HOSTS
+    )
 
 app.add_middleware(RateLimitMiddleware)
-app.add_middleware(LoggingMiddleware)
+
+if settings.DEBUG or settings.REQUEST_LOGGING:
+    app.add_middleware(LoggingMiddleware)
 
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -121,24 +131,29 @@ async def general_exception_handler(request: Request, exc: Exception):
     )
 
 
+# Static response bodies, serialized once at import time
+_ROOT_BODY = json.dumps({
+    "message": "Swift Study Box Backend API",
+    "version": settings.APP_VERSION,
+    "status": "running"
+}).encode()
+
+_HEALTH_BODY = json.dumps({
+    "status": "healthy",
+    "version": settings.APP_VERSION
+}).encode()
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {
-        "message": "Swift Study Box Backend API",
-        "version": settings.APP_VERSION,
-        "status": "running"
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": time.time(),
-        "version": settings.APP_VERSION
-    }
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 if __name__ == "__main__":
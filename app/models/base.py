@@ -2,21 +2,52 @@
 Base model with common fields
 """
 
-from sqlalchemy import Column, String, DateTime, func
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.ext.mutable import MutableDict
 import uuid
 from datetime import datetime
 from typing import Any
 
 from app.core.database import Base
 
+# JSONB on PostgreSQL (indexable, binary storage), plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+# JSON object column whose in-place edits (d[k] = v, d.update()) are tracked.
+# A separate instance from JSONType, which also backs list-valued columns.
+MutableJSONDict = MutableDict.as_mutable(JSON().with_variant(JSONB(), "postgresql"))
+
+# Native 16-byte uuid on PostgreSQL, CHAR-like string elsewhere; values stay str
+UUIDType = String(36).with_variant(UUID(as_uuid=False), "postgresql")
+
+
+class UserOwnedMixin:
+    """Owning user foreign key"""
+    
+    @declared_attr
+    def user_id(cls):
+        return Column(UUIDType, ForeignKey("users.id"), nullable=False)
+
+
+class SubjectOwnedMixin:
+    """Owning subject foreign key"""
+    
+    @declared_attr
+    def subject_id(cls):
+        return Column(UUIDType, ForeignKey("subjects.id"), nullable=False, index=True)
+
 
 class BaseModel(Base):
     """Base model with common fields"""
     
     __abstract__ = True
+    # Fetch server-generated values (timestamps, computed columns) with
+    # INSERT/UPDATE ... RETURNING instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDType, primary_key=True, default=lambda: str(uuid.uuid4()))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -2,32 +2,31 @@
 Concept map model and related schemas
 """
 
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Text, Index
 
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
-from app.models.base import BaseModel
+from app.models.base import BaseModel, JSONType, SubjectOwnedMixin, UUIDType, UserOwnedMixin
 
 
-class ConceptMap(BaseModel):
+class ConceptMap(UserOwnedMixin, SubjectOwnedMixin, BaseModel):
     """Concept map model"""
     
     __tablename__ = "concept_maps"
+    __table_args__ = (
+        Index("ix_concept_maps_user_subject", "user_id", "subject_id"),
+    )
     
     # Basic info
     title = Column(String(255), nullable=False)
     is_public = Column(Boolean, default=False)
     
-    # Foreign keys
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    subject_id = Column(String(36), ForeignKey("subjects.id"), nullable=False)
-    
     # Additional metadata
     description = Column(Text, nullable=True)
-    tags = Column(JSON, default=list)
+    tags = Column(JSONType, default=list)
     
     # Relationships
     user = relationship("User", back_populates="concept_maps")
@@ -50,12 +49,12 @@ class ConceptNode(BaseModel):
     color = Column(String(7), default="#3B82F6")  # Hex color
     
     # Foreign keys
-    concept_map_id = Column(String(36), ForeignKey("concept_maps.id"), nullable=False)
-    source_upload_id = Column(String(36), ForeignKey("uploads.id"), nullable=True)
+    concept_map_id = Column(UUIDType, ForeignKey("concept_maps.id"), nullable=False, index=True)
+    source_upload_id = Column(UUIDType, ForeignKey("uploads.id"), nullable=True)
     
     # Content
     description = Column(Text, nullable=True)
-    examples = Column(JSON, default=list)
+    examples = Column(JSONType, default=list)
     
     # AI generation
     ai_generated = Column(Boolean, default=False)
@@ -78,9 +77,9 @@ class ConceptConnection(BaseModel):
     strength = Column(Float, default=1.0)  # 0-1
     
     # Foreign keys
-    concept_map_id = Column(String(36), ForeignKey("concept_maps.id"), nullable=False)
-    from_node_id = Column(String(36), ForeignKey("concept_nodes.id"), nullable=False)
-    to_node_id = Column(String(36), ForeignKey("concept_nodes.id"), nullable=False)
+    concept_map_id = Column(UUIDType, ForeignKey("concept_maps.id"), nullable=False, index=True)
+    from_node_id = Column(UUIDType, ForeignKey("concept_nodes.id"), nullable=False)
+    to_node_id = Column(UUIDType, ForeignKey("concept_nodes.id"), nullable=False)
     
     # Relationships
     concept_map = relationship("ConceptMap", back_populates="connections")
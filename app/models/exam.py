@@ -2,39 +2,38 @@
 Exam model and related schemas
 """
 
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, Integer, SmallInteger, Boolean, DateTime, ForeignKey, Text, Index
 
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from typing import Optional, Dict, Any, List, Union
 from datetime import datetime
 
-from app.models.base import BaseModel
+from app.models.base import BaseModel, JSONType, SubjectOwnedMixin, UUIDType, UserOwnedMixin
 
 
-class Exam(BaseModel):
+class Exam(UserOwnedMixin, SubjectOwnedMixin, BaseModel):
     """Exam model"""
     
     __tablename__ = "exams"
+    __table_args__ = (
+        Index("ix_exams_user_subject", "user_id", "subject_id"),
+    )
     
     # Basic info
     title = Column(String(255), nullable=False)
     difficulty = Column(String(50), default="medium")  # easy, medium, hard, expert
-    time_limit = Column(Integer, nullable=False)  # in minutes
+    time_limit = Column(SmallInteger, nullable=False)  # in minutes
     total_points = Column(Integer, default=0)
     passing_score = Column(Integer, default=60)  # percentage
     
-    # Foreign keys
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    subject_id = Column(String(36), ForeignKey("subjects.id"), nullable=False)
-    
     # Status
     is_active = Column(Boolean, default=True)
     
     # Additional metadata
     description = Column(Text, nullable=True)
     instructions = Column(Text, nullable=True)
-    tags = Column(JSON, default=list)
+    tags = Column(JSONType, default=list)
     
     # Relationships
     user = relationship("User", back_populates="exams")
@@ -51,15 +50,15 @@ class ExamQuestion(BaseModel):
     # Basic info
     type = Column(String(50), nullable=False)  # single, multiple, open
     question = Column(Text, nullable=False)
-    options = Column(JSON, nullable=True)  # List of options (null for open questions)
-    correct_answer = Column(JSON, nullable=True)  # Index, list of indices, or text
+    options = Column(JSONType, nullable=True)  # List of options (null for open questions)
+    correct_answer = Column(JSONType, nullable=True)  # Index, list of indices, or text
     explanation = Column(Text, nullable=True)
     difficulty = Column(String(50), default="medium")
-    points = Column(Integer, default=1)
+    points = Column(SmallInteger, default=1)
     
     # Foreign keys
-    exam_id = Column(String(36), ForeignKey("exams.id"), nullable=False)
-    source_upload_id = Column(String(36), ForeignKey("uploads.id"), nullable=True)
+    exam_id = Column(UUIDType, ForeignKey("exams.id"), nullable=False, index=True)
+    source_upload_id = Column(UUIDType, ForeignKey("uploads.id"), nullable=True)
     
     # AI generation
     ai_generated = Column(Boolean, default=False)
@@ -70,19 +69,22 @@ class ExamQuestion(BaseModel):
     user_answers = relationship("ExamUserAnswer", back_populates="exam_question", cascade="all, delete-orphan")
 
 
-class ExamUserAnswer(BaseModel):
+class ExamUserAnswer(UserOwnedMixin, BaseModel):
     """User answer model for exams"""
     
     __tablename__ = "exam_user_answers"
+    __table_args__ = (
+        # Serves the per-user answer aggregates joined to exam_questions in the stats
+        Index("ix_exam_user_answers_user_question", "user_id", "exam_question_id"),
+    )
     
     # Foreign keys
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    exam_question_id = Column(String(36), ForeignKey("exam_questions.id"), nullable=False)
+    exam_question_id = Column(UUIDType, ForeignKey("exam_questions.id"), nullable=False)
     
     # Answer data
-    answer = Column(JSON, nullable=False)  # Index, list of indices, or text
+    answer = Column(JSONType, nullable=False)  # Index, list of indices, or text
     is_correct = Column(Boolean, nullable=False)
-    time_spent = Column(Integer, default=0)  # in seconds
+    time_spent = Column(SmallInteger, default=0)  # in seconds, < 9h per question
     submitted_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
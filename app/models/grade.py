@@ -2,23 +2,30 @@
 Grade model for academic transcript
 """
 
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Text, Date
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Text, Date, Index, Computed, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from typing import Optional
 from datetime import datetime, date
 
-from app.models.base import BaseModel
+from app.models.base import BaseModel, SubjectOwnedMixin, UserOwnedMixin
 
 
-class Grade(BaseModel):
+class Grade(UserOwnedMixin, SubjectOwnedMixin, BaseModel):
     """Grade model for academic transcript"""
     
     __tablename__ = "grades"
-    
-    # Foreign keys
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    subject_id = Column(String(36), ForeignKey("subjects.id"), nullable=False)
+    __table_args__ = (
+        # Covering index for the transcript listing (ORDER BY exam_date DESC)
+        Index(
+            "ix_grades_transcript_cov",
+            "user_id",
+            text("exam_date DESC"),
+            postgresql_include=["grade", "max_grade", "credits", "subject_id"],
+        ),
+        Index("ix_grades_user_subject", "user_id", "subject_id"),
+        Index("ix_grades_user_passed", "user_id", "is_passed"),
+        Index("ix_grades_user_year_semester", "user_id", "academic_year", "semester"),
+    )
     
     # Exam information
     exam_name = Column(String(255), nullable=False)
@@ -35,20 +42,17 @@ class Grade(BaseModel):
     professor = Column(String(255), nullable=True)
     notes = Column(Text, nullable=True)
     
+    # Derived values, generated by the database so they can be filtered and indexed
+    percentage = Column(
+        Float,
+        Computed("CASE WHEN max_grade > 0 THEN grade / max_grade * 100 END", persisted=True)
+    )
+    is_passed = Column(
+        Boolean,
+        # 60% is passing when max_grade is known, otherwise 18/30
+        Computed("CASE WHEN max_grade > 0 THEN grade / max_grade * 100 >= 60 ELSE grade >= 18 END", persisted=True)
+    )
+    
     # Relationships
     user = relationship("User", back_populates="grades")
-    subject = relationship("Subject", back_populates="grades")
-    
-    @property
-    def percentage(self) -> Optional[float]:
-        """Calculate percentage if max_grade is available"""
-        if self.max_grade and self.max_grade > 0:
-            return (self.grade / self.max_grade) * 100
-        return None
-    
-    @property
-    def is_passed(self) -> bool:
-        """Check if the grade is passing (assuming 18/30 is passing)"""
-        if self.max_grade:
-            return self.percentage >= 60  # 60% is passing
-        return self.grade >= 18  # 18/30 is passing
+    subject = relationship("Subject", back_populates="grades", lazy="selectin")
@@ -2,24 +2,30 @@
 Progress model and related schemas
 """
 
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, JSON, Text, Boolean
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Text, Boolean, MetaData, Table, DDL, CheckConstraint, Index, event
 
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
-from app.models.base import BaseModel
+from app.core.database import Base
+from app.models.base import BaseModel, JSONType, UUIDType, UserOwnedMixin
 
 
-class Progress(BaseModel):
+class Progress(UserOwnedMixin, BaseModel):
     """Progress model"""
     
     __tablename__ = "progress"
+    __table_args__ = (
+        CheckConstraint("total_time >= 0", name="ck_progress_total_time_non_negative"),
+        # Subject/overall row lookups and the recent study time window
+        Index("ix_progress_user_subject", "user_id", "subject_id"),
+        Index("ix_progress_user_updated", "user_id", "updated_at"),
+    )
     
     # Foreign keys
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    subject_id = Column(String(36), ForeignKey("subjects.id"), nullable=True)  # Null for overall progress
+    subject_id = Column(UUIDType, ForeignKey("subjects.id"), nullable=True)  # Null for overall progress
     
     # Statistics
     total_sessions = Column(Integer, default=0)
@@ -29,8 +35,8 @@ class Progress(BaseModel):
     last_study_date = Column(DateTime(timezone=True), nullable=True)
     
     # Additional metadata
-    achievements = Column(JSON, default=list)  # List of achievement IDs
-    goals = Column(JSON, default=list)  # List of goal IDs
+    achievements = Column(JSONType, default=list)  # List of achievement IDs
+    goals = Column(JSONType, default=list)  # List of goal IDs
     
     # Relationships
     user = relationship("User", back_populates="progress")
@@ -49,7 +55,7 @@ class Achievement(BaseModel):
     category = Column(String(50), nullable=False)  # study, quiz, exam, streak, etc.
     
     # Requirements
-    requirements = Column(JSON, nullable=False)  # Criteria to unlock
+    requirements = Column(JSONType, nullable=False)  # Criteria to unlock
     points = Column(Integer, default=0)
     
     # Status
@@ -59,10 +65,13 @@ class Achievement(BaseModel):
     # Achievement is a global configuration, no direct relationship needed
 
 
-class Goal(BaseModel):
+class Goal(UserOwnedMixin, BaseModel):
     """Goal model"""
     
     __tablename__ = "goals"
+    __table_args__ = (
+        Index("ix_goals_user_subject", "user_id", "subject_id"),
+    )
     
     # Basic info
     title = Column(String(255), nullable=False)
@@ -70,8 +79,7 @@ class Goal(BaseModel):
     category = Column(String(50), nullable=False)  # study_time, quiz_score, etc.
     
     # Foreign keys
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    subject_id = Column(String(36), ForeignKey("subjects.id"), nullable=True)
+    subject_id = Column(UUIDType, ForeignKey("subjects.id"), nullable=True)
     
     # Goal data
     target_value = Column(Float, nullable=False)
@@ -86,3 +94,51 @@ class Goal(BaseModel):
     # Relationships
     user = relationship("User")
     subject = relationship("Subject")
+
+
+# Per-user, per-subject aggregates over completed study sessions, kept as a
+# PostgreSQL materialized view. The table lives in its own MetaData so that
+# create_all does not try to create it as a regular table.
+user_progress_mv = Table(
+    "user_progress_mv",
+    MetaData(),
+    Column("user_id", UUIDType, primary_key=True),
+    Column("subject_id", UUIDType, primary_key=True),
+    Column("total_sessions", Integer),
+    Column("total_time", Integer),
+    Column("average_score", Float),
+    Column("last_study_date", DateTime(timezone=True)),
+)
+
+
+class ProgressView(Base):
+    """Read-only mapping of the user_progress_mv materialized view"""
+    
+    __table__ = user_progress_mv
+
+
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS user_progress_mv AS
+        SELECT user_id,
+               subject_id,
+               COUNT(*) AS total_sessions,
+               COALESCE(SUM(duration), 0) AS total_time,
+               AVG(score) AS average_score,
+               MAX(completed_at) AS last_study_date
+        FROM study_sessions
+        WHERE is_completed
+        GROUP BY user_id, subject_id;
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_user_progress_mv
+            ON user_progress_mv (user_id, subject_id);
+    """).execute_if(dialect="postgresql")
+)
+
+event.listen(
+    Base.metadata,
+    "before_drop",
+    DDL("DROP MATERIALIZED VIEW IF EXISTS user_progress_mv").execute_if(dialect="postgresql")
+)
+
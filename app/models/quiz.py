@@ -2,35 +2,41 @@
 Quiz model and related schemas
 """
 
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, SmallInteger, Boolean, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from typing import Optional, Dict, Any, List, Union
 from datetime import datetime
 
-from app.models.base import BaseModel
+from app.models.base import BaseModel, JSONType, SubjectOwnedMixin, UUIDType, UserOwnedMixin
 
 
-class Quiz(BaseModel):
+class Quiz(UserOwnedMixin, SubjectOwnedMixin, BaseModel):
     """Quiz model"""
     
     __tablename__ = "quizzes"
+    __table_args__ = (
+        # Partial: only the active subset that listings actually scan
+        Index("ix_quizzes_active", "user_id", postgresql_where=text("is_active")),
+        Index(
+            "ix_quizzes_tags_gin",
+            "tags",
+            postgresql_using="gin",
+            postgresql_ops={"tags": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
     
     # Basic info
     title = Column(String(255), nullable=False)
     difficulty = Column(String(50), default="medium")  # easy, medium, hard, expert
-    time_limit = Column(Integer, nullable=True)  # in minutes
-    
-    # Foreign keys
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    subject_id = Column(String(36), ForeignKey("subjects.id"), nullable=False)
+    time_limit = Column(SmallInteger, nullable=True)  # in minutes
     
     # Status
     is_active = Column(Boolean, default=True)
     
     # Additional metadata
     description = Column(Text, nullable=True)
-    tags = Column(JSON, default=list)
+    tags = Column(JSONType, default=list)
     
     # Relationships
     user = relationship("User", back_populates="quizzes")
@@ -47,15 +53,15 @@ class QuizQuestion(BaseModel):
     # Basic info
     type = Column(String(50), nullable=False)  # single, multiple
     question = Column(Text, nullable=False)
-    options = Column(JSON, nullable=False)  # List of options
-    correct_answer = Column(JSON, nullable=False)  # Index or list of indices
+    options = Column(JSONType, nullable=False)  # List of options
+    correct_answer = Column(JSONType, nullable=False)  # Index or list of indices
     explanation = Column(Text, nullable=True)
     difficulty = Column(String(50), default="medium")
-    points = Column(Integer, default=1)
+    points = Column(SmallInteger, default=1)
     
     # Foreign keys
-    quiz_id = Column(String(36), ForeignKey("quizzes.id"), nullable=False)
-    source_upload_id = Column(String(36), ForeignKey("uploads.id"), nullable=True)
+    quiz_id = Column(UUIDType, ForeignKey("quizzes.id"), nullable=False)
+    source_upload_id = Column(UUIDType, ForeignKey("uploads.id"), nullable=True)
     
     # AI generation
     ai_generated = Column(Boolean, default=False)
@@ -66,21 +72,23 @@ class QuizQuestion(BaseModel):
     user_answers = relationship("QuizUserAnswer", back_populates="quiz_question", cascade="all, delete-orphan")
 
 
-class QuizUserAnswer(BaseModel):
+class QuizUserAnswer(UserOwnedMixin, BaseModel):
     """User answer model"""
     
     __tablename__ = "user_answers"
+    __table_args__ = (
+        Index("ix_user_answers_user_question", "user_id", "quiz_question_id"),
+    )
     
     # Foreign keys
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    quiz_question_id = Column(String(36), ForeignKey("quiz_questions.id"), nullable=False)
+    quiz_question_id = Column(UUIDType, ForeignKey("quiz_questions.id"), nullable=False, index=True)
     
     # Answer data
-    answer = Column(JSON, nullable=False)  # Index, list of indices, or text
+    answer = Column(JSONType, nullable=False)  # Index, list of indices, or text
     is_correct = Column(Boolean, nullable=False)
-    time_spent = Column(Integer, default=0)  # in seconds
+    time_spent = Column(SmallInteger, default=0)  # in seconds, < 9h per question
     submitted_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     user = relationship("User")
-    quiz_question = relationship("QuizQuestion", back_populates="user_answers")
+    quiz_question = relationship("QuizQuestion", back_populates="user_answers", lazy="selectin")
@@ -2,31 +2,50 @@
 Study session model and related schemas
 """
 
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, Integer, SmallInteger, Float, Boolean, DateTime, ForeignKey, Text, Index, CheckConstraint, text
 
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from typing import Optional, Dict, Any, List, Union
 from datetime import datetime
 
-from app.models.base import BaseModel
+from app.models.base import BaseModel, JSONType, SubjectOwnedMixin, UUIDType, UserOwnedMixin
+from app.models.subject import Subject
 
 
-class StudySession(BaseModel):
+class StudySession(UserOwnedMixin, SubjectOwnedMixin, BaseModel):
     """Study session model"""
     
     __tablename__ = "study_sessions"
+    __table_args__ = (
+        # Covering index for the recent-sessions dashboard (index-only scans)
+        Index(
+            "ix_sessions_user_started_cov",
+            "user_id",
+            text("started_at DESC"),
+            postgresql_include=["type", "score", "completed_at", "is_completed"],
+        ),
+        Index("ix_sessions_user_subject_started", "user_id", "subject_id", text("started_at DESC")),
+        CheckConstraint("duration >= 0", name="ck_sessions_duration_non_negative"),
+        # Partial: most sessions end up completed, only open ones are looked up
+        Index("ix_sessions_open", "user_id", postgresql_where=text("NOT is_completed")),
+        Index(
+            "ix_sessions_tags_gin",
+            "tags",
+            postgresql_using="gin",
+            postgresql_ops={"tags": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
     
     # Basic info
     type = Column(String(50), nullable=False)  # quiz, exam, concept-map, summary
-    content_id = Column(String(36), nullable=False)  # quiz_id, exam_id, or concept_map_id
+    content_id = Column(UUIDType, nullable=False)  # quiz_id, exam_id, or concept_map_id
     
     # Foreign keys
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    subject_id = Column(String(36), ForeignKey("subjects.id"), nullable=False)
-    quiz_id = Column(String(36), ForeignKey("quizzes.id"), nullable=True)
-    exam_id = Column(String(36), ForeignKey("exams.id"), nullable=True)
-    concept_map_id = Column(String(36), ForeignKey("concept_maps.id"), nullable=True)
+    quiz_id = Column(UUIDType, ForeignKey("quizzes.id"), nullable=True)
+    exam_id = Column(UUIDType, ForeignKey("exams.id"), nullable=True)
+    concept_map_id = Column(UUIDType, ForeignKey("concept_maps.id"), nullable=True)
     
     # Session data
     started_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -38,33 +57,74 @@ class StudySession(BaseModel):
     
     # Additional metadata
     notes = Column(Text, nullable=True)
-    tags = Column(JSON, default=list)
+    tags = Column(JSONType, default=list)
     
     # Relationships
     user = relationship("User", back_populates="study_sessions")
-    subject = relationship("Subject", back_populates="study_sessions")
-    quiz = relationship("Quiz", back_populates="study_sessions")
-    exam = relationship("Exam", back_populates="study_sessions")
+    subject = relationship("Subject", back_populates="study_sessions", lazy="selectin")
+    quiz = relationship("Quiz", back_populates="study_sessions", lazy="selectin")
+    exam = relationship("Exam", back_populates="study_sessions", lazy="selectin")
     concept_map = relationship("ConceptMap", back_populates="study_sessions")
     user_answers = relationship("SessionUserAnswer", back_populates="study_session", cascade="all, delete-orphan")
 
 
-class SessionUserAnswer(BaseModel):
+class SessionUserAnswer(UserOwnedMixin, BaseModel):
     """User answer model for study sessions"""
     
     __tablename__ = "study_session_answers"
+    __table_args__ = (
+        Index("ix_session_answers_user_question", "user_id", "question_id"),
+    )
     
     # Foreign keys
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    study_session_id = Column(String(36), ForeignKey("study_sessions.id"), nullable=False)
-    question_id = Column(String(36), nullable=False)  # Can be quiz_question_id or exam_question_id
+    study_session_id = Column(UUIDType, ForeignKey("study_sessions.id"), nullable=False, index=True)
+    question_id = Column(UUIDType, nullable=False)  # Can be quiz_question_id or exam_question_id
     
     # Answer data
-    answer = Column(JSON, nullable=False)  # Index, list of indices, or text
+    answer = Column(JSONType, nullable=False)  # Index, list of indices, or text
     is_correct = Column(Boolean, nullable=False)
-    time_spent = Column(Integer, default=0)  # in seconds
+    time_spent = Column(SmallInteger, default=0)  # in seconds, < 9h per question
     submitted_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     user = relationship("User")
     study_session = relationship("StudySession", back_populates="user_answers")
+
+
+def _roll_up_completed_session(connection, target: StudySession) -> None:
+    """Fold a newly completed session into its subject's statistics"""
+    subjects = Subject.__table__
+    values = {
+        "study_time": func.coalesce(subjects.c.study_time, 0) + (target.duration or 0),
+        "last_activity": target.completed_at or func.now(),
+    }
+    
+    if target.type == "quiz":
+        values["total_quizzes"] = func.coalesce(subjects.c.total_quizzes, 0) + 1
+    elif target.type == "exam":
+        values["total_exams"] = func.coalesce(subjects.c.total_exams, 0) + 1
+    
+    if target.score is not None:
+        scored = func.coalesce(subjects.c.scored_sessions, 0)
+        average = func.coalesce(subjects.c.average_score, 0.0)
+        values["average_score"] = (average * scored + target.score) / (scored + 1)
+        values["scored_sessions"] = scored + 1
+    
+    connection.execute(
+        subjects.update()
+        .where(subjects.c.id == target.subject_id)
+        .values(**values)
+    )
+
+
+@event.listens_for(StudySession, "after_insert")
+def _study_session_inserted(mapper, connection, target: StudySession) -> None:
+    if target.is_completed:
+        _roll_up_completed_session(connection, target)
+
+
+@event.listens_for(StudySession, "after_update")
+def _study_session_updated(mapper, connection, target: StudySession) -> None:
+    history = inspect(target).attrs.is_completed.history
+    if target.is_completed and history.has_changes():
+        _roll_up_completed_session(connection, target)
@@ -2,38 +2,40 @@
 Subject model and related schemas
 """
 
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, Float, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from typing import Optional, Dict, Any
 from datetime import datetime
 
-from app.models.base import BaseModel
+from app.models.base import BaseModel, JSONType, UserOwnedMixin
 
 
-class Subject(BaseModel):
+class Subject(UserOwnedMixin, BaseModel):
     """Subject model"""
     
     __tablename__ = "subjects"
+    __table_args__ = (
+        # Subject list for the dashboard
+        Index("ix_subjects_user", "user_id"),
+    )
     
     # Basic info
     name = Column(String(255), nullable=False)
     color = Column(String(7), default="#3B82F6")  # Hex color
     icon = Column(String(50), default="book")  # Icon name
     
-    # Foreign keys
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    
-    # Statistics
+    # Statistics (roll-ups maintained from completed study sessions)
     total_quizzes = Column(Integer, default=0)
     total_exams = Column(Integer, default=0)
     average_score = Column(Float, default=0.0)
+    scored_sessions = Column(Integer, default=0)  # sessions counted in average_score
     study_time = Column(Integer, default=0)  # in minutes
     last_activity = Column(DateTime(timezone=True), nullable=True)
     
     # Additional metadata
     description = Column(String(1000), nullable=True)
-    tags = Column(JSON, default=list)
+    tags = Column(JSONType, default=list)
     
     # Relationships
     user = relationship("User", back_populates="subjects")
@@ -49,6 +51,8 @@ class Subject(BaseModel):
 class SubjectStats:
     """Subject statistics schema"""
     
+    __slots__ = ("total_quizzes", "total_exams", "average_score", "study_time", "last_activity")
+    
     def __init__(
         self,
         total_quizzes: int = 0,
@@ -64,10 +68,7 @@ class SubjectStats:
         self.last_activity = last_activity
     
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "total_quizzes": self.total_quizzes,
-            "total_exams": self.total_exams,
-            "average_score": self.average_score,
-            "study_time": self.study_time,
-            "last_activity": self.last_activity.isoformat() if self.last_activity else None
-        }
+        data = {name: getattr(self, name) for name in self.__slots__}
+        if self.last_activity:
+            data["last_activity"] = self.last_activity.isoformat()
+        return data
@@ -2,19 +2,28 @@
 Upload model and related schemas
 """
 
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from typing import Optional, Dict, Any, List
+from typing import Dict, Any, List
 from datetime import datetime
 
-from app.models.base import BaseModel
+from app.core.database import Base
+from app.models.base import BaseModel, JSONType, SubjectOwnedMixin, UUIDType, UserOwnedMixin
 
+# Full-text search expression; queries must repeat it verbatim to use the GIN index
+SEARCH_CONFIG_SQL = "CASE language WHEN 'it' THEN 'italian'::regconfig ELSE 'english'::regconfig END"
+SEARCH_VECTOR_SQL = f"to_tsvector({SEARCH_CONFIG_SQL}, coalesce(extracted_text, ''))"
 
-class Upload(BaseModel):
+
+class Upload(UserOwnedMixin, SubjectOwnedMixin, BaseModel):
     """Upload model"""
     
     __tablename__ = "uploads"
+    __table_args__ = (
+        Index("ix_uploads_user_status", "user_id", "status"),
+        Index("ix_uploads_user_subject", "user_id", "subject_id"),
+    )
     
     # Basic info
     name = Column(String(255), nullable=False)
@@ -22,10 +31,6 @@ class Upload(BaseModel):
     size = Column(Integer, nullable=False)  # in bytes
     url = Column(String(1000), nullable=False)
     
-    # Foreign keys
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    subject_id = Column(String(36), ForeignKey("subjects.id"), nullable=False)
-    
     # Cloud service integration
     cloud_service = Column(String(50), nullable=True)  # google-drive, dropbox, onedrive
     cloud_file_id = Column(String(255), nullable=True)
@@ -35,45 +40,89 @@ class Upload(BaseModel):
     processing_error = Column(Text, nullable=True)
     processed_at = Column(DateTime(timezone=True), nullable=True)
     
-    # File metadata
-    file_metadata = Column(JSON, default=dict)
-    
     # Relationships
     user = relationship("User", back_populates="uploads")
-    subject = relationship("Subject", back_populates="uploads")
+    subject = relationship("Subject", back_populates="uploads", lazy="selectin")
+    # Rendered with almost every upload, so joined
+    file_metadata = relationship(
+        "UploadMetadata",
+        uselist=False,
+        lazy="joined",
+        cascade="all, delete-orphan"
+    )
     quiz_questions = relationship("QuizQuestion", back_populates="source_upload")
     exam_questions = relationship("ExamQuestion", back_populates="source_upload")
     concept_nodes = relationship("ConceptNode", back_populates="source_upload")
 
 
-class FileMetadata:
-    """File metadata schema"""
+class UploadMetadata(Base):
+    """Extracted file metadata, one row per processed upload"""
+    
+    __tablename__ = "upload_metadata"
+    __table_args__ = (
+        Index(
+            "ix_upload_metadata_fts",
+            text(SEARCH_VECTOR_SQL),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+    
+    upload_id = Column(UUIDType, ForeignKey("uploads.id", ondelete="CASCADE"), primary_key=True)
+    language = Column(String(10), default="it")
+    pages = Column(Integer, nullable=True)
+    duration = Column(Integer, nullable=True)  # in seconds
+    dimensions = Column(JSONType, nullable=True)
+    summary = Column(Text, nullable=True)
+    extracted_text = Column(Text, nullable=True)
+    
+    # Relationships
+    keyword_rows = relationship(
+        "UploadKeyword",
+        lazy="selectin",
+        cascade="all, delete-orphan",
+        order_by="UploadKeyword.position"
+    )
+    
+    @property
+    def keywords(self) -> List[str]:
+        """Keywords in extraction order"""
+        return [row.keyword for row in self.keyword_rows]
+    
+    @keywords.setter
+    def keywords(self, values: List[str]) -> None:
+        unique = dict.fromkeys(value[:100] for value in values if value)
+        self.keyword_rows = [
+            UploadKeyword(keyword=keyword, position=i)
+            for i, keyword in enumerate(unique)
+        ]
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UploadMetadata":
+        """Build from the dict produced by metadata extraction"""
+        metadata = cls(
+            language=data.get("language", "it"),
+            pages=data.get("pages"),
+            duration=data.get("duration"),
+            dimensions=data.get("dimensions"),
+            summary=data.get("summary"),
+            extracted_text=data.get("extracted_text")
+        )
+        metadata.keywords = data.get("keywords") or []
+        return metadata
+
+
+class UploadKeyword(Base):
+    """Keyword extracted from an upload"""
     
-    def __init__(
-        self,
-        pages: Optional[int] = None,
-        duration: Optional[int] = None,  # in seconds
-        dimensions: Optional[Dict[str, int]] = None,
-        extracted_text: Optional[str] = None,
-        summary: Optional[str] = None,
-        keywords: Optional[List[str]] = None,
-        language: str = "it"
-    ):
-        self.pages = pages
-        self.duration = duration
-        self.dimensions = dimensions or {}
-        self.extracted_text = extracted_text
-        self.summary = summary
-        self.keywords = keywords or []
-        self.language = language
+    __tablename__ = "upload_keywords"
+    __table_args__ = (
+        Index("ix_upload_keywords_keyword", "keyword"),
+    )
     
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "pages": self.pages,
-            "duration": self.duration,
-            "dimensions": self.dimensions,
-            "extracted_text": self.extracted_text,
-            "summary": self.summary,
-            "keywords": self.keywords,
-            "language": self.language
-        }
+    upload_id = Column(
+        UUIDType,
+        ForeignKey("upload_metadata.upload_id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    keyword = Column(String(100), primary_key=True)
+    position = Column(Integer, default=0)
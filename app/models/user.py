@@ -2,23 +2,36 @@
 User model and related schemas
 """
 
-from sqlalchemy import Column, String, Boolean, DateTime, Text, JSON
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
 from datetime import datetime
 from typing import Optional, Dict, Any
 
-from app.models.base import BaseModel
+from app.models.base import BaseModel, MutableJSONDict
 
 
 class User(BaseModel):
     """User model"""
     
     __tablename__ = "users"
+    __table_args__ = (
+        # Case-insensitive uniqueness; also serves lower(email) lookups at login
+        Index("uq_users_email_lower", text("lower(email)"), unique=True),
+        # OAuth login lookups; partial so the many password-only users stay out of the index
+        Index(
+            "ix_users_google_id", "google_id", unique=True,
+            postgresql_where=text("google_id IS NOT NULL"), sqlite_where=text("google_id IS NOT NULL")
+        ),
+        Index(
+            "ix_users_apple_id", "apple_id", unique=True,
+            postgresql_where=text("apple_id IS NOT NULL"), sqlite_where=text("apple_id IS NOT NULL")
+        ),
+    )
     
     # Basic info
-    email = Column(String(255), unique=True, index=True, nullable=False)
+    email = Column(String(255), nullable=False)
     name = Column(String(255), nullable=False)
     avatar = Column(String(500), nullable=True)
     
@@ -29,7 +42,7 @@ class User(BaseModel):
     last_login_at = Column(DateTime(timezone=True), nullable=True)
     
     # Preferences
-    preferences = Column(JSON, default={
+    preferences = Column(MutableJSONDict, default=lambda: {
         "language": "it",
         "difficulty": "medium",
         "study_mode": "mixed",
@@ -41,13 +54,13 @@ class User(BaseModel):
     subscription_expires_at = Column(DateTime(timezone=True), nullable=True)
     
     # OAuth providers
-    google_id = Column(String(255), nullable=True, unique=True)
-    apple_id = Column(String(255), nullable=True, unique=True)
+    google_id = Column(String(255), nullable=True)
+    apple_id = Column(String(255), nullable=True)
     microsoft_id = Column(String(255), nullable=True, unique=True)
     
     # OAuth provider info
     oauth_provider = Column(String(50), nullable=True)  # google, apple, microsoft
-    oauth_data = Column(JSON, nullable=True)  # Store additional OAuth data
+    oauth_data = Column(MutableJSONDict, nullable=True)  # Store additional OAuth data
     
     # Relationships
     subjects = relationship("Subject", back_populates="user", cascade="all, delete-orphan")
@@ -63,6 +76,8 @@ class User(BaseModel):
 class UserPreferences:
     """User preferences schema"""
     
+    __slots__ = ("language", "difficulty", "study_mode", "notifications")
+    
     def __init__(
         self,
         language: str = "it",
@@ -76,9 +91,4 @@ class UserPreferences:
         self.notifications = notifications
     
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "language": self.language,
-            "difficulty": self.difficulty,
-            "study_mode": self.study_mode,
-            "notifications": self.notifications
-        }
+        return {name: getattr(self, name) for name in self.__slots__}
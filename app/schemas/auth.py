@@ -3,8 +3,13 @@ Authentication schemas
 """
 
 from datetime import datetime
-from typing import Optional, Dict, Any
-from pydantic import BaseModel, EmailStr, field_validator
+from typing import Optional, Dict, Any, Literal, Annotated
+from pydantic import BaseModel, EmailStr, StringConstraints
+
+from app.schemas.base import Difficulty, ORMResponse
+
+# Checked by pydantic-core; no Python validator call per request
+Password = Annotated[str, StringConstraints(min_length=8)]
 
 
 class UserBase(BaseModel):
@@ -15,14 +20,7 @@ class UserBase(BaseModel):
 
 class UserCreate(UserBase):
     """User creation schema"""
-    password: str
-    
-    @field_validator('password', mode='before')
-    @classmethod
-    def validate_password(cls, v):
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        return v
+    password: Password
 
 
 class UserLogin(BaseModel):
@@ -31,7 +29,7 @@ class UserLogin(BaseModel):
     password: str
 
 
-class UserResponse(UserBase):
+class UserResponse(UserBase, ORMResponse):
     """User response schema"""
     id: str
     avatar: Optional[str] = None
@@ -44,7 +42,7 @@ class UserResponse(UserBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
 
 
 class TokenResponse(BaseModel):
@@ -63,40 +61,14 @@ class TokenRefresh(BaseModel):
 class PasswordChange(BaseModel):
     """Password change schema"""
     current_password: str
-    new_password: str
-    
-    @field_validator('new_password', mode='before')
-    @classmethod
-    def validate_new_password(cls, v):
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        return v
+    new_password: Password
 
 
 class UserPreferencesUpdate(BaseModel):
     """User preferences update schema"""
-    language: Optional[str] = None
-    difficulty: Optional[str] = None
-    study_mode: Optional[str] = None
+    language: Optional[Literal["it", "en"]] = None
+    difficulty: Optional[Difficulty] = None
+    study_mode: Optional[Literal["visual", "textual", "mixed"]] = None
     notifications: Optional[bool] = None
     
-    @field_validator('language', mode='before')
-    @classmethod
-    def validate_language(cls, v):
-        if v and v not in ['it', 'en']:
-            raise ValueError('Language must be either "it" or "en"')
-        return v
-    
-    @field_validator('difficulty', mode='before')
-    @classmethod
-    def validate_difficulty(cls, v):
-        if v and v not in ['easy', 'medium', 'hard', 'expert']:
-            raise ValueError('Difficulty must be one of: easy, medium, hard, expert')
-        return v
-    
-    @field_validator('study_mode', mode='before')
-    @classmethod
-    def validate_study_mode(cls, v):
-        if v and v not in ['visual', 'textual', 'mixed']:
-            raise ValueError('Study mode must be one of: visual, textual, mixed')
-        return v
+    model_config = {"str_strip_whitespace": True, "extra": "ignore"}
@@ -0,0 +1,114 @@
+"""
+Shared schema base classes
+"""
+
+from typing import Annotated, Any, List, Literal, Optional, Union, get_args, get_origin
+from pydantic import BaseModel, Discriminator, Field, StringConstraints, Tag, model_validator
+
+from app.core.config import settings
+
+# Closed value sets, checked by pydantic-core and listed in the OpenAPI schema
+Difficulty = Literal["easy", "medium", "hard", "expert"]
+QuestionType = Literal["single", "multiple", "open"]
+SessionType = Literal["quiz", "exam", "concept-map", "summary"]
+
+# Checked by pydantic-core's compiled regex, no Python validator involved
+HexColor = Annotated[str, StringConstraints(pattern=r"^#[0-9A-Fa-f]{6}$")]
+
+# Upper bound on the IN (...) list the AI generate flows send to the database
+MAX_SOURCE_UPLOADS = 200
+SourceUploadIds = Annotated[List[str], Field(max_length=MAX_SOURCE_UPLOADS)]
+
+
+def _answer_kind(value: Any) -> str:
+    """Pick the answer arm from the value's Python type"""
+    if isinstance(value, list):
+        return "multi"
+    if isinstance(value, str):
+        return "open"
+    return "single"
+
+
+# Option index, list of indices, or free text; dispatched once instead of trying each arm
+AnswerValue = Annotated[
+    Union[
+        Annotated[int, Tag("single")],
+        Annotated[List[int], Tag("multi")],
+        Annotated[str, Tag("open")],
+    ],
+    Discriminator(_answer_kind),
+]
+
+
+
+def _check_multiple(correct: Any, answer: Any) -> bool:
+    """Same options selected, order ignored"""
+    return isinstance(answer, list) and isinstance(correct, list) and set(answer) == set(correct)
+
+
+# Choice answer checks by question type: one dict lookup per answer instead of an if/elif ladder
+ANSWER_CHECKS = {
+    "single": lambda correct, answer: answer == correct,
+    "multiple": _check_multiple,
+}
+
+
+class QuestionMixin(BaseModel):
+    """Fields and checks shared by quiz and exam questions"""
+    type: QuestionType  # open is for exams only
+    question: str
+    explanation: Optional[str] = None
+    difficulty: Difficulty = "medium"
+    points: int = Field(1, ge=0, le=32767)  # stored as SMALLINT
+    
+    @model_validator(mode="after")
+    def check_correct_answer(self):
+        """Answer indices must point at an existing option"""
+        options = getattr(self, "options", None)
+        answer = getattr(self, "correct_answer", None)
+        if not options or isinstance(answer, str) or answer is None:
+            return self
+        indices = answer if isinstance(answer, list) else [answer]
+        if any(not 0 <= index < len(options) for index in indices):
+            raise ValueError("correct_answer must index into options")
+        return self
+
+
+class ORMResponse(BaseModel):
+    """Response schema built from already-validated ORM rows"""
+    
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
+    
+    @classmethod
+    def from_orm_fast(cls, obj: Any, **overrides: Any):
+        """Build from an ORM object, skipping validation when enabled"""
+        values = {}
+        for name in cls.model_fields:
+            if name in overrides:
+                values[name] = overrides[name]
+            elif hasattr(obj, name):
+                values[name] = getattr(obj, name)
+        
+        if not settings.FAST_RESPONSE_CONSTRUCTION:
+            return cls.model_validate(values)
+        
+        for name, value in values.items():
+            values[name] = _construct_nested(cls.model_fields[name].annotation, value)
+        return cls.model_construct(**values)
+
+
+def _construct_nested(annotation: Any, value: Any) -> Any:
+    """Apply from_orm_fast to nested ORMResponse and List[ORMResponse] fields"""
+    if value is None:
+        return value
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            annotation = args[0]
+    if isinstance(annotation, type) and issubclass(annotation, ORMResponse):
+        return annotation.from_orm_fast(value)
+    if get_origin(annotation) is list:
+        args = get_args(annotation)
+        if args and isinstance(args[0], type) and issubclass(args[0], ORMResponse):
+            return [args[0].from_orm_fast(item) for item in value]
+    return value
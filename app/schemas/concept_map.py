@@ -4,7 +4,9 @@ Concept map schemas
 
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
+
+from app.schemas.base import SourceUploadIds
 
 
 class ConceptNodeBase(BaseModel):
@@ -43,7 +45,7 @@ class ConceptNodeResponse(ConceptNodeBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
 
 
 class ConceptConnectionBase(BaseModel):
@@ -74,7 +76,7 @@ class ConceptConnectionResponse(ConceptConnectionBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
 
 
 class ConceptMapBase(BaseModel):
@@ -110,14 +112,41 @@ class ConceptMapResponse(ConceptMapBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
+
+
+class GeneratedConceptNode(BaseModel):
+    """Concept node as returned by the AI"""
+    id: str
+    label: str
+    x: Optional[float] = None
+    y: Optional[float] = None
+    type: str = "main"
+    color: str = "#3B82F6"
+    description: str = ""
+    examples: List[str] = []
+
+
+class GeneratedConceptConnection(BaseModel):
+    """Concept connection as returned by the AI"""
+    from_node: str = Field(alias="from")
+    to_node: str = Field(alias="to")
+    label: str = ""
+    type: str = "direct"
+    strength: float = 1.0
+
+
+class GeneratedConceptMap(BaseModel):
+    """Concept map as returned by the AI"""
+    nodes: List[GeneratedConceptNode] = []
+    connections: List[GeneratedConceptConnection] = []
 
 
 class ConceptMapGenerationRequest(BaseModel):
     """Concept map generation request schema"""
     subject_id: str
     title: str
-    source_upload_ids: Optional[List[str]] = None
+    source_upload_ids: Optional[SourceUploadIds] = None
     is_public: bool = False
     tags: List[str] = []
 
@@ -3,19 +3,16 @@ Exam schemas
 """
 
 from datetime import datetime
-from typing import Optional, List, Dict, Any, Union
-from pydantic import BaseModel, field_validator
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 
+from app.schemas.base import AnswerValue, Difficulty, QuestionMixin, SourceUploadIds
 
-class ExamQuestionBase(BaseModel):
+
+class ExamQuestionBase(QuestionMixin):
     """Base exam question schema"""
-    type: str  # single, multiple, open
-    question: str
     options: Optional[List[str]] = None
-    correct_answer: Optional[Union[int, List[int], str]] = None
-    explanation: Optional[str] = None
-    difficulty: str = "medium"
-    points: int = 1
+    correct_answer: Optional[AnswerValue] = None
 
 
 class ExamQuestionCreate(ExamQuestionBase):
@@ -32,13 +29,17 @@ class ExamQuestionResponse(ExamQuestionBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
+
+
+# Built once; validates a whole list of question rows in a single pass
+EXAM_QUESTIONS_ADAPTER = TypeAdapter(List[ExamQuestionResponse])
 
 
 class ExamBase(BaseModel):
     """Base exam schema"""
     title: str
-    difficulty: str = "medium"
+    difficulty: Difficulty = "medium"
     time_limit: int  # in minutes
     total_points: int = 0
     passing_score: int = 60  # percentage
@@ -56,7 +57,7 @@ class ExamCreate(ExamBase):
 class ExamUpdate(BaseModel):
     """Exam update schema"""
     title: Optional[str] = None
-    difficulty: Optional[str] = None
+    difficulty: Optional[Difficulty] = None
     time_limit: Optional[int] = None
     total_points: Optional[int] = None
     passing_score: Optional[int] = None
@@ -76,7 +77,7 @@ class ExamResponse(ExamBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
 
 
 class ExamStartRequest(BaseModel):
@@ -87,8 +88,8 @@ class ExamStartRequest(BaseModel):
 class ExamAnswer(BaseModel):
     """Exam answer schema"""
     question_id: str
-    answer: Union[int, List[int], str]
-    time_spent: int = 0  # in seconds
+    answer: AnswerValue
+    time_spent: int = Field(0, ge=0, le=32767)  # in seconds, stored as SMALLINT
 
 
 class ExamSubmitRequest(BaseModel):
@@ -115,11 +116,11 @@ class ExamGenerationRequest(BaseModel):
     """Exam generation request schema"""
     subject_id: str
     title: str
-    difficulty: str = "medium"
+    difficulty: Difficulty = "medium"
     num_questions: int = 10
     time_limit: int = 60  # in minutes
     passing_score: int = 60
-    source_upload_ids: Optional[List[str]] = None
+    source_upload_ids: Optional[SourceUploadIds] = None
     tags: List[str] = []
 
 
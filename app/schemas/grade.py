@@ -6,6 +6,8 @@ from datetime import date, datetime
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, field_validator
 
+from app.schemas.base import ORMResponse
+
 
 class GradeBase(BaseModel):
     """Base grade schema"""
@@ -38,7 +40,7 @@ class GradeUpdate(BaseModel):
     notes: Optional[str] = None
 
 
-class GradeResponse(GradeBase):
+class GradeResponse(GradeBase, ORMResponse):
     """Grade response schema"""
     id: str
     user_id: str
@@ -49,7 +51,7 @@ class GradeResponse(GradeBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
 
 
 class GradeStats(BaseModel):
@@ -26,7 +26,7 @@ class ProgressResponse(ProgressBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
 
 
 class AchievementBase(BaseModel):
@@ -45,7 +45,7 @@ class AchievementResponse(AchievementBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
 
 
 class GoalBase(BaseModel):
@@ -82,7 +82,7 @@ class GoalResponse(GoalBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
 
 
 class ProgressStats(BaseModel):
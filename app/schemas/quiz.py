@@ -3,19 +3,17 @@ Quiz schemas
 """
 
 from datetime import datetime
-from typing import Optional, List, Dict, Any, Union
-from pydantic import BaseModel, field_validator
+from typing import Optional, List, Dict, Any, Literal, Union
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 
+from app.schemas.base import AnswerValue, Difficulty, QuestionMixin, SourceUploadIds
 
-class QuizQuestionBase(BaseModel):
+
+class QuizQuestionBase(QuestionMixin):
     """Base quiz question schema"""
-    type: str  # single, multiple
-    question: str
+    type: Literal["single", "multiple"]
     options: List[str]
     correct_answer: Union[int, List[int]]
-    explanation: Optional[str] = None
-    difficulty: str = "medium"
-    points: int = 1
 
 
 class QuizQuestionCreate(QuizQuestionBase):
@@ -32,13 +30,17 @@ class QuizQuestionResponse(QuizQuestionBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
+
+
+# Built once; validates a whole list of question rows in a single pass
+QUIZ_QUESTIONS_ADAPTER = TypeAdapter(List[QuizQuestionResponse])
 
 
 class QuizBase(BaseModel):
     """Base quiz schema"""
     title: str
-    difficulty: str = "medium"
+    difficulty: Difficulty = "medium"
     time_limit: Optional[int] = None
     description: Optional[str] = None
     tags: List[str] = []
@@ -53,7 +55,7 @@ class QuizCreate(QuizBase):
 class QuizUpdate(BaseModel):
     """Quiz update schema"""
     title: Optional[str] = None
-    difficulty: Optional[str] = None
+    difficulty: Optional[Difficulty] = None
     time_limit: Optional[int] = None
     description: Optional[str] = None
     tags: Optional[List[str]] = None
@@ -70,7 +72,7 @@ class QuizResponse(QuizBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
 
 
 class QuizStartRequest(BaseModel):
@@ -81,8 +83,8 @@ class QuizStartRequest(BaseModel):
 class QuizAnswer(BaseModel):
     """Quiz answer schema"""
     question_id: str
-    answer: Union[int, List[int], str]
-    time_spent: int = 0  # in seconds
+    answer: AnswerValue
+    time_spent: int = Field(0, ge=0, le=32767)  # in seconds, stored as SMALLINT
 
 
 class QuizSubmitRequest(BaseModel):
@@ -108,10 +110,10 @@ class QuizGenerationRequest(BaseModel):
     """Quiz generation request schema"""
     subject_id: str
     title: str
-    difficulty: str = "medium"
+    difficulty: Difficulty = "medium"
     num_questions: int = 5
     time_limit: Optional[int] = None
-    source_upload_ids: Optional[List[str]] = None
+    source_upload_ids: Optional[SourceUploadIds] = None
     tags: List[str] = []
 
 
@@ -6,10 +6,12 @@ from datetime import datetime
 from typing import Optional, List, Dict, Any, Union
 from pydantic import BaseModel, field_validator
 
+from app.schemas.base import SessionType
+
 
 class StudySessionBase(BaseModel):
     """Base study session schema"""
-    type: str  # quiz, exam, concept-map, summary
+    type: SessionType
     content_id: str  # quiz_id, exam_id, or concept_map_id
     notes: Optional[str] = None
     tags: List[str] = []
@@ -44,12 +46,12 @@ class StudySessionResponse(StudySessionBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
 
 
 class StudySessionStart(BaseModel):
     """Study session start schema"""
-    type: str
+    type: SessionType
     content_id: str
     subject_id: str
 
@@ -4,7 +4,9 @@ Subject schemas
 
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel
+
+from app.schemas.base import HexColor
 
 
 class SubjectBase(BaseModel):
@@ -18,23 +20,16 @@ class SubjectBase(BaseModel):
 
 class SubjectCreate(SubjectBase):
     """Subject creation schema"""
-    pass
+    color: HexColor = "#3B82F6"
 
 
 class SubjectUpdate(BaseModel):
     """Subject update schema"""
     name: Optional[str] = None
-    color: Optional[str] = None
+    color: Optional[HexColor] = None
     icon: Optional[str] = None
     description: Optional[str] = None
     tags: Optional[List[str]] = None
-    
-    @field_validator('color', mode='before')
-    @classmethod
-    def validate_color(cls, v):
-        if v and not v.startswith('#'):
-            raise ValueError('Color must be a valid hex color')
-        return v
 
 
 class SubjectResponse(SubjectBase):
@@ -49,7 +44,7 @@ class SubjectResponse(SubjectBase):
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
 
 
 class SubjectStats(BaseModel):
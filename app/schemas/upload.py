@@ -40,6 +40,15 @@ class FileMetadata(BaseModel):
     summary: Optional[str] = None
     keywords: List[str] = []
     language: str = "it"
+    
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
+
+
+class ContentAnalysis(BaseModel):
+    """Summary and keywords from one AI call, plus the detected language"""
+    summary: str
+    keywords: List[str] = []
+    language: str = "it"
 
 
 class UploadBase(BaseModel):
@@ -65,11 +74,11 @@ class UploadResponse(UploadBase):
     status: UploadStatus
     processing_error: Optional[str] = None
     processed_at: Optional[datetime] = None
-    file_metadata: FileMetadata
+    file_metadata: Optional[FileMetadata] = None  # None until processed
     created_at: datetime
     updated_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True, "extra": "forbid"}
 
 
 class UploadStatusResponse(BaseModel):
@@ -2,62 +2,201 @@
 AI service for content processing and generation
 """
 
-import openai
-from typing import List, Dict, Any, Optional
-import PyPDF2
-import pytesseract
-from PIL import Image
+from typing import List, Dict, Any, Optional, Tuple, Union
+import atexit
+import hashlib
+import multiprocessing
 import io
 import re
+import threading
+import orjson
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from pydantic import TypeAdapter
 
 from app.core.config import settings
+from app.core.database import get_redis
 from app.core.exceptions import AIProcessingError
+from app.schemas.quiz import QuizQuestionBase
+from app.schemas.concept_map import GeneratedConceptMap
+from app.schemas.upload import ContentAnalysis
+
+# Built once at import; AI replies are parsed and validated in a single pass
+QUIZ_QUESTIONS_PAYLOAD = TypeAdapter(List[QuizQuestionBase])
+
+# Language detection compares whole tokens from the start of the text
+_TOKEN_RE = re.compile(r"\b\w+\b")
+_LANGUAGE_SAMPLE_CHARS = 2000
+_ITALIAN_WORDS = frozenset(['il', 'la', 'di', 'che', 'e', 'un', 'una', 'per', 'con', 'del', 'della'])
+_ENGLISH_WORDS = frozenset(['the', 'and', 'of', 'to', 'a', 'in', 'is', 'it', 'you', 'that', 'he'])
+
+# Length filters live in the patterns so short words are never materialized
+_KEYWORD_RE = re.compile(r"\b\w{4,}\b")
+_CONCEPT_RE = re.compile(r"\b\w{5,}\b")
+
+# LLMs often wrap JSON replies in markdown code fences
+_JSON_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+
+
+# openai, PyPDF2, pytesseract and PIL are imported on first use so that
+# workers which never process files or call the AI do not pay for them
+
+
+@lru_cache(maxsize=None)
+def _openai():
+    """Import and configure the OpenAI client once"""
+    import openai
+    
+    openai.api_key = settings.OPENAI_API_KEY
+    return openai
+
+
+@lru_cache(maxsize=None)
+def _pdfium():
+    """Native PDFium is much faster than pure-Python PyPDF2; None when not installed"""
+    try:
+        import pypdfium2
+    except ImportError:
+        return None
+    return pypdfium2
+
+
+# PDFium is not thread-safe; in-process calls from worker threads take turns
+_PDFIUM_LOCK = threading.Lock()
+
+# Long PDFs are split into one block of pages per worker process; shorter
+# ones are cheaper to parse inline than to ship to another process
+_PDF_PARALLEL_MIN_PAGES = 32
+
+
+@lru_cache(maxsize=None)
+def _pdf_pool() -> ProcessPoolExecutor:
+    """Process pool for PDF text extraction, started on first use"""
+    # Spawned, not forked: the parent is a threaded uvicorn or Celery process
+    return ProcessPoolExecutor(
+        max_workers=settings.PDF_EXTRACT_WORKERS,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+@atexit.register
+def shutdown_pdf_pool() -> None:
+    """Stop the PDF pool's processes if it was started"""
+    if _pdf_pool.cache_info().currsize:
+        _pdf_pool().shutdown()
+        _pdf_pool.cache_clear()
+
+
+def _pdf_pages_text(file_content: bytes, start: int, stop: int) -> str:
+    """Extract the text of pages [start, stop); runs in a pool process"""
+    pdf = _pdfium().PdfDocument(file_content)
+    try:
+        return "\n".join(pdf[index].get_textpage().get_text_range() for index in range(start, stop))
+    finally:
+        pdf.close()
+
+
+def _pdf_text_parallel(file_content: bytes, pages: int) -> str:
+    """Extract PDF text across the process pool, keeping page order"""
+    block = -(-pages // settings.PDF_EXTRACT_WORKERS)
+    starts = range(0, pages, block)
+    stops = [min(start + block, pages) for start in starts]
+    return "\n".join(_pdf_pool().map(_pdf_pages_text, repeat(file_content), starts, stops))
+
+
+def _strip_json_fences(text: str) -> str:
+    """Remove a surrounding ```json fence from an AI reply"""
+    return _JSON_FENCE_RE.sub("", text)
+
+
+# Raw upload content; any buffer is accepted, bytes flow through without a copy
+FileContent = Union[bytes, bytearray, memoryview]
+
+
+def _as_bytes(file_content: FileContent) -> bytes:
+    """Return bytes, copying only when given another buffer type"""
+    # PDFium loads bytes in place and BytesIO shares them until written
+    return file_content if isinstance(file_content, bytes) else bytes(file_content)
 
 
 class AIService:
     """AI service for content processing and generation"""
     
-    def __init__(self):
-        if settings.OPENAI_API_KEY:
-            openai.api_key = settings.OPENAI_API_KEY
-    
-    def extract_pdf_text(self, file_content: bytes) -> str:
-        """Extract text from PDF"""
+    def extract_pdf(self, file_content: FileContent) -> Tuple[str, int]:
+        """Extract text and count pages from a single parse of the PDF"""
+        file_content = _as_bytes(file_content)
         try:
+            pdfium = _pdfium()
+            if pdfium is not None:
+                with _PDFIUM_LOCK:
+                    pdf = pdfium.PdfDocument(file_content)
+                    try:
+                        pages = len(pdf)
+                        if pages < _PDF_PARALLEL_MIN_PAGES or settings.PDF_EXTRACT_WORKERS < 2:
+                            text = "\n".join(page.get_textpage().get_text_range() for page in pdf)
+                            return text.strip(), pages
+                    finally:
+                        pdf.close()
+                # Long documents fan out to processes, which need no lock
+                return _pdf_text_parallel(file_content, pages).strip(), pages
+            
+            import PyPDF2
+            
             pdf_file = io.BytesIO(file_content)
             pdf_reader = PyPDF2.PdfReader(pdf_file)
             
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
+            text = "\n".join((page.extract_text() or "") for page in pdf_reader.pages)
+            return text.strip(), len(pdf_reader.pages)
         except Exception as e:
             raise AIProcessingError(f"Failed to extract PDF text: {str(e)}")
     
-    def count_pdf_pages(self, file_content: bytes) -> int:
+    def extract_pdf_text(self, file_content: FileContent) -> str:
+        """Extract text from PDF"""
+        return self.extract_pdf(file_content)[0]
+    
+    def count_pdf_pages(self, file_content: FileContent) -> int:
         """Count pages in PDF"""
+        file_content = _as_bytes(file_content)
         try:
+            pdfium = _pdfium()
+            if pdfium is not None:
+                with _PDFIUM_LOCK:
+                    pdf = pdfium.PdfDocument(file_content)
+                    try:
+                        return len(pdf)
+                    finally:
+                        pdf.close()
+            
+            import PyPDF2
+            
             pdf_file = io.BytesIO(file_content)
             pdf_reader = PyPDF2.PdfReader(pdf_file)
             return len(pdf_reader.pages)
         except Exception as e:
             raise AIProcessingError(f"Failed to count PDF pages: {str(e)}")
     
-    def extract_image_text(self, file_content: bytes) -> str:
+    def extract_image_text(self, file_content: FileContent) -> str:
         """Extract text from image using OCR"""
         try:
-            image = Image.open(io.BytesIO(file_content))
-            text = pytesseract.image_to_string(image, lang='ita+eng')
+            import pytesseract
+            from PIL import Image
+            
+            with Image.open(io.BytesIO(_as_bytes(file_content))) as image:
+                text = pytesseract.image_to_string(image, lang='ita+eng')
             return text.strip()
         except Exception as e:
             raise AIProcessingError(f"Failed to extract image text: {str(e)}")
     
-    def get_image_dimensions(self, file_content: bytes) -> Dict[str, int]:
+    def get_image_dimensions(self, file_content: FileContent) -> Dict[str, int]:
         """Get image dimensions"""
         try:
-            image = Image.open(io.BytesIO(file_content))
-            return {"width": image.width, "height": image.height}
+            from PIL import Image
+            
+            # Only the header is parsed; pixel data is never decoded
+            with Image.open(io.BytesIO(_as_bytes(file_content))) as image:
+                return {"width": image.width, "height": image.height}
         except Exception as e:
             raise AIProcessingError(f"Failed to get image dimensions: {str(e)}")
     
@@ -78,7 +217,7 @@ class AIService:
             return self._generate_simple_summary(text)
         
         try:
-            response = openai.ChatCompletion.create(
+            response_text = self._cached_chat(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that creates concise summaries of educational content in Italian."},
@@ -88,7 +227,7 @@ class AIService:
                 temperature=0.7
             )
             
-            return response.choices[0].message.content.strip()
+            return response_text
         except Exception as e:
             # Fallback to simple summary
             return self._generate_simple_summary(text)
@@ -99,7 +238,7 @@ class AIService:
             return self._extract_simple_keywords(text)
         
         try:
-            response = openai.ChatCompletion.create(
+            response_text = self._cached_chat(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that extracts key terms and concepts from educational content. Return only the keywords separated by commas."},
@@ -109,7 +248,7 @@ class AIService:
                 temperature=0.3
             )
             
-            keywords_text = response.choices[0].message.content.strip()
+            keywords_text = response_text
             return [kw.strip() for kw in keywords_text.split(",") if kw.strip()]
         except Exception as e:
             # Fallback to simple keyword extraction
@@ -118,16 +257,70 @@ class AIService:
     def detect_language(self, text: str) -> str:
         """Detect language of text"""
         # Simple language detection based on common words
-        italian_words = ['il', 'la', 'di', 'che', 'e', 'un', 'una', 'per', 'con', 'del', 'della']
-        english_words = ['the', 'and', 'of', 'to', 'a', 'in', 'is', 'it', 'you', 'that', 'he']
+        if not text:
+            return "it"
         
-        text_lower = text.lower()
-        italian_count = sum(1 for word in italian_words if word in text_lower)
-        english_count = sum(1 for word in english_words if word in text_lower)
+        words = set(_TOKEN_RE.findall(text[:_LANGUAGE_SAMPLE_CHARS].lower()))
+        italian_count = len(words & _ITALIAN_WORDS)
+        english_count = len(words & _ENGLISH_WORDS)
         
         return "it" if italian_count > english_count else "en"
     
-    def generate_quiz_questions(self, content: str, difficulty: str = "medium", num_questions: int = 5) -> List[Dict[str, Any]]:
+    def extract_metadata(self, file_content: FileContent, file_type: str) -> Dict[str, Any]:
+        """Extract text and file details, then summary, keywords and language"""
+        metadata = {
+            "keywords": [],
+            "language": "it"
+        }
+        
+        try:
+            extractor = _METADATA_EXTRACTORS.get(file_type)
+            if extractor:
+                metadata.update(extractor(self, file_content))
+            
+            # Generate summary and keywords
+            if metadata.get("extracted_text"):
+                analysis = self.analyze_content(metadata["extracted_text"])
+                
+                metadata["summary"] = analysis.summary
+                metadata["keywords"] = analysis.keywords
+                metadata["language"] = analysis.language
+        
+        except Exception as e:
+            # If metadata extraction fails, still mark as completed
+            pass
+        
+        return metadata
+    
+    def analyze_content(self, text: str) -> ContentAnalysis:
+        """Summarize and extract keywords in one AI call; language is detected locally"""
+        if not settings.OPENAI_API_KEY:
+            return self._analyze_simple(text)
+        
+        try:
+            response_text = self._cached_chat(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": (
+                        "You are a helpful assistant that analyzes educational content. "
+                        "Return only JSON with this structure: "
+                        '{"summary": "concise summary in Italian", "keywords": ["keyword"]}'
+                    )},
+                    {"role": "user", "content": f"Analyze the following text:\n\n{text[:4000]}"}
+                ],
+                max_tokens=700,
+                temperature=0.3
+            )
+            
+            analysis_text = response_text
+            analysis = ContentAnalysis.model_validate_json(_strip_json_fences(analysis_text))
+            # The word-set detector needs no network round trip and only answers it|en
+            return analysis.model_copy(update={"language": self.detect_language(text)})
+        except Exception as e:
+            # Fallback to simple analysis
+            return self._analyze_simple(text)
+    
+    def generate_quiz_questions(self, content: str, difficulty: str = "medium", num_questions: int = 5) -> List[QuizQuestionBase]:
         """Generate quiz questions from content"""
         if not settings.OPENAI_API_KEY:
             return self._generate_simple_quiz(content, num_questions)
@@ -139,6 +332,7 @@ class AIService:
             Return the questions in JSON format with this structure:
             [
                 {{
+                    "type": "single",
                     "question": "Question text",
                     "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
                     "correct_answer": 0,
@@ -151,7 +345,7 @@ class AIService:
             {content[:3000]}
             """
             
-            response = openai.ChatCompletion.create(
+            response_text = self._cached_chat(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are an expert educator creating quiz questions. Always return valid JSON format."},
@@ -161,14 +355,13 @@ class AIService:
                 temperature=0.7
             )
             
-            import json
-            questions_text = response.choices[0].message.content.strip()
-            return json.loads(questions_text)
+            questions_text = response_text
+            return QUIZ_QUESTIONS_PAYLOAD.validate_json(_strip_json_fences(questions_text))
         except Exception as e:
             # Fallback to simple quiz generation
             return self._generate_simple_quiz(content, num_questions)
     
-    def generate_concept_map(self, content: str) -> Dict[str, Any]:
+    def generate_concept_map(self, content: str) -> GeneratedConceptMap:
         """Generate concept map from content"""
         if not settings.OPENAI_API_KEY:
             return self._generate_simple_concept_map(content)
@@ -191,7 +384,7 @@ class AIService:
             {content[:3000]}
             """
             
-            response = openai.ChatCompletion.create(
+            response_text = self._cached_chat(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are an expert educator creating concept maps. Always return valid JSON format."},
@@ -201,13 +394,46 @@ class AIService:
                 temperature=0.7
             )
             
-            import json
-            concept_map_text = response.choices[0].message.content.strip()
-            return json.loads(concept_map_text)
+            concept_map_text = response_text
+            return GeneratedConceptMap.model_validate_json(_strip_json_fences(concept_map_text))
         except Exception as e:
             # Fallback to simple concept map
             return self._generate_simple_concept_map(content)
     
+    def _cached_chat(self, **request: Any) -> str:
+        """Run a chat completion, reusing the Redis-cached reply for identical requests"""
+        key = "ai:chat:" + hashlib.blake2b(
+            orjson.dumps(request, option=orjson.OPT_SORT_KEYS), digest_size=20
+        ).hexdigest()
+        redis_client = get_redis()
+        
+        if redis_client is not None:
+            try:
+                cached = redis_client.get(key)
+                if cached is not None:
+                    return cached
+            except Exception:
+                redis_client = None
+        
+        response = _openai().ChatCompletion.create(**request)
+        content = response.choices[0].message.content.strip()
+        
+        if redis_client is not None:
+            try:
+                redis_client.setex(key, settings.AI_CACHE_TTL, content)
+            except Exception:
+                pass
+        
+        return content
+    
+    def _analyze_simple(self, text: str) -> ContentAnalysis:
+        """Analyze content without AI"""
+        return ContentAnalysis(
+            summary=self._generate_simple_summary(text),
+            keywords=self._extract_simple_keywords(text),
+            language=self.detect_language(text)
+        )
+    
     def _generate_simple_summary(self, text: str) -> str:
         """Generate simple summary without AI"""
         sentences = text.split('.')
@@ -215,18 +441,10 @@ class AIService:
     
     def _extract_simple_keywords(self, text: str) -> List[str]:
         """Extract simple keywords without AI"""
-        # Simple keyword extraction based on word frequency
-        words = re.findall(r'\b\w+\b', text.lower())
-        word_freq = {}
-        for word in words:
-            if len(word) > 3:  # Only words longer than 3 characters
-                word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Return top 10 most frequent words
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        return [word for word, freq in sorted_words[:10]]
+        # Top 10 most frequent words longer than 3 characters
+        return [word for word, _ in Counter(_KEYWORD_RE.findall(text.lower())).most_common(10)]
     
-    def _generate_simple_quiz(self, content: str, num_questions: int) -> List[Dict[str, Any]]:
+    def _generate_simple_quiz(self, content: str, num_questions: int) -> List[QuizQuestionBase]:
         """Generate simple quiz without AI"""
         questions = []
         sentences = [s.strip() for s in content.split('.') if s.strip()]
@@ -234,25 +452,31 @@ class AIService:
         for i in range(min(num_questions, len(sentences))):
             sentence = sentences[i]
             if len(sentence) > 20:  # Only use substantial sentences
-                questions.append({
-                    "question": f"What is mentioned in: '{sentence[:50]}...'?",
-                    "options": [
+                questions.append(QuizQuestionBase(
+                    type="single",
+                    question=f"What is mentioned in: '{sentence[:50]}...'?",
+                    options=[
                         "Option A",
                         "Option B", 
                         "Option C",
                         "Option D"
                     ],
-                    "correct_answer": 0,
-                    "explanation": "This is a placeholder explanation.",
-                    "difficulty": "medium"
-                })
+                    correct_answer=0,
+                    explanation="This is a placeholder explanation.",
+                    difficulty="medium"
+                ))
         
         return questions
     
-    def _generate_simple_concept_map(self, content: str) -> Dict[str, Any]:
+    def _generate_simple_concept_map(self, content: str) -> GeneratedConceptMap:
         """Generate simple concept map without AI"""
-        words = re.findall(r'\b\w+\b', content.lower())
-        unique_words = list(set([w for w in words if len(w) > 4]))[:10]
+        # Stop scanning as soon as 10 distinct words are found
+        seen = {}
+        for match in _CONCEPT_RE.finditer(content):
+            seen[match.group().lower()] = None
+            if len(seen) == 10:
+                break
+        unique_words = list(seen)
         
         nodes = []
         for i, word in enumerate(unique_words):
@@ -274,7 +498,49 @@ class AIService:
                 "type": "direct"
             })
         
-        return {
+        return GeneratedConceptMap.model_validate({
             "nodes": nodes,
             "connections": connections
-        }
+        })
+
+
+def _pdf_metadata(ai_service: AIService, file_content: FileContent) -> Dict[str, Any]:
+    """Text and page count from one parse of the PDF"""
+    text, pages = ai_service.extract_pdf(file_content)
+    return {"extracted_text": text, "pages": pages}
+
+
+def _image_metadata(ai_service: AIService, file_content: FileContent) -> Dict[str, Any]:
+    """OCR text and pixel dimensions"""
+    return {
+        "extracted_text": ai_service.extract_image_text(file_content),
+        "dimensions": ai_service.get_image_dimensions(file_content)
+    }
+
+
+def _video_metadata(ai_service: AIService, file_content: FileContent) -> Dict[str, Any]:
+    """Transcript and duration"""
+    return {
+        "extracted_text": ai_service.extract_video_text(file_content),
+        "duration": ai_service.get_video_duration(file_content)
+    }
+
+
+def _text_metadata(ai_service: AIService, file_content: FileContent) -> Dict[str, Any]:
+    """Plain text is its own extracted text"""
+    return {"extracted_text": _as_bytes(file_content).decode("utf-8")}
+
+
+# Upload type to extractor, shared by the upload service and the Celery tasks
+_METADATA_EXTRACTORS = {
+    "pdf": _pdf_metadata,
+    "image": _image_metadata,
+    "video": _video_metadata,
+    "text": _text_metadata,
+}
+
+
+@lru_cache(maxsize=1)
+def get_ai_service() -> AIService:
+    """Shared AIService for requests and Celery tasks"""
+    return AIService()
@@ -2,14 +2,23 @@
 Authentication service
 """
 
+import asyncio
+import hashlib
+import threading
+import time
 from datetime import datetime
 from typing import Optional, Dict, Any
+from cachetools import TTLCache
+from sqlalchemy import func, literal
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from app.models.user import User
 from app.core.security import (
-    verify_password, 
+    pwd_context,
+    verify_and_update_password,
     get_password_hash, 
     create_token_pair,
     verify_token
@@ -17,48 +26,78 @@ from app.core.security import (
 from app.core.exceptions import AuthenticationError, ValidationError
 from app.schemas.auth import UserCreate, UserLogin, TokenResponse, UserResponse
 
+# Verified refresh-token payloads, keyed by a digest so raw tokens are not kept in memory
+_REFRESH_PAYLOADS: TTLCache = TTLCache(maxsize=4096, ttl=60)
+_REFRESH_PAYLOADS_LOCK = threading.Lock()
+
+
+def _verify_refresh_token(refresh_token: str) -> Dict[str, Any]:
+    """Verify a refresh token, reusing the decoded payload for repeat calls"""
+    key = hashlib.blake2b(refresh_token.encode(), digest_size=16).digest()
+    with _REFRESH_PAYLOADS_LOCK:
+        payload = _REFRESH_PAYLOADS.get(key)
+    
+    if payload is None or payload["exp"] <= time.time():
+        payload = verify_token(refresh_token, "refresh")
+        with _REFRESH_PAYLOADS_LOCK:
+            _REFRESH_PAYLOADS[key] = payload
+    
+    return payload
+
 
 class AuthService:
     """Authentication service"""
     
     def __init__(self, db: Session):
         self.db = db
+        # Users already loaded during this request, keyed by id and ("email", email).
+        # Strong references, so the session's weak identity map keeps them too.
+        self._user_cache: Dict[Any, User] = {}
     
-    def register_user(self, user_data: UserCreate) -> UserResponse:
+    async def register_user(self, user_data: UserCreate) -> UserResponse:
         """Register a new user"""
-        # Check if user already exists
-        existing_user = self.db.query(User).filter(User.email == user_data.email).first()
-        if existing_user:
+        hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
+        
+        # Insert and rely on the unique lower(email) index instead of checking first,
+        # so concurrent registrations can't both pass; RETURNING yields the new user
+        insert = pg_insert if self.db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        stmt = insert(User).on_conflict_do_nothing().returning(User)
+        user = self.db.scalars(stmt, [{
+            "email": user_data.email,
+            "name": user_data.name,
+            "hashed_password": hashed_password
+        }]).first()
+        if user is None:
+            self.db.rollback()
             raise ValidationError("User with this email already exists")
         
-        # Create new user
-        user = User(
-            email=user_data.email,
-            name=user_data.name,
-            hashed_password=get_password_hash(user_data.password)
-        )
-        
-        self.db.add(user)
         self.db.commit()
-        self.db.refresh(user)
         
-        return UserResponse.model_validate(user)
+        return UserResponse.from_orm_fast(user)
     
-    def authenticate_user(self, email: str, password: str) -> Optional[User]:
+    async def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Authenticate user with email and password"""
-        user = self.db.query(User).filter(User.email == email).first()
+        user = self.db.query(User).filter(func.lower(User.email) == email.lower()).first()
         
         if not user or not user.hashed_password:
+            # Spend a full hash verification anyway so unknown emails can't be told apart by timing
+            await asyncio.to_thread(pwd_context.dummy_verify)
             return None
         
-        if not verify_password(password, user.hashed_password):
+        # The hashers release the GIL, so verifying in a worker thread keeps the event loop free
+        verified, new_hash = await asyncio.to_thread(verify_and_update_password, password, user.hashed_password)
+        if not verified:
             return None
         
+        # Upgrade legacy bcrypt hashes; committed together with last_login_at
+        if new_hash:
+            user.hashed_password = new_hash
+        
         return user
     
-    def login_user(self, login_data: UserLogin) -> TokenResponse:
+    async def login_user(self, login_data: UserLogin) -> TokenResponse:
         """Login user and return tokens"""
-        user = self.authenticate_user(login_data.email, login_data.password)
+        user = await self.authenticate_user(login_data.email, login_data.password)
         
         if not user:
             raise AuthenticationError("Invalid email or password")
@@ -66,24 +105,19 @@ class AuthService:
         if not user.is_active:
             raise AuthenticationError("Account is deactivated")
         
-        # Update last login
-        user.last_login_at = datetime.utcnow()
+        # Update last login with one atomic UPDATE; "evaluate" mirrors it onto the loaded user
+        self.db.query(User).filter(User.id == user.id).update(
+            {User.last_login_at: datetime.utcnow()},
+            synchronize_session="evaluate"
+        )
         self.db.commit()
         
-        # Create tokens
-        tokens = create_token_pair(str(user.id), user.email)
-        
-        return TokenResponse(
-            access_token=tokens["access_token"],
-            refresh_token=tokens["refresh_token"],
-            token_type=tokens["token_type"],
-            user=UserResponse.model_validate(user)
-        )
+        return self._token_response(user)
     
     def refresh_token(self, refresh_token: str) -> TokenResponse:
         """Refresh access token using refresh token"""
         try:
-            payload = verify_token(refresh_token, "refresh")
+            payload = _verify_refresh_token(refresh_token)
             user_id = payload.get("sub")
             email = payload.get("email")
             
@@ -91,30 +125,48 @@ class AuthService:
                 raise AuthenticationError("Invalid refresh token")
             
             # Verify user exists and is active
-            user = self.db.query(User).filter(User.id == user_id).first()
+            user = self.get_user_by_id(user_id)
             if not user or not user.is_active:
                 raise AuthenticationError("User not found or inactive")
             
-            # Create new tokens
-            tokens = create_token_pair(str(user.id), user.email)
-            
-            return TokenResponse(
-                access_token=tokens["access_token"],
-                refresh_token=tokens["refresh_token"],
-                token_type=tokens["token_type"],
-                user=UserResponse.model_validate(user)
-            )
+            return self._token_response(user)
         
         except Exception as e:
             raise AuthenticationError("Invalid refresh token")
     
+    def _token_response(self, user: User) -> TokenResponse:
+        """Issue a token pair; all fields are built here, so skip re-validation"""
+        return TokenResponse.model_construct(
+            user=UserResponse.from_orm_fast(user),
+            **create_token_pair(str(user.id), user.email)
+        )
+    
     def get_user_by_id(self, user_id: str) -> Optional[User]:
         """Get user by ID"""
-        return self.db.query(User).filter(User.id == user_id).first()
+        user = self._user_cache.get(str(user_id))
+        if user is None:
+            user = self.db.query(User).filter(User.id == user_id).first()
+            self._remember_user(user)
+        return user
     
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
-        return self.db.query(User).filter(User.email == email).first()
+        user = self._user_cache.get(("email", email.lower()))
+        if user is None:
+            user = self.db.query(User).filter(func.lower(User.email) == email.lower()).first()
+            self._remember_user(user)
+        return user
+    
+    def _remember_user(self, user: Optional[User]) -> None:
+        """Cache a loaded user under both lookup keys"""
+        if user is not None:
+            self._user_cache[str(user.id)] = user
+            self._user_cache[("email", user.email.lower())] = user
+    
+    def _forget_user(self, user: User) -> None:
+        """Drop a changed user from the request cache"""
+        self._user_cache.pop(str(user.id), None)
+        self._user_cache.pop(("email", user.email.lower()), None)
     
     def update_user_preferences(self, user_id: str, preferences: Dict[str, Any]) -> User:
         """Update user preferences"""
@@ -122,9 +174,18 @@ class AuthService:
         if not user:
             raise AuthenticationError("User not found")
         
-        user.preferences.update(preferences)
-        self.db.commit()
-        self.db.refresh(user)
+        if self.db.get_bind().dialect.name == "postgresql":
+            # Merge server-side (jsonb ||) instead of shipping the whole blob back
+            self.db.query(User).filter(User.id == user_id).update(
+                {User.preferences: User.preferences.op("||")(literal(preferences, JSONB))},
+                synchronize_session=False
+            )
+            self.db.commit()
+            self.db.refresh(user, ["preferences"])
+        else:
+            user.preferences.update(preferences)
+            self.db.commit()
+        self._forget_user(user)
         
         return user
     
@@ -136,5 +197,6 @@ class AuthService:
         
         user.is_active = False
         self.db.commit()
+        self._forget_user(user)
         
         return True
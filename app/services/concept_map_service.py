@@ -2,11 +2,14 @@
 Concept map service
 """
 
+import asyncio
+import uuid
 from typing import List, Optional, Dict, Any
+from sqlalchemy import case, func, insert
 from sqlalchemy.orm import Session
 
 from app.models.concept_map import ConceptMap, ConceptNode, ConceptConnection
-from app.models.upload import Upload
+from app.models.upload import Upload, UploadMetadata
 from app.schemas.concept_map import (
     ConceptMapCreate, 
     ConceptMapUpdate,
@@ -15,7 +18,7 @@ from app.schemas.concept_map import (
     ConceptMapGenerationRequest
 )
 from app.core.exceptions import NotFoundError, ValidationError
-from app.services.ai_service import AIService
+from app.services.ai_service import get_ai_service
 
 
 class ConceptMapService:
@@ -23,7 +26,7 @@ class ConceptMapService:
     
     def __init__(self, db: Session):
         self.db = db
-        self.ai_service = AIService()
+        self.ai_service = get_ai_service()
     
     def create_concept_map(self, user_id: str, concept_map_data: ConceptMapCreate) -> ConceptMap:
         """Create a new concept map"""
@@ -37,18 +40,22 @@ class ConceptMapService:
         )
         
         self.db.add(concept_map)
-        self.db.commit()
-        self.db.refresh(concept_map)
+        self.db.flush()
         
-        # Add nodes if provided
+        # Add nodes and connections if provided, all committed in one transaction
         if concept_map_data.nodes:
-            for node_data in concept_map_data.nodes:
-                self._create_concept_node(concept_map.id, node_data)
+            self.db.add_all([
+                self._build_concept_node(concept_map.id, node_data)
+                for node_data in concept_map_data.nodes
+            ])
         
-        # Add connections if provided
         if concept_map_data.connections:
-            for connection_data in concept_map_data.connections:
-                self._create_concept_connection(concept_map.id, connection_data)
+            self.db.add_all([
+                self._build_concept_connection(concept_map.id, connection_data)
+                for connection_data in concept_map_data.connections
+            ])
+        
+        self.db.commit()
         
         return concept_map
     
@@ -75,11 +82,10 @@ class ConceptMapService:
             raise NotFoundError("Concept map", concept_map_id)
         
         # Update fields
-        for field, value in concept_map_data.dict(exclude_unset=True).items():
+        for field, value in concept_map_data.model_dump(exclude_unset=True).items():
             setattr(concept_map, field, value)
         
         self.db.commit()
-        self.db.refresh(concept_map)
         
         return concept_map
     
@@ -101,21 +107,10 @@ class ConceptMapService:
         if not concept_map:
             raise NotFoundError("Concept map", concept_map_id)
         
-        node = ConceptNode(
-            concept_map_id=concept_map_id,
-            label=node_data.label,
-            x=node_data.x,
-            y=node_data.y,
-            type=node_data.type,
-            color=node_data.color,
-            description=node_data.description,
-            examples=node_data.examples,
-            source_upload_id=node_data.source_upload_id
-        )
+        node = self._build_concept_node(concept_map_id, node_data)
         
         self.db.add(node)
         self.db.commit()
-        self.db.refresh(node)
         
         return node
     
@@ -140,7 +135,6 @@ class ConceptMapService:
                 setattr(node, field, value)
         
         self.db.commit()
-        self.db.refresh(node)
         
         return node
     
@@ -171,18 +165,10 @@ class ConceptMapService:
         if not concept_map:
             raise NotFoundError("Concept map", concept_map_id)
         
-        connection = ConceptConnection(
-            concept_map_id=concept_map_id,
-            from_node_id=connection_data.from_node_id,
-            to_node_id=connection_data.to_node_id,
-            label=connection_data.label,
-            type=connection_data.type,
-            strength=connection_data.strength
-        )
+        connection = self._build_concept_connection(concept_map_id, connection_data)
         
         self.db.add(connection)
         self.db.commit()
-        self.db.refresh(connection)
         
         return connection
     
@@ -207,7 +193,6 @@ class ConceptMapService:
                 setattr(connection, field, value)
         
         self.db.commit()
-        self.db.refresh(connection)
         
         return connection
     
@@ -231,25 +216,23 @@ class ConceptMapService:
         
         return True
     
-    def generate_concept_map(self, user_id: str, generation_data: ConceptMapGenerationRequest) -> ConceptMap:
+    async def generate_concept_map(self, user_id: str, generation_data: ConceptMapGenerationRequest) -> ConceptMap:
         """Generate concept map using AI"""
         # Get content from source uploads
         content = ""
         if generation_data.source_upload_ids:
-            uploads = self.db.query(Upload).filter(
+            # Select only the extracted text instead of whole Upload rows
+            texts = self.db.query(UploadMetadata.extracted_text).join(Upload).filter(
                 Upload.id.in_(generation_data.source_upload_ids),
                 Upload.user_id == user_id
             ).all()
-            
-            for upload in uploads:
-                if upload.file_metadata and upload.file_metadata.get("extracted_text"):
-                    content += upload.file_metadata["extracted_text"] + "\n"
+            content = "\n".join(text for (text,) in texts if text)
         
         if not content:
             raise ValidationError("No content available for concept map generation")
         
-        # Generate concept map using AI
-        ai_concept_map = self.ai_service.generate_concept_map(content)
+        # Generate concept map using AI (blocking HTTP call, kept off the event loop)
+        ai_concept_map = await asyncio.to_thread(self.ai_service.generate_concept_map, content)
         
         # Create concept map
         concept_map = ConceptMap(
@@ -260,52 +243,57 @@ class ConceptMapService:
             tags=generation_data.tags
         )
         
+        # Flush for the id; eager_defaults returns the server timestamps with the INSERT
         self.db.add(concept_map)
-        self.db.commit()
-        self.db.refresh(concept_map)
+        self.db.flush()
         
-        # Create nodes
+        # Create nodes (IDs assigned up front so connections need no flush)
         node_id_mapping = {}
-        for i, ai_node in enumerate(ai_concept_map.get("nodes", [])):
-            node = ConceptNode(
-                concept_map_id=concept_map.id,
-                label=ai_node["label"],
-                x=ai_node.get("x", i * 100),
-                y=ai_node.get("y", i * 100),
-                type=ai_node.get("type", "main"),
-                color=ai_node.get("color", "#3B82F6"),
-                description=ai_node.get("description", ""),
-                examples=ai_node.get("examples", []),
-                ai_generated=True
-            )
-            self.db.add(node)
-            self.db.flush()  # Get the ID
-            node_id_mapping[ai_node["id"]] = str(node.id)
+        node_rows = []
+        for i, ai_node in enumerate(ai_concept_map.nodes):
+            node_id = str(uuid.uuid4())
+            node_id_mapping[ai_node.id] = node_id
+            node_rows.append({
+                "id": node_id,
+                "concept_map_id": concept_map.id,
+                "label": ai_node.label,
+                "x": ai_node.x if ai_node.x is not None else i * 100,
+                "y": ai_node.y if ai_node.y is not None else i * 100,
+                "type": ai_node.type,
+                "color": ai_node.color,
+                "description": ai_node.description,
+                "examples": ai_node.examples,
+                "ai_generated": True
+            })
         
         # Create connections
-        for ai_connection in ai_concept_map.get("connections", []):
-            from_node_id = node_id_mapping.get(ai_connection["from"])
-            to_node_id = node_id_mapping.get(ai_connection["to"])
+        connection_rows = []
+        for ai_connection in ai_concept_map.connections:
+            from_node_id = node_id_mapping.get(ai_connection.from_node)
+            to_node_id = node_id_mapping.get(ai_connection.to_node)
             
             if from_node_id and to_node_id:
-                connection = ConceptConnection(
-                    concept_map_id=concept_map.id,
-                    from_node_id=from_node_id,
-                    to_node_id=to_node_id,
-                    label=ai_connection.get("label", ""),
-                    type=ai_connection.get("type", "direct"),
-                    strength=ai_connection.get("strength", 1.0)
-                )
-                self.db.add(connection)
+                connection_rows.append({
+                    "concept_map_id": concept_map.id,
+                    "from_node_id": from_node_id,
+                    "to_node_id": to_node_id,
+                    "label": ai_connection.label,
+                    "type": ai_connection.type,
+                    "strength": ai_connection.strength
+                })
+        
+        if node_rows:
+            self.db.execute(insert(ConceptNode), node_rows)
+        if connection_rows:
+            self.db.execute(insert(ConceptConnection), connection_rows)
         
         self.db.commit()
-        self.db.refresh(concept_map)
         
         return concept_map
     
-    def _create_concept_node(self, concept_map_id: str, node_data: ConceptNodeCreate) -> ConceptNode:
-        """Create a concept node"""
-        node = ConceptNode(
+    def _build_concept_node(self, concept_map_id: str, node_data: ConceptNodeCreate) -> ConceptNode:
+        """Build an unsaved concept node"""
+        return ConceptNode(
             concept_map_id=concept_map_id,
             label=node_data.label,
             x=node_data.x,
@@ -316,16 +304,10 @@ class ConceptMapService:
             examples=node_data.examples,
             source_upload_id=node_data.source_upload_id
         )
-        
-        self.db.add(node)
-        self.db.commit()
-        self.db.refresh(node)
-        
-        return node
     
-    def _create_concept_connection(self, concept_map_id: str, connection_data: ConceptConnectionCreate) -> ConceptConnection:
-        """Create a concept connection"""
-        connection = ConceptConnection(
+    def _build_concept_connection(self, concept_map_id: str, connection_data: ConceptConnectionCreate) -> ConceptConnection:
+        """Build an unsaved concept connection"""
+        return ConceptConnection(
             concept_map_id=concept_map_id,
             from_node_id=connection_data.from_node_id,
             to_node_id=connection_data.to_node_id,
@@ -333,12 +315,6 @@ class ConceptMapService:
             type=connection_data.type,
             strength=connection_data.strength
         )
-        
-        self.db.add(connection)
-        self.db.commit()
-        self.db.refresh(connection)
-        
-        return connection
     
     def get_concept_map_stats(self, user_id: str, subject_id: Optional[str] = None) -> Dict[str, Any]:
         """Get concept map statistics"""
@@ -347,14 +323,21 @@ class ConceptMapService:
         if subject_id:
             query = query.filter(ConceptMap.subject_id == subject_id)
         
-        concept_maps = query.all()
-        
-        total_maps = len(concept_maps)
-        total_nodes = sum(len(cm.nodes) for cm in concept_maps)
-        total_connections = sum(len(cm.connections) for cm in concept_maps)
+        total_maps, public_maps = query.with_entities(
+            func.count(ConceptMap.id),
+            func.coalesce(func.sum(case((ConceptMap.is_public, 1), else_=0)), 0)
+        ).one()
+        
+        # Count children in SQL instead of lazy-loading every map's collections
+        map_ids = query.with_entities(ConceptMap.id)
+        total_nodes = self.db.query(func.count(ConceptNode.id)).filter(
+            ConceptNode.concept_map_id.in_(map_ids)
+        ).scalar()
+        total_connections = self.db.query(func.count(ConceptConnection.id)).filter(
+            ConceptConnection.concept_map_id.in_(map_ids)
+        ).scalar()
         average_nodes = total_nodes / total_maps if total_maps > 0 else 0
         
-        public_maps = sum(1 for cm in concept_maps if cm.is_public)
         private_maps = total_maps - public_maps
         
         return {
@@ -2,13 +2,16 @@
 Exam service
 """
 
+import asyncio
+import uuid
 from datetime import datetime
 from typing import List, Optional, Dict, Any, Union
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func, insert
 
 from app.models.exam import Exam, ExamQuestion, ExamUserAnswer
-from app.models.upload import Upload
+from app.models.upload import Upload, UploadMetadata
+from app.schemas.base import ANSWER_CHECKS
 from app.schemas.exam import (
     ExamCreate, 
     ExamUpdate, 
@@ -17,7 +20,16 @@ from app.schemas.exam import (
     ExamGenerationRequest
 )
 from app.core.exceptions import NotFoundError, ValidationError
-from app.services.ai_service import AIService
+from app.services.ai_service import get_ai_service
+
+
+# Exams also take open questions on top of the choice checks
+_ANSWER_CHECKS = {
+    **ANSWER_CHECKS,
+    # For open questions, we might need more sophisticated checking
+    # For now, just check if answer is not empty
+    "open": lambda correct, answer: bool(answer and str(answer).strip()),
+}
 
 
 class ExamService:
@@ -25,7 +37,7 @@ class ExamService:
     
     def __init__(self, db: Session):
         self.db = db
-        self.ai_service = AIService()
+        self.ai_service = get_ai_service()
     
     def create_exam(self, user_id: str, exam_data: ExamCreate) -> Exam:
         """Create a new exam"""
@@ -44,7 +56,6 @@ class ExamService:
         
         self.db.add(exam)
         self.db.commit()
-        self.db.refresh(exam)
         
         # Add questions if provided
         if exam_data.questions:
@@ -76,11 +87,10 @@ class ExamService:
             raise NotFoundError("Exam", exam_id)
         
         # Update fields
-        for field, value in exam_data.dict(exclude_unset=True).items():
+        for field, value in exam_data.model_dump(exclude_unset=True).items():
             setattr(exam, field, value)
         
         self.db.commit()
-        self.db.refresh(exam)
         
         return exam
     
@@ -116,12 +126,25 @@ class ExamService:
         total_score = 0
         max_score = 0
         correct_answers = 0
+        answer_rows = []
+        
+        # One IN query for every answered question, selecting only the grading columns
+        question_ids = {answer.question_id for answer in answers}
+        questions_by_id = {
+            question.id: question
+            for question in self.db.query(
+                ExamQuestion.id,
+                ExamQuestion.type,
+                ExamQuestion.correct_answer,
+                ExamQuestion.points
+            ).filter(
+                ExamQuestion.id.in_(question_ids),
+                ExamQuestion.exam_id == exam_id
+            )
+        }
         
         for answer in answers:
-            question = self.db.query(ExamQuestion).filter(
-                ExamQuestion.id == answer.question_id,
-                ExamQuestion.exam_id == exam_id
-            ).first()
+            question = questions_by_id.get(answer.question_id)
             
             if not question:
                 continue
@@ -135,15 +158,16 @@ class ExamService:
                 correct_answers += 1
             
             # Save user answer
-            user_answer = ExamUserAnswer(
-                user_id=user_id,
-                exam_question_id=question.id,
-                answer=answer.answer,
-                is_correct=is_correct,
-                time_spent=answer.time_spent
-            )
-            self.db.add(user_answer)
-        
+            answer_rows.append({
+                "user_id": user_id,
+                "exam_question_id": question.id,
+                "answer": answer.answer,
+                "is_correct": is_correct,
+                "time_spent": answer.time_spent
+            })
+        
+        if answer_rows:
+            self.db.execute(insert(ExamUserAnswer), answer_rows)
         self.db.commit()
         
         # Calculate percentage and pass status
@@ -161,35 +185,51 @@ class ExamService:
             "completed_at": datetime.utcnow()
         }
     
-    def generate_exam(self, user_id: str, generation_data: ExamGenerationRequest) -> Exam:
+    async def generate_exam(self, user_id: str, generation_data: ExamGenerationRequest) -> Exam:
         """Generate exam using AI"""
         # Get content from source uploads
         content = ""
         if generation_data.source_upload_ids:
-            uploads = self.db.query(Upload).filter(
+            # Select only the extracted text instead of whole Upload rows
+            texts = self.db.query(UploadMetadata.extracted_text).join(Upload).filter(
                 Upload.id.in_(generation_data.source_upload_ids),
                 Upload.user_id == user_id
             ).all()
-            
-            for upload in uploads:
-                if upload.file_metadata and upload.file_metadata.get("extracted_text"):
-                    content += upload.file_metadata["extracted_text"] + "\n"
+            content = "\n".join(text for (text,) in texts if text)
         
         if not content:
             raise ValidationError("No content available for exam generation")
         
-        # Generate questions using AI
-        ai_questions = self.ai_service.generate_quiz_questions(
+        # Generate questions using AI (blocking HTTP call, kept off the event loop)
+        ai_questions = await asyncio.to_thread(
+            self.ai_service.generate_quiz_questions,
             content, 
             generation_data.difficulty, 
             generation_data.num_questions
         )
         
-        # Calculate total points
-        total_points = sum(q.get("points", 1) for q in ai_questions)
-        
-        # Create exam
+        # Build question rows and total points in one pass; the exam id is
+        # assigned up front so the rows can reference it before any flush
+        exam_id = str(uuid.uuid4())
+        total_points = 0
+        question_rows = []
+        for ai_question in ai_questions:
+            total_points += ai_question.points
+            question_rows.append({
+                "exam_id": exam_id,
+                "type": ai_question.type,
+                "question": ai_question.question,
+                "options": ai_question.options,
+                "correct_answer": ai_question.correct_answer,
+                "explanation": ai_question.explanation,
+                "difficulty": ai_question.difficulty,
+                "points": ai_question.points,
+                "ai_generated": True
+            })
+        
+        # Create exam (eager_defaults loads the server timestamps on flush)
         exam = Exam(
+            id=exam_id,
             user_id=user_id,
             subject_id=generation_data.subject_id,
             title=generation_data.title,
@@ -201,26 +241,13 @@ class ExamService:
         )
         
         self.db.add(exam)
-        self.db.commit()
-        self.db.refresh(exam)
+        self.db.flush()
         
-        # Create questions
-        for ai_question in ai_questions:
-            question = ExamQuestion(
-                exam_id=exam.id,
-                type=ai_question["type"],
-                question=ai_question["question"],
-                options=ai_question["options"],
-                correct_answer=ai_question["correct_answer"],
-                explanation=ai_question["explanation"],
-                difficulty=ai_question["difficulty"],
-                points=ai_question.get("points", 1),
-                ai_generated=True
-            )
-            self.db.add(question)
+        # Create questions in one batched INSERT, committed with the exam
+        if question_rows:
+            self.db.execute(insert(ExamQuestion), question_rows)
         
         self.db.commit()
-        self.db.refresh(exam)
         
         return exam
     
@@ -240,22 +267,13 @@ class ExamService:
         
         self.db.add(question)
         self.db.commit()
-        self.db.refresh(question)
         
         return question
     
     def _check_answer(self, question: ExamQuestion, answer: Union[int, List[int], str]) -> bool:
         """Check if answer is correct"""
-        if question.type == "single":
-            return answer == question.correct_answer
-        elif question.type == "multiple":
-            if isinstance(answer, list) and isinstance(question.correct_answer, list):
-                return set(answer) == set(question.correct_answer)
-        elif question.type == "open":
-            # For open questions, we might need more sophisticated checking
-            # For now, just check if answer is not empty
-            return bool(answer and str(answer).strip())
-        return False
+        check = _ANSWER_CHECKS.get(question.type)
+        return check(question.correct_answer, answer) if check else False
     
     def get_exam_stats(self, user_id: str, subject_id: Optional[str] = None) -> Dict[str, Any]:
         """Get exam statistics"""
@@ -264,33 +282,34 @@ class ExamService:
         if subject_id:
             query = query.filter(Exam.subject_id == subject_id)
         
-        exams = query.all()
+        total_exams = query.count()
+        total_questions = self.db.query(func.count(ExamQuestion.id)).filter(
+            ExamQuestion.exam_id.in_(query.with_entities(Exam.id))
+        ).scalar()
         
-        total_exams = len(exams)
-        total_questions = sum(len(exam.questions) for exam in exams)
-        
-        # Calculate average score and pass rate from user answers
-        user_answers = self.db.query(ExamUserAnswer).filter(ExamUserAnswer.user_id == user_id).all()
-        total_score = sum(1 for answer in user_answers if answer.is_correct)
-        total_answers = len(user_answers)
+        # Calculate average score from user answers, counted by the database
+        correct = func.sum(case((ExamUserAnswer.is_correct, 1), else_=0))
+        total_answers, total_score = self.db.query(
+            func.count(ExamUserAnswer.id), correct
+        ).filter(ExamUserAnswer.user_id == user_id).one()
         average_score = (total_score / total_answers * 100) if total_answers > 0 else 0
         
-        # Calculate pass rate (simplified)
-        passed_exams = 0
-        for exam in exams:
-            exam_answers = [a for a in user_answers if a.exam_question_id in [q.id for q in exam.questions]]
-            if exam_answers:
-                exam_score = sum(1 for a in exam_answers if a.is_correct)
-                exam_percentage = (exam_score / len(exam_answers) * 100) if exam_answers else 0
-                if exam_percentage >= exam.passing_score:
-                    passed_exams += 1
+        # Calculate pass rate (simplified) from per-exam answer counts
+        per_exam = query.with_entities(
+            Exam.passing_score,
+            func.count(ExamUserAnswer.id).label("answers"),
+            correct.label("correct")
+        ).join(ExamQuestion, ExamQuestion.exam_id == Exam.id).join(
+            ExamUserAnswer, ExamUserAnswer.exam_question_id == ExamQuestion.id
+        ).filter(ExamUserAnswer.user_id == user_id).group_by(Exam.id, Exam.passing_score).all()
+        passed_exams = sum(1 for row in per_exam if row.correct / row.answers * 100 >= row.passing_score)
         
         pass_rate = (passed_exams / total_exams * 100) if total_exams > 0 else 0
         
         # Calculate difficulty distribution
-        difficulty_dist = {}
-        for exam in exams:
-            difficulty_dist[exam.difficulty] = difficulty_dist.get(exam.difficulty, 0) + 1
+        difficulty_dist = dict(
+            query.with_entities(Exam.difficulty, func.count(Exam.id)).group_by(Exam.difficulty).all()
+        )
         
         return {
             "total_exams": total_exams,
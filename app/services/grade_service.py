@@ -2,11 +2,14 @@
 Grade service for academic transcript management
 """
 
+import threading
 from datetime import date, datetime
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from cachetools import TTLCache
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, and_, case, update
 
+from app.core.database import safe_list
 from app.models.grade import Grade
 from app.models.subject import Subject
 from app.schemas.grade import (
@@ -18,6 +21,16 @@ from app.schemas.grade import (
 )
 from app.core.exceptions import NotFoundError, ValidationError
 
+# Dashboard statistics per user, keyed by subject id (None for the whole transcript)
+_GRADE_STATS: TTLCache = TTLCache(maxsize=10000, ttl=60)
+_GRADE_STATS_LOCK = threading.Lock()
+
+
+def _forget_grade_stats(user_id: str) -> None:
+    """Drop cached statistics after a user's grades change"""
+    with _GRADE_STATS_LOCK:
+        _GRADE_STATS.pop(str(user_id), None)
+
 
 class GradeService:
     """Grade service for academic transcript management"""
@@ -43,9 +56,10 @@ class GradeService:
         if grade_data.max_grade and grade_data.grade > grade_data.max_grade:
             raise ValidationError("Grade cannot be higher than max grade")
         
+        # Attach the subject already loaded above, so the response needs no lazy load
         grade = Grade(
             user_id=user_id,
-            subject_id=grade_data.subject_id,
+            subject=subject,
             exam_name=grade_data.exam_name,
             grade=grade_data.grade,
             max_grade=grade_data.max_grade,
@@ -59,15 +73,19 @@ class GradeService:
         
         self.db.add(grade)
         self.db.commit()
-        self.db.refresh(grade)
+        _forget_grade_stats(user_id)
         
         return grade
     
     def get_grades(self, user_id: str, subject_id: Optional[str] = None, 
                    academic_year: Optional[str] = None, 
-                   semester: Optional[str] = None) -> List[Grade]:
+                   semester: Optional[str] = None,
+                   is_passed: Optional[bool] = None) -> List[Grade]:
         """Get all grades for a user with optional filters"""
-        query = self.db.query(Grade).filter(Grade.user_id == user_id)
+        query = safe_list(
+            self.db.query(Grade),
+            selectinload(Grade.subject)
+        ).filter(Grade.user_id == user_id)
         
         if subject_id:
             query = query.filter(Grade.subject_id == subject_id)
@@ -78,83 +96,92 @@ class GradeService:
         if semester:
             query = query.filter(Grade.semester == semester)
         
+        if is_passed is not None:
+            query = query.filter(Grade.is_passed == is_passed)
+        
         return query.order_by(Grade.exam_date.desc()).all()
     
     def get_grade(self, grade_id: str, user_id: str) -> Optional[Grade]:
         """Get a specific grade"""
-        return self.db.query(Grade).filter(
+        return self.db.query(Grade).options(joinedload(Grade.subject)).filter(
             Grade.id == grade_id,
             Grade.user_id == user_id
         ).first()
     
     def update_grade(self, grade_id: str, user_id: str, grade_data: GradeUpdate) -> Grade:
         """Update a grade"""
-        grade = self.get_grade(grade_id, user_id)
+        values = grade_data.model_dump(exclude_unset=True)
+        if not values:
+            grade = self.get_grade(grade_id, user_id)
+        else:
+            # Single UPDATE ... RETURNING instead of SELECT, setattr and flush
+            grade = self.db.scalars(
+                update(Grade)
+                .where(Grade.id == grade_id, Grade.user_id == user_id)
+                .values(**values)
+                .returning(Grade)
+            ).first()
+            self.db.commit()
+            _forget_grade_stats(user_id)
+        
         if not grade:
             raise NotFoundError("Grade", grade_id)
         
-        # Update fields
-        for field, value in grade_data.dict(exclude_unset=True).items():
-            setattr(grade, field, value)
-        
-        self.db.commit()
-        self.db.refresh(grade)
-        
         return grade
     
     def delete_grade(self, grade_id: str, user_id: str) -> bool:
         """Delete a grade"""
-        grade = self.get_grade(grade_id, user_id)
-        if not grade:
-            return False
-        
-        self.db.delete(grade)
+        # Single DELETE; the row count tells whether the grade existed
+        deleted = self.db.query(Grade).filter(
+            Grade.id == grade_id,
+            Grade.user_id == user_id
+        ).delete(synchronize_session=False)
         self.db.commit()
+        _forget_grade_stats(user_id)
         
-        return True
+        return bool(deleted)
     
     def get_grade_stats(self, user_id: str, subject_id: Optional[str] = None) -> GradeStats:
-        """Get comprehensive grade statistics"""
+        """Get comprehensive grade statistics, cached until the next grade write"""
+        with _GRADE_STATS_LOCK:
+            stats = _GRADE_STATS.get(str(user_id), {}).get(subject_id)
+        if stats is not None:
+            return stats
+        
+        stats = self._compute_grade_stats(user_id, subject_id)
+        with _GRADE_STATS_LOCK:
+            _GRADE_STATS.setdefault(str(user_id), {})[subject_id] = stats
+        return stats
+    
+    def _compute_grade_stats(self, user_id: str, subject_id: Optional[str]) -> GradeStats:
+        """Aggregate grade statistics in SQL"""
         query = self.db.query(Grade).filter(Grade.user_id == user_id)
         
         if subject_id:
             query = query.filter(Grade.subject_id == subject_id)
         
-        grades = query.all()
-        
-        if not grades:
-            return GradeStats(
-                total_credits=0,
-                earned_credits=0,
-                average_grade=0.0,
-                weighted_average=0.0,
-                total_exams=0,
-                passed_exams=0,
-                failed_exams=0,
-                current_gpa=0.0,
-                academic_progress=0.0,
-                by_semester={},
-                by_subject={}
-            )
-        
-        # Basic statistics
-        total_exams = len(grades)
-        passed_exams = sum(1 for g in grades if g.is_passed)
-        failed_exams = total_exams - passed_exams
-        
-        # Calculate averages (only for passed exams)
-        passed_grades = [g for g in grades if g.is_passed]
-        total_grade = sum(g.grade for g in passed_grades)
-        average_grade = total_grade / len(passed_grades) if passed_grades else 0.0
+        # Averages only count passed exams
+        passed = case((Grade.is_passed, 1), else_=0)
+        passed_grade = case((Grade.is_passed, Grade.grade))
+        passed_weight = case((Grade.is_passed, func.coalesce(Grade.credits, 1)))
+        aggregates = (
+            func.count(Grade.id),
+            func.coalesce(func.sum(passed), 0),
+            func.coalesce(func.avg(passed_grade), 0.0),
+            func.coalesce(func.sum(Grade.credits), 0),
+            func.coalesce(func.sum(case((Grade.is_passed, Grade.credits))), 0)
+        )
         
-        # Weighted average by credits (only for passed exams)
-        total_weighted = sum(g.grade * (g.credits or 1) for g in passed_grades)
-        total_credits_weight = sum(g.credits or 1 for g in passed_grades)
-        weighted_average = total_weighted / total_credits_weight if total_credits_weight > 0 else 0.0
+        (
+            total_exams, passed_exams, average_grade, total_credits, earned_credits,
+            total_weighted, total_credits_weight
+        ) = query.with_entities(
+            *aggregates,
+            func.coalesce(func.sum(passed_grade * passed_weight), 0.0),
+            func.coalesce(func.sum(passed_weight), 0)
+        ).one()
         
-        # Credits
-        total_credits = sum(g.credits or 0 for g in grades)
-        earned_credits = sum(g.credits or 0 for g in grades if g.is_passed)
+        weighted_average = float(total_weighted) / total_credits_weight if total_credits_weight > 0 else 0.0
         
         # GPA calculation (assuming 30 is max grade)
         gpa = (weighted_average / 30) * 4 if weighted_average > 0 else 0.0
@@ -162,74 +189,57 @@ class GradeService:
         # Academic progress
         academic_progress = (earned_credits / total_credits * 100) if total_credits > 0 else 0.0
         
-        # By semester
-        by_semester = {}
-        for grade in grades:
-            key = f"{grade.academic_year}_{grade.semester or 'unknown'}"
-            if key not in by_semester:
-                by_semester[key] = {
-                    "exams": 0,
-                    "average": 0.0,
-                    "credits": 0,
-                    "passed": 0
-                }
-            
-            by_semester[key]["exams"] += 1
-            by_semester[key]["credits"] += grade.credits or 0
-            if grade.is_passed:
-                by_semester[key]["passed"] += 1
+        # By semester, one GROUP BY row per academic year and semester
+        semester = func.coalesce(func.nullif(Grade.semester, ""), "unknown")
+        by_semester = {
+            f"{academic_year}_{semester_name}": {
+                "exams": exams,
+                "average": float(average),
+                "credits": credits,
+                "passed": passed_count
+            }
+            for academic_year, semester_name, exams, passed_count, average, credits, _ in query
+            .with_entities(Grade.academic_year, semester, *aggregates)
+            .group_by(Grade.academic_year, semester)
+        }
         
-        # Calculate semester averages (only for passed exams)
-        for key in by_semester:
-            semester_grades = [g for g in grades if f"{g.academic_year}_{g.semester or 'unknown'}" == key]
-            passed_semester_grades = [g for g in semester_grades if g.is_passed]
-            if passed_semester_grades:
-                by_semester[key]["average"] = sum(g.grade for g in passed_semester_grades) / len(passed_semester_grades)
-            else:
-                by_semester[key]["average"] = 0.0
+        # By subject, joined to the most recent grade picked by a window function
+        subject_name = func.coalesce(Subject.name, "Unknown")
+        subject_rows = query.outerjoin(Subject, Grade.subject_id == Subject.id).with_entities(
+            subject_name.label("subject_name"),
+            Grade.grade,
+            Grade.exam_date,
+            func.row_number().over(
+                partition_by=subject_name,
+                order_by=Grade.exam_date.desc()
+            ).label("recency")
+        ).subquery()
+        latest = self.db.query(subject_rows).filter(subject_rows.c.recency == 1).subquery()
+        by_subject = {
+            name: {
+                "exams": exams,
+                "average": float(average),
+                "credits": credits,
+                "passed": passed_count,
+                "last_grade": last_grade,
+                "last_exam_date": last_exam_date
+            }
+            for name, exams, passed_count, average, credits, _, last_grade, last_exam_date in query
+            .outerjoin(Subject, Grade.subject_id == Subject.id)
+            .join(latest, latest.c.subject_name == subject_name)
+            .with_entities(subject_name, *aggregates, latest.c.grade, latest.c.exam_date)
+            .group_by(subject_name, latest.c.grade, latest.c.exam_date)
+        }
         
-        # By subject
-        by_subject = {}
-        for grade in grades:
-            subject_name = grade.subject.name if grade.subject else "Unknown"
-            if subject_name not in by_subject:
-                by_subject[subject_name] = {
-                    "exams": 0,
-                    "average": 0.0,
-                    "credits": 0,
-                    "passed": 0,
-                    "last_grade": None,
-                    "last_exam_date": None
-                }
-            
-            by_subject[subject_name]["exams"] += 1
-            by_subject[subject_name]["credits"] += grade.credits or 0
-            if grade.is_passed:
-                by_subject[subject_name]["passed"] += 1
-            
-            # Keep track of latest grade
-            if (by_subject[subject_name]["last_exam_date"] is None or 
-                grade.exam_date > by_subject[subject_name]["last_exam_date"]):
-                by_subject[subject_name]["last_grade"] = grade.grade
-                by_subject[subject_name]["last_exam_date"] = grade.exam_date
-        
-        # Calculate subject averages (only for passed exams)
-        for subject_name in by_subject:
-            subject_grades = [g for g in grades if g.subject and g.subject.name == subject_name]
-            passed_subject_grades = [g for g in subject_grades if g.is_passed]
-            if passed_subject_grades:
-                by_subject[subject_name]["average"] = sum(g.grade for g in passed_subject_grades) / len(passed_subject_grades)
-            else:
-                by_subject[subject_name]["average"] = 0.0
-        
-        return GradeStats(
+        # Values are computed here, so skip re-validation
+        return GradeStats.model_construct(
             total_credits=total_credits,
             earned_credits=earned_credits,
-            average_grade=average_grade,
+            average_grade=float(average_grade),
             weighted_average=weighted_average,
             total_exams=total_exams,
             passed_exams=passed_exams,
-            failed_exams=failed_exams,
+            failed_exams=total_exams - passed_exams,
             current_gpa=gpa,
             academic_progress=academic_progress,
             by_semester=by_semester,
@@ -238,34 +248,49 @@ class GradeService:
     
     def get_grade_summary(self, user_id: str) -> List[GradeSummary]:
         """Get grade summary by subject for dashboard"""
-        # Get all subjects with their grades
-        subjects = self.db.query(Subject).filter(Subject.user_id == user_id).all()
+        # Most recent grade per subject, picked by a window function
+        ranked = self.db.query(
+            Grade.subject_id,
+            Grade.grade,
+            Grade.exam_date,
+            func.row_number().over(
+                partition_by=Grade.subject_id,
+                order_by=Grade.exam_date.desc()
+            ).label("recency")
+        ).filter(Grade.user_id == user_id).subquery()
         
-        summaries = []
-        for subject in subjects:
-            grades = self.db.query(Grade).filter(
-                Grade.user_id == user_id,
-                Grade.subject_id == subject.id
-            ).order_by(Grade.exam_date.desc()).all()
-            
-            if not grades:
-                continue
-            
-            total_exams = len(grades)
-            passed_grades = [g for g in grades if g.is_passed]
-            average_grade = sum(g.grade for g in passed_grades) / len(passed_grades) if passed_grades else 0.0
-            passed_exams = len(passed_grades)
-            total_credits = sum(g.credits or 0 for g in grades)
-            
-            summaries.append(GradeSummary(
-                subject_name=subject.name,
-                subject_id=subject.id,
-                total_exams=total_exams,
-                average_grade=average_grade,
-                last_grade=grades[0].grade,
-                last_exam_date=grades[0].exam_date,
-                credits=total_credits,
-                is_passed=passed_exams == total_exams
-            ))
+        # One grouped query over subjects that have grades (averages only count passed exams)
+        passed_exams = func.sum(case((Grade.is_passed, 1), else_=0))
+        total_exams = func.count(Grade.id)
+        rows = self.db.query(
+            Subject.id,
+            Subject.name,
+            total_exams,
+            func.coalesce(func.avg(case((Grade.is_passed, Grade.grade))), 0.0),
+            func.coalesce(func.sum(Grade.credits), 0),
+            passed_exams == total_exams,
+            ranked.c.grade,
+            ranked.c.exam_date
+        ).join(
+            Grade, and_(Grade.subject_id == Subject.id, Grade.user_id == user_id)
+        ).join(
+            ranked, and_(ranked.c.subject_id == Subject.id, ranked.c.recency == 1)
+        ).filter(
+            Subject.user_id == user_id
+        ).group_by(
+            Subject.id, Subject.name, ranked.c.grade, ranked.c.exam_date
+        ).all()
         
-        return summaries
+        return [
+            GradeSummary(
+                subject_name=name,
+                subject_id=subject_id,
+                total_exams=exams,
+                average_grade=average_grade,
+                last_grade=last_grade,
+                last_exam_date=last_exam_date,
+                credits=credits,
+                is_passed=all_passed
+            )
+            for subject_id, name, exams, average_grade, credits, all_passed, last_grade, last_exam_date in rows
+        ]
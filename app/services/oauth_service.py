@@ -2,7 +2,11 @@
 OAuth2 service for Google and Apple authentication
 """
 
+import asyncio
 from typing import Optional, Dict, Any, Tuple
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 import httpx
@@ -12,12 +16,53 @@ from datetime import datetime, timedelta
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 import base64
+from functools import lru_cache
+from urllib.parse import urlencode
 
 from app.core.config import settings
 from app.models.user import User
 from app.core.security import create_token_pair, get_password_hash
 from app.schemas.auth import UserResponse
 
+# User column holding each provider's account ID
+_PROVIDER_ID_FIELDS = {"google": "google_id", "apple": "apple_id"}
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _http() -> httpx.AsyncClient:
+    """Shared client so Google and Apple calls reuse keep-alive connections"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=32)
+        )
+    return _http_client
+
+
+@lru_cache(maxsize=1)
+def _apple_private_key(pem: str):
+    """Parse the Apple signing key once per configured PEM"""
+    return serialization.load_pem_private_key(pem.encode(), password=None)
+
+
+# Apple accepts the client secret for 10 minutes, so sign it once per window
+_APPLE_SECRET_TTL = timedelta(minutes=10)
+_apple_secret: Optional[Tuple[str, datetime]] = None
+
+
+# Apple's signing keys rotate rarely; PyJWKClient keeps the fetched JWKS for an hour
+_APPLE_JWKS = jwt.PyJWKClient("https://appleid.apple.com/auth/keys", cache_keys=True, lifespan=3600)
+
+
+async def close_http_client() -> None:
+    """Close the shared OAuth client on shutdown"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 class OAuthService:
     """OAuth2 service for handling Google and Apple authentication"""
@@ -63,8 +108,8 @@ class OAuthService:
             token_data = await self._get_apple_token(code)
             access_token = token_data["access_token"]
             
-            # Get user info from Apple
-            user_info = await self._get_apple_user_info(access_token)
+            # Get user info from Apple's signed ID token
+            user_info = await self._get_apple_user_info(token_data.get("id_token", access_token))
             
             # Find or create user
             user = await self._find_or_create_oauth_user(
@@ -89,66 +134,67 @@ class OAuthService:
     
     async def _get_google_token(self, code: str) -> Dict[str, Any]:
         """Exchange authorization code for Google access token"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://oauth2.googleapis.com/token",
-                data={
-                    "client_id": settings.GOOGLE_CLIENT_ID,
-                    "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                    "code": code,
-                    "grant_type": "authorization_code",
-                    "redirect_uri": settings.OAUTH_REDIRECT_URI
-                }
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Failed to get Google token: {response.text}")
-            
-            return response.json()
+        response = await _http().post(
+            "https://oauth2.googleapis.com/token",
+            data={
+                "client_id": settings.GOOGLE_CLIENT_ID,
+                "client_secret": settings.GOOGLE_CLIENT_SECRET,
+                "code": code,
+                "grant_type": "authorization_code",
+                "redirect_uri": settings.OAUTH_REDIRECT_URI
+            }
+        )
+        
+        if response.status_code != 200:
+            raise Exception(f"Failed to get Google token: {response.text}")
+        
+        return response.json()
     
     async def _get_google_user_info(self, access_token: str) -> Dict[str, Any]:
         """Get user information from Google"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://www.googleapis.com/oauth2/v2/userinfo",
-                headers={"Authorization": f"Bearer {access_token}"}
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Failed to get Google user info: {response.text}")
-            
-            return response.json()
+        response = await _http().get(
+            "https://www.googleapis.com/oauth2/v2/userinfo",
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+        
+        if response.status_code != 200:
+            raise Exception(f"Failed to get Google user info: {response.text}")
+        
+        return response.json()
     
     async def _get_apple_token(self, code: str) -> Dict[str, Any]:
         """Exchange authorization code for Apple access token"""
         # Create JWT for Apple authentication
         client_secret = self._create_apple_client_secret()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://appleid.apple.com/auth/token",
-                data={
-                    "client_id": settings.APPLE_CLIENT_ID,
-                    "client_secret": client_secret,
-                    "code": code,
-                    "grant_type": "authorization_code",
-                    "redirect_uri": settings.OAUTH_REDIRECT_URI
-                }
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Failed to get Apple token: {response.text}")
-            
-            return response.json()
+        response = await _http().post(
+            "https://appleid.apple.com/auth/token",
+            data={
+                "client_id": settings.APPLE_CLIENT_ID,
+                "client_secret": client_secret,
+                "code": code,
+                "grant_type": "authorization_code",
+                "redirect_uri": settings.OAUTH_REDIRECT_URI
+            }
+        )
+        
+        if response.status_code != 200:
+            raise Exception(f"Failed to get Apple token: {response.text}")
+        
+        return response.json()
     
-    async def _get_apple_user_info(self, access_token: str) -> Dict[str, Any]:
-        """Get user information from Apple ID token"""
+    async def _get_apple_user_info(self, id_token: str) -> Dict[str, Any]:
+        """Get user information from a verified Apple ID token"""
         try:
-            # Decode the ID token (no verification for simplicity)
-            # In production, you should verify the JWT signature
-            id_token = access_token  # In real implementation, this would be in the token response
-            payload = jwt.decode(id_token, options={"verify_signature": False})
-            return payload
+            # The JWKS fetch is blocking urllib, but only runs when the cached keys expire
+            signing_key = await asyncio.to_thread(_APPLE_JWKS.get_signing_key_from_jwt, id_token)
+            return jwt.decode(
+                id_token,
+                signing_key.key,
+                algorithms=["RS256"],
+                audience=settings.APPLE_CLIENT_ID,
+                issuer="https://appleid.apple.com"
+            )
         except Exception as e:
             raise Exception(f"Failed to decode Apple ID token: {str(e)}")
     
@@ -157,11 +203,13 @@ class OAuthService:
         if not settings.APPLE_PRIVATE_KEY:
             raise Exception("Apple private key not configured")
         
+        global _apple_secret
+        now = datetime.utcnow()
+        if _apple_secret and _apple_secret[1] - now > timedelta(seconds=60):
+            return _apple_secret[0]
+        
         # Parse the private key
-        private_key = serialization.load_pem_private_key(
-            settings.APPLE_PRIVATE_KEY.encode(),
-            password=None
-        )
+        private_key = _apple_private_key(settings.APPLE_PRIVATE_KEY)
         
         # Create JWT header
         header = {
@@ -170,17 +218,18 @@ class OAuthService:
         }
         
         # Create JWT payload
-        now = datetime.utcnow()
+        expires_at = now + _APPLE_SECRET_TTL
         payload = {
             "iss": settings.APPLE_TEAM_ID,
             "iat": now,
-            "exp": now + timedelta(minutes=10),
+            "exp": expires_at,
             "aud": "https://appleid.apple.com",
             "sub": settings.APPLE_CLIENT_ID
         }
         
         # Sign the JWT
         token = jwt.encode(payload, private_key, algorithm="ES256", headers=header)
+        _apple_secret = (token, expires_at)
         return token
     
     async def _find_or_create_oauth_user(
@@ -193,60 +242,68 @@ class OAuthService:
         oauth_data: Dict[str, Any]
     ) -> User:
         """Find existing user or create new one for OAuth provider"""
+        now = datetime.utcnow()
         
-        # Try to find existing user by provider ID
-        if provider == "google":
-            user = self.db.query(User).filter(User.google_id == provider_id).first()
-        elif provider == "apple":
-            user = self.db.query(User).filter(User.apple_id == provider_id).first()
-        else:
-            user = None
+        # Look up by provider ID and by email in one query; the provider match wins
+        provider_field = _PROVIDER_ID_FIELDS.get(provider)
+        conditions = [func.lower(User.email) == email.lower()]
+        if provider_field:
+            conditions.append(getattr(User, provider_field) == provider_id)
+        matches = self.db.query(User).filter(or_(*conditions)).limit(2).all()
         
+        user = next(
+            (m for m in matches if provider_field and getattr(m, provider_field) == provider_id),
+            None
+        )
         if user:
             # Update last login
-            user.last_login_at = datetime.utcnow()
+            user.last_login_at = now
             user.oauth_data = oauth_data
             self.db.commit()
             return user
         
-        # Try to find user by email
-        user = self.db.query(User).filter(User.email == email).first()
+        # Otherwise the match is by email
+        user = matches[0] if matches else None
         
         if user:
             # Link OAuth provider to existing user
-            if provider == "google":
-                user.google_id = provider_id
-            elif provider == "apple":
-                user.apple_id = provider_id
+            if provider_field:
+                setattr(user, provider_field, provider_id)
             
             user.oauth_provider = provider
             user.oauth_data = oauth_data
-            user.last_login_at = datetime.utcnow()
+            user.last_login_at = now
             self.db.commit()
             return user
         
-        # Create new user
-        user = User(
-            email=email,
-            name=name,
-            avatar=avatar,
-            hashed_password=None,  # OAuth users don't have passwords
-            is_active=True,
-            is_verified=True,  # OAuth users are pre-verified
-            oauth_provider=provider,
-            oauth_data=oauth_data,
-            last_login_at=datetime.utcnow()
-        )
+        # Create new user; a concurrent first login for the same email lands in
+        # ON CONFLICT, which links the provider instead of failing on the unique index
+        values = {
+            "email": email,
+            "name": name,
+            "avatar": avatar,
+            "hashed_password": None,  # OAuth users don't have passwords
+            "is_active": True,
+            "is_verified": True,  # OAuth users are pre-verified
+            "oauth_provider": provider,
+            "oauth_data": oauth_data,
+            "last_login_at": now
+        }
+        if provider_field:
+            values[provider_field] = provider_id
         
-        # Set provider ID
-        if provider == "google":
-            user.google_id = provider_id
-        elif provider == "apple":
-            user.apple_id = provider_id
+        insert = pg_insert if self.db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        stmt = insert(User)
+        linked = {field: stmt.excluded[field] for field in ("oauth_provider", "oauth_data", "last_login_at")}
+        if provider_field:
+            linked[provider_field] = stmt.excluded[provider_field]
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[func.lower(User.email)],
+            set_=linked
+        ).returning(User)
         
-        self.db.add(user)
+        user = self.db.scalars(stmt, [values]).one()
         self.db.commit()
-        self.db.refresh(user)
         
         return user
     
@@ -275,8 +332,7 @@ class OAuthService:
         if state:
             params["state"] = state
         
-        query_string = "&".join([f"{k}={v}" for k, v in params.items()])
-        return f"https://accounts.google.com/o/oauth2/v2/auth?{query_string}"
+        return f"https://accounts.google.com/o/oauth2/v2/auth?{urlencode(params)}"
     
     def _get_apple_oauth_url(self, state: Optional[str] = None) -> str:
         """Get Apple OAuth authorization URL"""
@@ -291,5 +347,4 @@ class OAuthService:
         if state:
             params["state"] = state
         
-        query_string = "&".join([f"{k}={v}" for k, v in params.items()])
-        return f"https://appleid.apple.com/auth/authorize?{query_string}"
+        return f"https://appleid.apple.com/auth/authorize?{urlencode(params)}"
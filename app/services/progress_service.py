@@ -5,100 +5,177 @@ Progress service
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, text, update
 
-from app.models.progress import Progress, Achievement, Goal
-from app.schemas.progress import GoalCreate, GoalUpdate
+from app.models.progress import Progress, ProgressView, Achievement, Goal
+from app.models.session import StudySession
+from app.schemas.progress import AchievementResponse, GoalCreate, GoalUpdate, ProgressResponse
 from app.core.exceptions import NotFoundError, ValidationError
 
 
+_ACHIEVEMENTS_DEFINED_AT = datetime.utcnow()
+
+# Session figures of a progress row with no completed sessions
+_NO_SESSION_TOTALS = {"total_sessions": 0, "total_time": 0, "average_score": 0.0, "last_study_date": None}
+
+# Placeholder achievements, built once instead of on every request
+_ACHIEVEMENTS = (
+    {
+        "id": "1",
+        "name": "First Quiz",
+        "description": "Complete your first quiz",
+        "icon": "quiz",
+        "category": "quiz",
+        "points": 10,
+        "is_active": True,
+        "created_at": _ACHIEVEMENTS_DEFINED_AT,
+        "updated_at": _ACHIEVEMENTS_DEFINED_AT,
+        "unlocked": True,
+        "unlocked_at": _ACHIEVEMENTS_DEFINED_AT.isoformat()
+    },
+    {
+        "id": "2",
+        "name": "Study Streak",
+        "description": "Study for 7 consecutive days",
+        "icon": "fire",
+        "category": "streak",
+        "points": 50,
+        "is_active": True,
+        "created_at": _ACHIEVEMENTS_DEFINED_AT,
+        "updated_at": _ACHIEVEMENTS_DEFINED_AT,
+        "unlocked": False,
+        "unlocked_at": None
+    },
+)
+
+
 class ProgressService:
     """Progress service"""
     
     def __init__(self, db: Session):
         self.db = db
     
-    def get_overall_progress(self, user_id: str) -> Progress:
+    def get_overall_progress(self, user_id: str) -> ProgressResponse:
         """Get overall progress for a user"""
+        progress = self._get_or_create_progress(user_id, None)
+        return self._with_session_totals(progress, self._session_totals(user_id).get(None))
+    
+    def get_subject_progress(self, user_id: str, subject_id: str) -> ProgressResponse:
+        """Get progress for a specific subject"""
+        progress = self._get_or_create_progress(user_id, subject_id)
+        return self._with_session_totals(progress, self._session_totals(user_id).get(subject_id))
+    
+    def _get_or_create_progress(self, user_id: str, subject_id: Optional[str]) -> Progress:
+        """Load a progress row, creating the default one if it doesn't exist"""
         progress = self.db.query(Progress).filter(
             Progress.user_id == user_id,
-            Progress.subject_id.is_(None)
+            Progress.subject_id == subject_id if subject_id else Progress.subject_id.is_(None)
         ).first()
         
         if not progress:
-            # Create default progress if it doesn't exist
-            progress = Progress(
-                user_id=user_id,
-                subject_id=None
-            )
-            self.db.add(progress)
-            self.db.commit()
-            self.db.refresh(progress)
+            progress = self._create_progress(user_id, subject_id)
         
         return progress
     
-    def get_subject_progress(self, user_id: str, subject_id: str) -> Progress:
-        """Get progress for a specific subject"""
-        progress = self.db.query(Progress).filter(
-            Progress.user_id == user_id,
-            Progress.subject_id == subject_id
-        ).first()
-        
-        if not progress:
-            # Create default progress if it doesn't exist
-            progress = Progress(
-                user_id=user_id,
-                subject_id=subject_id
-            )
-            self.db.add(progress)
-            self.db.commit()
-            self.db.refresh(progress)
+    def _create_progress(self, user_id: str, subject_id: Optional[str]) -> Progress:
+        """Create the default progress row"""
+        progress = Progress(
+            user_id=user_id,
+            subject_id=subject_id
+        )
+        self.db.add(progress)
+        self.db.commit()
         
         return progress
     
+    def _session_totals(self, user_id: str) -> Dict[Optional[str], Dict[str, Any]]:
+        """Completed-session totals per subject, with the overall totals under None"""
+        if self.db.get_bind().dialect.name == "postgresql":
+            # Pre-aggregated by user_progress_mv, refreshed by the statistics beat task
+            rows = self.db.query(
+                ProgressView.subject_id,
+                ProgressView.total_sessions,
+                ProgressView.total_time,
+                ProgressView.average_score,
+                ProgressView.last_study_date
+            ).filter(ProgressView.user_id == user_id).all()
+        else:
+            # No materialized views elsewhere: run the view's query directly
+            rows = self.db.query(
+                StudySession.subject_id,
+                func.count().label("total_sessions"),
+                func.coalesce(func.sum(StudySession.duration), 0).label("total_time"),
+                func.avg(StudySession.score).label("average_score"),
+                func.max(StudySession.completed_at).label("last_study_date")
+            ).filter(
+                StudySession.user_id == user_id,
+                StudySession.is_completed.is_(True)
+            ).group_by(StudySession.subject_id).all()
+        
+        totals = {
+            row.subject_id: {
+                "total_sessions": row.total_sessions,
+                "total_time": int(row.total_time),
+                "average_score": row.average_score or 0.0,
+                "last_study_date": row.last_study_date
+            }
+            for row in rows
+        }
+        
+        # Overall average weights each subject's average by its session count
+        total_sessions = sum(t["total_sessions"] for t in totals.values())
+        totals[None] = {
+            "total_sessions": total_sessions,
+            "total_time": sum(t["total_time"] for t in totals.values()),
+            "average_score": (
+                sum(t["average_score"] * t["total_sessions"] for t in totals.values()) / total_sessions
+                if total_sessions else 0.0
+            ),
+            "last_study_date": max(
+                (t["last_study_date"] for t in totals.values() if t["last_study_date"]), default=None
+            )
+        }
+        return totals
+    
+    def _with_session_totals(self, progress: Progress, totals: Optional[Dict[str, Any]]) -> ProgressResponse:
+        """Progress response whose session figures come from the session totals"""
+        response = ProgressResponse.model_validate(progress)
+        return response.model_copy(update=totals or _NO_SESSION_TOTALS)
+    
     def update_progress(self, user_id: str, subject_id: Optional[str], progress_data: Dict[str, Any]) -> Progress:
         """Update progress data"""
-        if subject_id:
-            progress = self.get_subject_progress(user_id, subject_id)
-        else:
-            progress = self.get_overall_progress(user_id)
+        columns = Progress.__table__.columns
+        values = {field: value for field, value in progress_data.items() if field in columns}
+        
+        progress = None
+        if values:
+            # Single UPDATE ... RETURNING when the row already exists
+            progress = self.db.scalars(
+                update(Progress)
+                .where(
+                    Progress.user_id == user_id,
+                    Progress.subject_id == subject_id if subject_id else Progress.subject_id.is_(None)
+                )
+                .values(**values)
+                .returning(Progress)
+            ).first()
         
-        # Update fields
-        for field, value in progress_data.items():
-            if hasattr(progress, field):
+        if progress is None:
+            # First update creates the row, then applies the fields to it
+            progress = self._get_or_create_progress(user_id, subject_id)
+            
+            for field, value in values.items():
                 setattr(progress, field, value)
         
         self.db.commit()
-        self.db.refresh(progress)
         
         return progress
     
     def get_achievements(self, user_id: str) -> List[Dict[str, Any]]:
         """Get user achievements"""
         # This would typically check against user progress and unlock achievements
-        # For now, return a placeholder list
-        return [
-            {
-                "id": "1",
-                "name": "First Quiz",
-                "description": "Complete your first quiz",
-                "icon": "quiz",
-                "category": "quiz",
-                "points": 10,
-                "unlocked": True,
-                "unlocked_at": datetime.utcnow().isoformat()
-            },
-            {
-                "id": "2",
-                "name": "Study Streak",
-                "description": "Study for 7 consecutive days",
-                "icon": "fire",
-                "category": "streak",
-                "points": 50,
-                "unlocked": False,
-                "unlocked_at": None
-            }
-        ]
+        # For now, return copies of the placeholders so callers cannot mutate the shared ones
+        return [dict(achievement) for achievement in _ACHIEVEMENTS]
     
     def get_goals(self, user_id: str, subject_id: Optional[str] = None) -> List[Goal]:
         """Get user goals"""
@@ -124,58 +201,59 @@ class ProgressService:
         
         self.db.add(goal)
         self.db.commit()
-        self.db.refresh(goal)
         
         return goal
     
     def update_goal(self, goal_id: str, user_id: str, goal_data: GoalUpdate) -> Goal:
         """Update a goal"""
-        goal = self.db.query(Goal).filter(
-            Goal.id == goal_id,
-            Goal.user_id == user_id
-        ).first()
+        values = goal_data.model_dump(exclude_unset=True)
+        goal_filter = (Goal.id == goal_id, Goal.user_id == user_id)
+        if not values:
+            goal = self.db.query(Goal).filter(*goal_filter).first()
+        else:
+            goal = self.db.scalars(
+                update(Goal).where(*goal_filter).values(**values).returning(Goal)
+            ).first()
+            self.db.commit()
         
         if not goal:
             raise NotFoundError("Goal", goal_id)
         
-        # Update fields
-        for field, value in goal_data.dict(exclude_unset=True).items():
-            setattr(goal, field, value)
-        
-        self.db.commit()
-        self.db.refresh(goal)
-        
         return goal
     
     def delete_goal(self, goal_id: str, user_id: str) -> bool:
         """Delete a goal"""
-        goal = self.db.query(Goal).filter(
+        # Single DELETE; the row count tells whether the goal existed
+        deleted = self.db.query(Goal).filter(
             Goal.id == goal_id,
             Goal.user_id == user_id
-        ).first()
-        
-        if not goal:
-            return False
-        
-        self.db.delete(goal)
+        ).delete(synchronize_session=False)
         self.db.commit()
         
-        return True
+        return bool(deleted)
     
     def get_progress_stats(self, user_id: str) -> Dict[str, Any]:
         """Get comprehensive progress statistics"""
-        # Get overall progress
-        overall_progress = self.get_overall_progress(user_id)
+        # Get overall and subject progress in one query, split by subject_id
+        progress_rows = self.db.query(Progress).filter(Progress.user_id == user_id).all()
+        overall_progress = next((p for p in progress_rows if p.subject_id is None), None)
+        subject_progress = [p for p in progress_rows if p.subject_id is not None]
         
-        # Get subject progress
-        subject_progress = self.db.query(Progress).filter(
-            Progress.user_id == user_id,
-            Progress.subject_id.isnot(None)
-        ).all()
+        if overall_progress is None:
+            # First visit only: the query above already showed the row is missing
+            overall_progress = self._create_progress(user_id, None)
+        
+        # Session figures come from the progress view, not the imperative columns
+        totals = self._session_totals(user_id)
+        overall_progress = self._with_session_totals(overall_progress, totals[None])
+        subject_progress = [self._with_session_totals(p, totals.get(p.subject_id)) for p in subject_progress]
         
         # Get achievements
         achievements = self.get_achievements(user_id)
-        recent_achievements = [a for a in achievements if a.get("unlocked")][:5]
+        recent_achievements = [
+            {field: a[field] for field in AchievementResponse.model_fields}
+            for a in achievements if a.get("unlocked")
+        ][:5]
         
         # Get goals
         goals = self.get_goals(user_id)
@@ -190,13 +268,11 @@ class ProgressService:
         
         # Calculate average daily time (last 30 days)
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_sessions = self.db.query(Progress).filter(
+        recent_study_time = self.db.query(func.coalesce(func.sum(Progress.total_time), 0)).filter(
             Progress.user_id == user_id,
             Progress.updated_at >= thirty_days_ago
-        ).all()
-        
-        recent_study_time = sum(p.total_time for p in recent_sessions)
-        average_daily_time = recent_study_time / 30 if recent_study_time > 0 else 0
+        ).scalar()
+        average_daily_time = recent_study_time / 30
         
         return {
             "overall_progress": overall_progress,
@@ -209,6 +285,16 @@ class ProgressService:
             "average_daily_time": average_daily_time
         }
     
+    def refresh_progress_view(self) -> None:
+        """Refresh the user_progress_mv materialized view (PostgreSQL only)"""
+        if self.db.get_bind().dialect.name != "postgresql":
+            return
+        
+        # CONCURRENTLY keeps the view readable during the refresh; it relies
+        # on the unique (user_id, subject_id) index
+        self.db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY user_progress_mv"))
+        self.db.commit()
+    
     def _calculate_study_streak(self, user_id: str) -> int:
         """Calculate study streak in days"""
         # This would typically look at study sessions
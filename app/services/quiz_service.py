@@ -2,22 +2,37 @@
 Quiz service
 """
 
+import asyncio
+import threading
 from datetime import datetime
 from typing import List, Optional, Dict, Any, Union
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from cachetools import TTLCache
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import case, func, insert, update
 
+from app.core.database import safe_list
 from app.models.quiz import Quiz, QuizQuestion, QuizUserAnswer
-from app.models.upload import Upload
+from app.models.upload import Upload, UploadMetadata
+from app.schemas.base import ANSWER_CHECKS
 from app.schemas.quiz import (
     QuizCreate, 
     QuizUpdate, 
-    QuizQuestionCreate,
     QuizAnswer,
     QuizGenerationRequest
 )
 from app.core.exceptions import NotFoundError, ValidationError
-from app.services.ai_service import AIService
+from app.services.ai_service import get_ai_service
+
+
+# Quiz stats per user, keyed by subject id (None for all subjects)
+_QUIZ_STATS: TTLCache = TTLCache(maxsize=10000, ttl=30)
+_QUIZ_STATS_LOCK = threading.Lock()
+
+
+def _forget_quiz_stats(user_id: str) -> None:
+    """Drop cached stats after a user's quizzes or answers change"""
+    with _QUIZ_STATS_LOCK:
+        _QUIZ_STATS.pop(str(user_id), None)
 
 
 class QuizService:
@@ -25,7 +40,7 @@ class QuizService:
     
     def __init__(self, db: Session):
         self.db = db
-        self.ai_service = AIService()
+        self.ai_service = get_ai_service()
     
     def create_quiz(self, user_id: str, quiz_data: QuizCreate) -> Quiz:
         """Create a new quiz"""
@@ -39,20 +54,37 @@ class QuizService:
             tags=quiz_data.tags
         )
         
+        # Flush for the id, then add the questions in one batched INSERT and one commit
         self.db.add(quiz)
-        self.db.commit()
-        self.db.refresh(quiz)
+        self.db.flush()
         
-        # Add questions if provided
         if quiz_data.questions:
-            for question_data in quiz_data.questions:
-                self._create_quiz_question(quiz.id, question_data)
+            self.db.execute(insert(QuizQuestion), [
+                {
+                    "quiz_id": quiz.id,
+                    "type": question_data.type,
+                    "question": question_data.question,
+                    "options": question_data.options,
+                    "correct_answer": question_data.correct_answer,
+                    "explanation": question_data.explanation,
+                    "difficulty": question_data.difficulty,
+                    "points": question_data.points,
+                    "source_upload_id": question_data.source_upload_id
+                }
+                for question_data in quiz_data.questions
+            ])
+        
+        self.db.commit()
+        _forget_quiz_stats(user_id)
         
         return quiz
     
     def get_quizzes(self, user_id: str, subject_id: Optional[str] = None) -> List[Quiz]:
         """Get all quizzes for a user"""
-        query = self.db.query(Quiz).filter(Quiz.user_id == user_id)
+        query = safe_list(
+            self.db.query(Quiz),
+            selectinload(Quiz.questions)
+        ).filter(Quiz.user_id == user_id)
         
         if subject_id:
             query = query.filter(Quiz.subject_id == subject_id)
@@ -68,17 +100,22 @@ class QuizService:
     
     def update_quiz(self, quiz_id: str, user_id: str, quiz_data: QuizUpdate) -> Quiz:
         """Update a quiz"""
-        quiz = self.get_quiz(quiz_id, user_id)
+        values = quiz_data.model_dump(exclude_unset=True)
+        if not values:
+            quiz = self.get_quiz(quiz_id, user_id)
+        else:
+            quiz = self.db.scalars(
+                update(Quiz)
+                .where(Quiz.id == quiz_id, Quiz.user_id == user_id)
+                .values(**values)
+                .returning(Quiz)
+            ).first()
+            self.db.commit()
+            _forget_quiz_stats(user_id)
+        
         if not quiz:
             raise NotFoundError("Quiz", quiz_id)
         
-        # Update fields
-        for field, value in quiz_data.dict(exclude_unset=True).items():
-            setattr(quiz, field, value)
-        
-        self.db.commit()
-        self.db.refresh(quiz)
-        
         return quiz
     
     def delete_quiz(self, quiz_id: str, user_id: str) -> bool:
@@ -89,6 +126,7 @@ class QuizService:
         
         self.db.delete(quiz)
         self.db.commit()
+        _forget_quiz_stats(user_id)
         
         return True
     
@@ -113,12 +151,20 @@ class QuizService:
         total_score = 0
         max_score = 0
         correct_answers = 0
+        answer_rows = []
+        
+        # One IN query for every answered question instead of one SELECT per answer
+        question_ids = {answer.question_id for answer in answers}
+        questions_by_id = {
+            question.id: question
+            for question in self.db.query(QuizQuestion).filter(
+                QuizQuestion.id.in_(question_ids),
+                QuizQuestion.quiz_id == quiz_id
+            )
+        }
         
         for answer in answers:
-            question = self.db.query(QuizQuestion).filter(
-                QuizQuestion.id == answer.question_id,
-                QuizQuestion.quiz_id == quiz_id
-            ).first()
+            question = questions_by_id.get(answer.question_id)
             
             if not question:
                 continue
@@ -132,16 +178,18 @@ class QuizService:
                 correct_answers += 1
             
             # Save user answer
-            user_answer = QuizUserAnswer(
-                user_id=user_id,
-                quiz_question_id=question.id,
-                answer=answer.answer,
-                is_correct=is_correct,
-                time_spent=answer.time_spent
-            )
-            self.db.add(user_answer)
-        
+            answer_rows.append({
+                "user_id": user_id,
+                "quiz_question_id": question.id,
+                "answer": answer.answer,
+                "is_correct": is_correct,
+                "time_spent": answer.time_spent
+            })
+        
+        if answer_rows:
+            self.db.execute(insert(QuizUserAnswer), answer_rows)
         self.db.commit()
+        _forget_quiz_stats(user_id)
         
         # Calculate percentage
         percentage = (total_score / max_score * 100) if max_score > 0 else 0
@@ -156,25 +204,24 @@ class QuizService:
             "completed_at": datetime.utcnow()
         }
     
-    def generate_quiz(self, user_id: str, generation_data: QuizGenerationRequest) -> Quiz:
+    async def generate_quiz(self, user_id: str, generation_data: QuizGenerationRequest) -> Quiz:
         """Generate quiz using AI"""
         # Get content from source uploads
         content = ""
         if generation_data.source_upload_ids:
-            uploads = self.db.query(Upload).filter(
+            # Select only the extracted text instead of whole Upload rows
+            texts = self.db.query(UploadMetadata.extracted_text).join(Upload).filter(
                 Upload.id.in_(generation_data.source_upload_ids),
                 Upload.user_id == user_id
             ).all()
-            
-            for upload in uploads:
-                if upload.file_metadata and upload.file_metadata.get("extracted_text"):
-                    content += upload.file_metadata["extracted_text"] + "\n"
+            content = "\n".join(text for (text,) in texts if text)
         
         if not content:
             raise ValidationError("No content available for quiz generation")
         
-        # Generate questions using AI
-        ai_questions = self.ai_service.generate_quiz_questions(
+        # Generate questions using AI (blocking HTTP call, kept off the event loop)
+        ai_questions = await asyncio.to_thread(
+            self.ai_service.generate_quiz_questions,
             content, 
             generation_data.difficulty, 
             generation_data.num_questions
@@ -190,82 +237,73 @@ class QuizService:
             tags=generation_data.tags
         )
         
+        # Flush for the id; eager_defaults returns the server timestamps with the INSERT
         self.db.add(quiz)
-        self.db.commit()
-        self.db.refresh(quiz)
-        
-        # Create questions
-        for i, ai_question in enumerate(ai_questions):
-            question = QuizQuestion(
-                quiz_id=quiz.id,
-                type=ai_question["type"],
-                question=ai_question["question"],
-                options=ai_question["options"],
-                correct_answer=ai_question["correct_answer"],
-                explanation=ai_question["explanation"],
-                difficulty=ai_question["difficulty"],
-                points=ai_question.get("points", 1),
-                ai_generated=True
-            )
-            self.db.add(question)
+        self.db.flush()
+        
+        # Create questions in one batched INSERT, committed with the quiz
+        question_rows = [
+            {
+                "quiz_id": quiz.id,
+                "type": ai_question.type,
+                "question": ai_question.question,
+                "options": ai_question.options,
+                "correct_answer": ai_question.correct_answer,
+                "explanation": ai_question.explanation,
+                "difficulty": ai_question.difficulty,
+                "points": ai_question.points,
+                "ai_generated": True
+            }
+            for ai_question in ai_questions
+        ]
+        if question_rows:
+            self.db.execute(insert(QuizQuestion), question_rows)
         
         self.db.commit()
-        self.db.refresh(quiz)
+        _forget_quiz_stats(user_id)
         
         return quiz
     
-    def _create_quiz_question(self, quiz_id: str, question_data: QuizQuestionCreate) -> QuizQuestion:
-        """Create a quiz question"""
-        question = QuizQuestion(
-            quiz_id=quiz_id,
-            type=question_data.type,
-            question=question_data.question,
-            options=question_data.options,
-            correct_answer=question_data.correct_answer,
-            explanation=question_data.explanation,
-            difficulty=question_data.difficulty,
-            points=question_data.points,
-            source_upload_id=question_data.source_upload_id
-        )
-        
-        self.db.add(question)
-        self.db.commit()
-        self.db.refresh(question)
-        
-        return question
-    
     def _check_answer(self, question: QuizQuestion, answer: Union[int, List[int], str]) -> bool:
         """Check if answer is correct"""
-        if question.type == "single":
-            return answer == question.correct_answer
-        elif question.type == "multiple":
-            if isinstance(answer, list) and isinstance(question.correct_answer, list):
-                return set(answer) == set(question.correct_answer)
-        return False
+        check = ANSWER_CHECKS.get(question.type)
+        return check(question.correct_answer, answer) if check else False
     
     def get_quiz_stats(self, user_id: str, subject_id: Optional[str] = None) -> Dict[str, Any]:
-        """Get quiz statistics"""
+        """Get quiz statistics, cached briefly and dropped on quiz writes"""
+        with _QUIZ_STATS_LOCK:
+            stats = _QUIZ_STATS.get(str(user_id), {}).get(subject_id)
+        if stats is not None:
+            return stats
+        
+        stats = self._compute_quiz_stats(user_id, subject_id)
+        with _QUIZ_STATS_LOCK:
+            _QUIZ_STATS.setdefault(str(user_id), {})[subject_id] = stats
+        return stats
+    
+    def _compute_quiz_stats(self, user_id: str, subject_id: Optional[str]) -> Dict[str, Any]:
+        """Aggregate quiz statistics in SQL"""
         query = self.db.query(Quiz).filter(Quiz.user_id == user_id)
         
         if subject_id:
             query = query.filter(Quiz.subject_id == subject_id)
         
-        quizzes = query.all()
-        
-        total_quizzes = len(quizzes)
-        total_questions = sum(len(quiz.questions) for quiz in quizzes)
-        
-        # Calculate average score from user answers
-        user_answers = self.db.query(QuizUserAnswer).filter(QuizUserAnswer.user_id == user_id).all()
-        total_score = sum(1 for answer in user_answers if answer.is_correct)
-        total_answers = len(user_answers)
+        # Difficulty distribution; its counts also give the quiz total
+        difficulty_dist = dict(
+            query.with_entities(Quiz.difficulty, func.count(Quiz.id)).group_by(Quiz.difficulty).all()
+        )
+        total_quizzes = sum(difficulty_dist.values())
+        total_questions = self.db.query(func.count(QuizQuestion.id)).filter(
+            QuizQuestion.quiz_id.in_(query.with_entities(Quiz.id))
+        ).scalar()
+        
+        # Calculate average score from user answers, counted by the database
+        total_answers, total_score = self.db.query(
+            func.count(QuizUserAnswer.id),
+            func.sum(case((QuizUserAnswer.is_correct, 1), else_=0))
+        ).filter(QuizUserAnswer.user_id == user_id).one()
         average_score = (total_score / total_answers * 100) if total_answers > 0 else 0
         
-        # Calculate difficulty distribution
-        difficulty_dist = {}
-        for quiz in quizzes:
-            difficulty_dist[quiz.difficulty] = difficulty_dist.get(quiz.difficulty, 0) + 1
-        
         return {
             "total_quizzes": total_quizzes,
             "total_questions": total_questions,
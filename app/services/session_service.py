@@ -2,15 +2,28 @@
 Study session service
 """
 
+import threading
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from cachetools import TTLCache
+from sqlalchemy.orm import Query, Session
+from sqlalchemy import Date, and_, case, func, desc, update
 
+from app.core.database import safe_list
 from app.models.session import StudySession
 from app.schemas.session import StudySessionCreate, StudySessionUpdate, StudySessionStart
 from app.core.exceptions import NotFoundError, ValidationError
 
+# Aggregate session totals per user, keyed by subject id (None for all subjects)
+_SESSION_TOTALS: TTLCache = TTLCache(maxsize=10000, ttl=30)
+_SESSION_TOTALS_LOCK = threading.Lock()
+
+
+def _forget_session_stats(user_id: str) -> None:
+    """Drop cached totals after a user's sessions change"""
+    with _SESSION_TOTALS_LOCK:
+        _SESSION_TOTALS.pop(str(user_id), None)
+
 
 class SessionService:
     """Study session service"""
@@ -31,7 +44,7 @@ class SessionService:
         
         self.db.add(session)
         self.db.commit()
-        self.db.refresh(session)
+        _forget_session_stats(user_id)
         
         return session
     
@@ -55,18 +68,23 @@ class SessionService:
         
         self.db.add(session)
         self.db.commit()
-        self.db.refresh(session)
+        _forget_session_stats(user_id)
         
         return session
     
-    def get_sessions(self, user_id: str, subject_id: Optional[str] = None) -> List[StudySession]:
-        """Get all study sessions for a user"""
-        query = self.db.query(StudySession).filter(StudySession.user_id == user_id)
+    def get_sessions(self, user_id: str, subject_id: Optional[str] = None,
+                     limit: int = 50, cursor: Optional[datetime] = None) -> List[StudySession]:
+        """Get a page of study sessions for a user, newest first"""
+        query = safe_list(self.db.query(StudySession)).filter(StudySession.user_id == user_id)
         
         if subject_id:
             query = query.filter(StudySession.subject_id == subject_id)
         
-        return query.order_by(desc(StudySession.started_at)).all()
+        # Keyset pagination: pass the last started_at seen to get the next page
+        if cursor:
+            query = query.filter(StudySession.started_at < cursor)
+        
+        return query.order_by(desc(StudySession.started_at)).limit(limit).all()
     
     def get_session(self, session_id: str, user_id: str) -> Optional[StudySession]:
         """Get a specific study session"""
@@ -77,17 +95,30 @@ class SessionService:
     
     def update_session(self, session_id: str, user_id: str, session_data: StudySessionUpdate) -> StudySession:
         """Update a study session"""
-        session = self.get_session(session_id, user_id)
+        values = session_data.model_dump(exclude_unset=True)
+        if not values:
+            session = self.get_session(session_id, user_id)
+        elif "is_completed" in values:
+            # Completion goes through the ORM so the after_update subject roll-up fires
+            session = self.get_session(session_id, user_id)
+            if session:
+                for field, value in values.items():
+                    setattr(session, field, value)
+                self.db.commit()
+                _forget_session_stats(user_id)
+        else:
+            session = self.db.scalars(
+                update(StudySession)
+                .where(StudySession.id == session_id, StudySession.user_id == user_id)
+                .values(**values)
+                .returning(StudySession)
+            ).first()
+            self.db.commit()
+            _forget_session_stats(user_id)
+        
         if not session:
             raise NotFoundError("Study session", session_id)
         
-        # Update fields
-        for field, value in session_data.dict(exclude_unset=True).items():
-            setattr(session, field, value)
-        
-        self.db.commit()
-        self.db.refresh(session)
-        
         return session
     
     def complete_session(self, session_id: str, user_id: str, score: Optional[float] = None, max_score: Optional[float] = None) -> StudySession:
@@ -107,7 +138,7 @@ class SessionService:
             session.duration = int(duration.total_seconds() / 60)  # Convert to minutes
         
         self.db.commit()
-        self.db.refresh(session)
+        _forget_session_stats(user_id)
         
         return session
     
@@ -119,6 +150,7 @@ class SessionService:
         
         self.db.delete(session)
         self.db.commit()
+        _forget_session_stats(user_id)
         
         return True
     
@@ -129,61 +161,79 @@ class SessionService:
         if subject_id:
             query = query.filter(StudySession.subject_id == subject_id)
         
-        sessions = query.all()
+        totals = self._session_totals(query, user_id, subject_id)
+        
+        # Get recent sessions (last 10)
+        recent_sessions = query.order_by(desc(StudySession.started_at)).limit(10).all()
         
-        total_sessions = len(sessions)
-        total_time = sum(session.duration for session in sessions if session.duration)
+        return {**totals, "recent_sessions": recent_sessions}
+    
+    def _session_totals(self, query: Query, user_id: str, subject_id: Optional[str]) -> Dict[str, Any]:
+        """Session totals, cached briefly and dropped on session writes"""
+        with _SESSION_TOTALS_LOCK:
+            totals = _SESSION_TOTALS.get(str(user_id), {}).get(subject_id)
+        if totals is not None:
+            return totals
+        
+        # One GROUP BY type row carries every total; completed sessions count only when scored
+        scored = and_(StudySession.is_completed, StudySession.score.isnot(None))
+        by_type = query.with_entities(
+            StudySession.type,
+            func.count(StudySession.id).label("sessions"),
+            func.coalesce(func.sum(StudySession.duration), 0).label("time"),
+            func.sum(case((scored, 1), else_=0)).label("scored"),
+            func.sum(case((scored, StudySession.score), else_=0)).label("score")
+        ).group_by(StudySession.type).all()
+        
+        sessions_by_type = {row.type: row.sessions for row in by_type}
+        total_sessions = sum(row.sessions for row in by_type)
+        total_time = sum(row.time for row in by_type)
         
         # Calculate average score
-        completed_sessions = [s for s in sessions if s.is_completed and s.score is not None]
+        completed_sessions = sum(row.scored for row in by_type)
         average_score = 0
         if completed_sessions:
-            total_score = sum(s.score for s in completed_sessions)
-            average_score = total_score / len(completed_sessions)
+            average_score = sum(row.score for row in by_type) / completed_sessions
         
         # Calculate completion rate
-        completion_rate = (len(completed_sessions) / total_sessions * 100) if total_sessions > 0 else 0
-        
-        # Group by type
-        sessions_by_type = {}
-        for session in sessions:
-            sessions_by_type[session.type] = sessions_by_type.get(session.type, 0) + 1
-        
-        # Get recent sessions (last 10)
-        recent_sessions = sessions[:10]
+        completion_rate = (completed_sessions / total_sessions * 100) if total_sessions > 0 else 0
         
-        return {
+        totals = {
             "total_sessions": total_sessions,
             "total_time": total_time,
             "average_score": average_score,
             "completion_rate": completion_rate,
-            "sessions_by_type": sessions_by_type,
-            "recent_sessions": recent_sessions
+            "sessions_by_type": sessions_by_type
         }
+        with _SESSION_TOTALS_LOCK:
+            _SESSION_TOTALS.setdefault(str(user_id), {})[subject_id] = totals
+        return totals
     
     def get_study_streak(self, user_id: str) -> int:
         """Calculate study streak in days"""
-        # Get all completed sessions
-        sessions = self.db.query(StudySession).filter(
+        # One row per study day instead of every completed session
+        study_day = func.date(StudySession.completed_at, type_=Date).label("study_day")
+        days = self.db.query(study_day).filter(
             StudySession.user_id == user_id,
-            StudySession.is_completed == True
-        ).order_by(desc(StudySession.completed_at)).all()
+            StudySession.is_completed == True,
+            StudySession.completed_at.isnot(None)
+        ).distinct().order_by(desc(study_day)).all()
         
-        if not sessions:
+        if not days:
             return 0
         
-        # Calculate streak
+        # Count consecutive days back from today; a streak not yet extended today still counts
         streak = 0
-        current_date = datetime.utcnow().date()
-        
-        for session in sessions:
-            session_date = session.completed_at.date()
-            days_diff = (current_date - session_date).days
-            
-            if days_diff == streak:
-                streak += 1
-                current_date = session_date
-            elif days_diff > streak + 1:
+        expected = datetime.utcnow().date()
+        if days[0].study_day == expected - timedelta(days=1):
+            expected = days[0].study_day
+        
+        for (day,) in days:
+            if day > expected:
+                continue
+            if day < expected:
                 break
+            streak += 1
+            expected -= timedelta(days=1)
         
         return streak
@@ -2,44 +2,79 @@
 Storage service for file management
 """
 
+import shutil
+from functools import lru_cache
 import boto3
-from typing import Optional
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from typing import BinaryIO, Optional
 from fastapi import HTTPException, status
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from app.core.config import settings
 from app.core.exceptions import CloudServiceError
 
+# Files above 8 MB go up as parallel multipart chunks
+_S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8
+)
+
+_CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'mp4': 'video/mp4',
+    'avi': 'video/x-msvideo',
+    'mov': 'video/quicktime',
+    'txt': 'text/plain',
+    'doc': 'application/msword',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+}
+
+
+@lru_cache(maxsize=1)
+def _s3_client():
+    """One boto3 client, and its connection pool, shared by every StorageService"""
+    if not (settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY):
+        return None
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_REGION,
+        config=Config(max_pool_connections=50, retries={"max_attempts": 3, "mode": "adaptive"})
+    )
+
 
 class StorageService:
     """Storage service for file management"""
     
     def __init__(self):
-        self.s3_client = None
-        if settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY:
-            self.s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_REGION
-            )
+        self.s3_client = _s3_client()
     
-    def upload_file(self, file_content: bytes, filename: str) -> str:
-        """Upload file to storage"""
+    def upload_file(self, file_obj: BinaryIO, filename: str) -> str:
+        """Upload file to storage, streaming it from the file object"""
         if not self.s3_client or not settings.S3_BUCKET_NAME:
             # Fallback to local storage for development
-            return self._upload_local(file_content, filename)
+            return self._upload_local(file_obj, filename)
         
         try:
             key = f"uploads/{filename}"
-            self.s3_client.put_object(
-                Bucket=settings.S3_BUCKET_NAME,
-                Key=key,
-                Body=file_content,
-                ContentType=self._get_content_type(filename)
+            # Read and sent in multipart chunks, never held in memory whole
+            self.s3_client.upload_fileobj(
+                file_obj,
+                settings.S3_BUCKET_NAME,
+                key,
+                ExtraArgs={"ContentType": self._get_content_type(filename)},
+                Config=_S3_TRANSFER_CONFIG
             )
             return f"s3://{settings.S3_BUCKET_NAME}/{key}"
-        except ClientError as e:
+        except (ClientError, S3UploadFailedError) as e:
             raise CloudServiceError("S3", str(e))
     
     def download_file(self, url: str) -> bytes:
@@ -56,14 +91,14 @@ class StorageService:
         else:
             return self._delete_local(url)
     
-    def _upload_local(self, file_content: bytes, filename: str) -> str:
+    def _upload_local(self, file_obj: BinaryIO, filename: str) -> str:
         """Upload file to local storage"""
         import os
         os.makedirs("uploads", exist_ok=True)
         
         file_path = f"uploads/{filename}"
         with open(file_path, "wb") as f:
-            f.write(file_content)
+            shutil.copyfileobj(file_obj, f, 1024 * 1024)
         
         return file_path
     
@@ -111,18 +146,11 @@ class StorageService:
     
     def _get_content_type(self, filename: str) -> str:
         """Get content type based on filename"""
-        extension = filename.split('.')[-1].lower()
-        content_types = {
-            'pdf': 'application/pdf',
-            'jpg': 'image/jpeg',
-            'jpeg': 'image/jpeg',
-            'png': 'image/png',
-            'gif': 'image/gif',
-            'mp4': 'video/mp4',
-            'avi': 'video/x-msvideo',
-            'mov': 'video/quicktime',
-            'txt': 'text/plain',
-            'doc': 'application/msword',
-            'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        }
-        return content_types.get(extension, 'application/octet-stream')
+        extension = filename.rpartition('.')[2].lower()
+        return _CONTENT_TYPES.get(extension, 'application/octet-stream')
+
+
+@lru_cache(maxsize=1)
+def get_storage_service() -> StorageService:
+    """Shared StorageService for requests and Celery tasks"""
+    return StorageService()
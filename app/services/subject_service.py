@@ -4,9 +4,12 @@ Subject service
 
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_, select, update
 
 from app.models.subject import Subject
+from app.models.session import StudySession
+from app.models.upload import Upload
+from app.models.concept_map import ConceptMap
 from app.schemas.subject import SubjectCreate, SubjectUpdate, SubjectStats
 from app.core.exceptions import NotFoundError, ValidationError
 
@@ -30,7 +33,6 @@ class SubjectService:
         
         self.db.add(subject)
         self.db.commit()
-        self.db.refresh(subject)
         
         return subject
     
@@ -47,17 +49,21 @@ class SubjectService:
     
     def update_subject(self, subject_id: str, user_id: str, subject_data: SubjectUpdate) -> Subject:
         """Update a subject"""
-        subject = self.get_subject(subject_id, user_id)
+        values = subject_data.model_dump(exclude_unset=True)
+        if not values:
+            subject = self.get_subject(subject_id, user_id)
+        else:
+            subject = self.db.scalars(
+                update(Subject)
+                .where(Subject.id == subject_id, Subject.user_id == user_id)
+                .values(**values)
+                .returning(Subject)
+            ).first()
+            self.db.commit()
+        
         if not subject:
             raise NotFoundError("Subject", subject_id)
         
-        # Update fields
-        for field, value in subject_data.dict(exclude_unset=True).items():
-            setattr(subject, field, value)
-        
-        self.db.commit()
-        self.db.refresh(subject)
-        
         return subject
     
     def delete_subject(self, subject_id: str, user_id: str) -> bool:
@@ -73,17 +79,26 @@ class SubjectService:
     
     def get_subject_stats(self, subject_id: str, user_id: str) -> SubjectStats:
         """Get subject statistics"""
-        subject = self.get_subject(subject_id, user_id)
-        if not subject:
+        # Counts come back with the subject row; the collections are never loaded
+        row = self.db.query(
+            Subject,
+            select(func.count(Upload.id)).where(Upload.subject_id == Subject.id).scalar_subquery(),
+            select(func.count(ConceptMap.id)).where(ConceptMap.subject_id == Subject.id).scalar_subquery(),
+            select(func.count(StudySession.id)).where(
+                StudySession.subject_id == Subject.id,
+                StudySession.is_completed == True
+            ).scalar_subquery()
+        ).filter(
+            Subject.id == subject_id,
+            Subject.user_id == user_id
+        ).first()
+        if not row:
             raise NotFoundError("Subject", subject_id)
         
-        # Calculate additional stats
-        total_uploads = len(subject.uploads) if subject.uploads else 0
-        total_concept_maps = len(subject.concept_maps) if subject.concept_maps else 0
+        subject, total_uploads, total_concept_maps, completed_sessions = row
         
         # Calculate completion rate (simplified)
         total_sessions = subject.total_quizzes + subject.total_exams
-        completed_sessions = sum(1 for session in subject.study_sessions if session.is_completed) if subject.study_sessions else 0
         completion_rate = (completed_sessions / total_sessions * 100) if total_sessions > 0 else 0.0
         
         return SubjectStats(
@@ -109,6 +124,48 @@ class SubjectService:
                 setattr(subject, field, value)
         
         self.db.commit()
-        self.db.refresh(subject)
         
         return subject
+    
+    def refresh_subject_stats(self, subject_id: Optional[str] = None) -> int:
+        """Recompute subject roll-up statistics from completed study sessions"""
+        def completed_sessions(*columns):
+            return select(*columns).where(
+                StudySession.subject_id == Subject.id,
+                StudySession.is_completed == True
+            )
+        
+        rollups = {
+            Subject.total_quizzes: completed_sessions(func.count()).where(
+                StudySession.type == "quiz"
+            ).scalar_subquery(),
+            Subject.total_exams: completed_sessions(func.count()).where(
+                StudySession.type == "exam"
+            ).scalar_subquery(),
+            Subject.average_score: func.coalesce(
+                completed_sessions(func.avg(StudySession.score)).scalar_subquery(), 0.0
+            ),
+            Subject.scored_sessions: completed_sessions(func.count(StudySession.score)).scalar_subquery(),
+            Subject.study_time: func.coalesce(
+                completed_sessions(func.sum(StudySession.duration)).scalar_subquery(), 0
+            ),
+            Subject.last_activity: completed_sessions(
+                func.max(StudySession.completed_at)
+            ).scalar_subquery(),
+        }
+        
+        # Only touch subjects whose stored roll-ups drifted, and keep their updated_at
+        query = self.db.query(Subject).filter(
+            or_(*(column.is_distinct_from(value) for column, value in rollups.items()))
+        )
+        if subject_id:
+            query = query.filter(Subject.id == subject_id)
+        
+        updated = query.update(
+            {**rollups, Subject.updated_at: Subject.updated_at},
+            synchronize_session=False
+        )
+        
+        self.db.commit()
+        
+        return updated
@@ -2,18 +2,62 @@
 Upload service
 """
 
+import asyncio
 import os
 import uuid
+from datetime import datetime
+from pathlib import PurePosixPath
 from typing import List, Optional, Dict, Any, BinaryIO
-from sqlalchemy.orm import Session
-from fastapi import UploadFile, HTTPException, status
+from sqlalchemy import Column, MetaData, Table, exists, inspect, select, text
+from sqlalchemy.orm import Session, joinedload
+from fastapi import BackgroundTasks, UploadFile, HTTPException, status
 
-from app.models.upload import Upload, FileMetadata
+from app.core.database import SessionLocal, safe_list
+from app.models.base import JSONType, UUIDType
+from app.models.upload import (
+    Upload,
+    UploadMetadata,
+    UploadKeyword,
+    SEARCH_CONFIG_SQL,
+    SEARCH_VECTOR_SQL
+)
 from app.schemas.upload import UploadCreate, UploadStatus, CloudFileImport
 from app.core.exceptions import NotFoundError, FileProcessingError
 from app.core.config import settings
-from app.services.storage_service import StorageService
-from app.services.ai_service import AIService
+from app.services.storage_service import get_storage_service
+from app.services.ai_service import get_ai_service
+
+
+# The JSON column upload metadata lived in before upload_metadata/upload_keywords;
+# create_all never drops it, so existing databases still hold the old blobs
+_LEGACY_UPLOADS = Table(
+    "uploads",
+    MetaData(),
+    Column("id", UUIDType, primary_key=True),
+    Column("file_metadata", JSONType)
+)
+
+
+def _file_size(file_obj: BinaryIO) -> int:
+    """Length of a seekable file, leaving it positioned at the start"""
+    size = file_obj.seek(0, os.SEEK_END)
+    file_obj.seek(0)
+    return size
+
+
+def _read_from_start(file_obj: BinaryIO) -> bytes:
+    """Read a seekable file from the beginning"""
+    file_obj.seek(0)
+    return file_obj.read()
+
+
+async def _process_in_background(upload_id: str, file_obj: BinaryIO) -> None:
+    """Process a new upload once its response is sent, on a session of its own"""
+    db = SessionLocal()
+    try:
+        await UploadService(db)._process_file_async(upload_id, file_obj)
+    finally:
+        db.close()
 
 
 class UploadService:
@@ -21,30 +65,29 @@ class UploadService:
     
     def __init__(self, db: Session):
         self.db = db
-        self.storage_service = StorageService()
-        self.ai_service = AIService()
+        self.storage_service = get_storage_service()
+        self.ai_service = get_ai_service()
     
-    def create_upload(self, user_id: str, upload_data: UploadCreate, file: UploadFile) -> Upload:
+    async def create_upload(self, user_id: str, upload_data: UploadCreate, file: UploadFile,
+                            background_tasks: BackgroundTasks) -> Upload:
         """Create a new upload"""
         # Validate file type
-        file_extension = file.filename.split('.')[-1].lower() if file.filename else ''
-        if file_extension not in settings.ALLOWED_FILE_TYPES:
+        # An extensionless name yields '' rather than the whole filename
+        file_extension = PurePosixPath(file.filename or "").suffix.lstrip(".").lower()
+        if file_extension not in settings.ALLOWED_FILE_TYPES_SET:
             raise FileProcessingError(f"File type {file_extension} not allowed")
         
-        # Validate file size
-        file_content = file.file.read()
-        if len(file_content) > settings.MAX_FILE_SIZE:
+        # Validate file size from the spooled file's length, without reading it
+        size = _file_size(file.file)
+        if size > settings.MAX_FILE_SIZE:
             raise FileProcessingError(f"File size exceeds maximum allowed size")
         
-        # Reset file pointer
-        file.file.seek(0)
-        
         # Generate unique filename
         file_id = str(uuid.uuid4())
         filename = f"{file_id}.{file_extension}"
         
-        # Upload to storage
-        url = self.storage_service.upload_file(file_content, filename)
+        # Upload to storage, streamed from the spooled file in chunks
+        url = await asyncio.to_thread(self.storage_service.upload_file, file.file, filename)
         
         # Create upload record
         upload = Upload(
@@ -52,27 +95,50 @@ class UploadService:
             subject_id=upload_data.subject_id,
             name=upload_data.name,
             type=upload_data.type.value,
-            size=len(file_content),
+            size=size,
             url=url,
             status=UploadStatus.PROCESSING.value
         )
         
         self.db.add(upload)
         self.db.commit()
-        self.db.refresh(upload)
         
-        # Start background processing
-        self._process_file_async(upload.id)
+        # Process after the response is sent; clients poll the upload status.
+        # The spooled copy is read rather than downloading the file back.
+        background_tasks.add_task(_process_in_background, upload.id, file.file)
         
         return upload
     
-    def get_uploads(self, user_id: str, subject_id: Optional[str] = None) -> List[Upload]:
-        """Get all uploads for a user"""
-        query = self.db.query(Upload).filter(Upload.user_id == user_id)
+    def get_uploads(self, user_id: str, subject_id: Optional[str] = None,
+                    keyword: Optional[str] = None,
+                    search: Optional[str] = None) -> List[Upload]:
+        """Get all uploads for a user, optionally by keyword or full-text search"""
+        query = safe_list(
+            self.db.query(Upload),
+            joinedload(Upload.file_metadata).selectinload(UploadMetadata.keyword_rows)
+        ).filter(Upload.user_id == user_id)
         
         if subject_id:
             query = query.filter(Upload.subject_id == subject_id)
         
+        if keyword:
+            query = query.filter(
+                Upload.id.in_(
+                    self.db.query(UploadKeyword.upload_id).filter(UploadKeyword.keyword == keyword)
+                )
+            )
+        
+        if search:
+            matches = self.db.query(UploadMetadata.upload_id)
+            if self.db.get_bind().dialect.name == "postgresql":
+                matches = matches.filter(
+                    text(f"{SEARCH_VECTOR_SQL} @@ plainto_tsquery({SEARCH_CONFIG_SQL}, :search)")
+                    .bindparams(search=search)
+                )
+            else:
+                matches = matches.filter(UploadMetadata.extracted_text.ilike(f"%{search}%"))
+            query = query.filter(Upload.id.in_(matches))
+        
         return query.all()
     
     def get_upload(self, upload_id: str, user_id: str) -> Optional[Upload]:
@@ -82,14 +148,14 @@ class UploadService:
             Upload.user_id == user_id
         ).first()
     
-    def delete_upload(self, upload_id: str, user_id: str) -> bool:
+    async def delete_upload(self, upload_id: str, user_id: str) -> bool:
         """Delete an upload"""
         upload = self.get_upload(upload_id, user_id)
         if not upload:
             return False
         
         # Delete from storage
-        self.storage_service.delete_file(upload.url)
+        await asyncio.to_thread(self.storage_service.delete_file, upload.url)
         
         # Delete from database
         self.db.delete(upload)
@@ -99,16 +165,27 @@ class UploadService:
     
     def get_upload_status(self, upload_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get upload processing status"""
-        upload = self.get_upload(upload_id, user_id)
-        if not upload:
+        # Polled while processing: read the status columns and metadata in one
+        # statement, without loading the full upload and its subject
+        row = self.db.query(
+            Upload.id,
+            Upload.status,
+            Upload.processing_error,
+            Upload.processed_at,
+            UploadMetadata
+        ).outerjoin(Upload.file_metadata).filter(
+            Upload.id == upload_id,
+            Upload.user_id == user_id
+        ).first()
+        if not row:
             return None
         
         return {
-            "id": str(upload.id),
-            "status": upload.status,
-            "processing_error": upload.processing_error,
-            "processed_at": upload.processed_at,
-            "metadata": upload.metadata
+            "id": str(row.id),
+            "status": row.status,
+            "processing_error": row.processing_error,
+            "processed_at": row.processed_at,
+            "metadata": row.UploadMetadata
         }
     
     async def process_upload(self, upload_id: str, user_id: str, force_reprocess: bool = False) -> bool:
@@ -126,7 +203,7 @@ class UploadService:
             self.db.commit()
             
             # Process the file
-            self._process_file_async(upload.id)
+            await self._process_file_async(upload.id)
             
             return True
         except Exception as e:
@@ -137,21 +214,25 @@ class UploadService:
             
             return False
     
-    def _process_file_async(self, upload_id: str) -> None:
-        """Process file asynchronously"""
-        upload = self.db.query(Upload).filter(Upload.id == upload_id).first()
+    async def _process_file_async(self, upload_id: str, file_obj: Optional[BinaryIO] = None) -> None:
+        """Process file without blocking the event loop"""
+        # An identity-map hit when the caller has just loaded the upload
+        upload = self.db.get(Upload, upload_id)
         if not upload:
             return
         
         try:
-            # Download file content
-            file_content = self.storage_service.download_file(upload.url)
+            # Read the caller's copy when given one, otherwise fetch it from storage
+            if file_obj is not None and not file_obj.closed:
+                file_content = await asyncio.to_thread(_read_from_start, file_obj)
+            else:
+                file_content = await asyncio.to_thread(self.storage_service.download_file, upload.url)
             
-            # Process based on file type
-            metadata = self._extract_metadata(file_content, upload.type)
+            # Process based on file type (PyPDF2, tesseract and PIL are all blocking)
+            metadata = await asyncio.to_thread(self.ai_service.extract_metadata, file_content, upload.type)
             
             # Update upload with metadata
-            upload.file_metadata = metadata
+            upload.file_metadata = UploadMetadata.from_dict(metadata)
             upload.status = UploadStatus.COMPLETED.value
             upload.processed_at = datetime.utcnow()
             self.db.commit()
@@ -161,52 +242,6 @@ class UploadService:
             upload.processing_error = str(e)
             self.db.commit()
     
-    def _extract_metadata(self, file_content: bytes, file_type: str) -> Dict[str, Any]:
-        """Extract metadata from file content"""
-        metadata = {
-            "keywords": [],
-            "language": "it"
-        }
-        
-        try:
-            if file_type == "pdf":
-                # Extract text from PDF
-                text = self.ai_service.extract_pdf_text(file_content)
-                metadata["extracted_text"] = text
-                metadata["pages"] = self.ai_service.count_pdf_pages(file_content)
-                
-            elif file_type in ["image"]:
-                # Extract text from image using OCR
-                text = self.ai_service.extract_image_text(file_content)
-                metadata["extracted_text"] = text
-                metadata["dimensions"] = self.ai_service.get_image_dimensions(file_content)
-                
-            elif file_type == "video":
-                # Extract audio and convert to text
-                text = self.ai_service.extract_video_text(file_content)
-                metadata["extracted_text"] = text
-                metadata["duration"] = self.ai_service.get_video_duration(file_content)
-                
-            elif file_type == "text":
-                # Process text content
-                text = file_content.decode('utf-8')
-                metadata["extracted_text"] = text
-            
-            # Generate summary and keywords
-            if metadata.get("extracted_text"):
-                summary = self.ai_service.generate_summary(metadata["extracted_text"])
-                keywords = self.ai_service.extract_keywords(metadata["extracted_text"])
-                
-                metadata["summary"] = summary
-                metadata["keywords"] = keywords
-                metadata["language"] = self.ai_service.detect_language(metadata["extracted_text"])
-        
-        except Exception as e:
-            # If metadata extraction fails, still mark as completed
-            pass
-        
-        return metadata
-    
     def import_cloud_file(self, user_id: str, import_data: CloudFileImport) -> Upload:
         """Import file from cloud service"""
         # This would integrate with cloud services
@@ -225,6 +260,28 @@ class UploadService:
         
         self.db.add(upload)
         self.db.commit()
-        self.db.refresh(upload)
         
         return upload
+    
+    def backfill_legacy_metadata(self, batch_size: int = 500) -> int:
+        """Copy metadata from the legacy uploads.file_metadata column into upload_metadata"""
+        columns = {column["name"] for column in inspect(self.db.get_bind()).get_columns("uploads")}
+        if "file_metadata" not in columns:
+            return 0
+        
+        # Uploads that already have a metadata row are skipped, so reruns are safe
+        pending = select(_LEGACY_UPLOADS.c.id, _LEGACY_UPLOADS.c.file_metadata).where(
+            _LEGACY_UPLOADS.c.file_metadata.isnot(None),
+            ~exists().where(UploadMetadata.upload_id == _LEGACY_UPLOADS.c.id)
+        ).limit(batch_size)
+        
+        copied = 0
+        while rows := self.db.execute(pending).all():
+            for upload_id, data in rows:
+                metadata = UploadMetadata.from_dict(data)
+                metadata.upload_id = upload_id
+                self.db.add(metadata)
+            self.db.commit()
+            copied += len(rows)
+        
+        return copied
@@ -2,16 +2,29 @@
 AI processing background tasks
 """
 
+import uuid
+from typing import List
 from celery import current_task
-from app.core.celery import celery
-from app.core.database import SessionLocal
-from app.services.ai_service import AIService
+from sqlalchemy import insert
+from app.core.celery import DBTask, celery
+from app.models.upload import Upload, UploadMetadata
+from app.services.ai_service import get_ai_service
 
 
-@celery.task(bind=True)
-def generate_quiz_async(self, quiz_id: str, content: str, difficulty: str, num_questions: int):
+def _source_content(db, upload_ids: List[str], user_id) -> str:
+    """Join the extracted text of the user's source uploads"""
+    # Tasks carry upload ids, not document text, so broker messages stay small
+    texts = db.query(UploadMetadata.extracted_text).join(Upload).filter(
+        Upload.id.in_(upload_ids),
+        Upload.user_id == user_id
+    ).all()
+    return "\n".join(text for (text,) in texts if text)
+
+
+@celery.task(base=DBTask, bind=True)
+def generate_quiz_async(self, quiz_id: str, source_upload_ids: List[str], difficulty: str, num_questions: int):
     """Generate quiz questions asynchronously"""
-    db = SessionLocal()
+    db = self.db
     try:
         from app.models.quiz import Quiz, QuizQuestion
         
@@ -19,29 +32,36 @@ def generate_quiz_async(self, quiz_id: str, content: str, difficulty: str, num_q
         if not quiz:
             return {"status": "error", "message": "Quiz not found"}
         
+        content = _source_content(db, source_upload_ids, quiz.user_id)
+        if not content:
+            return {"status": "error", "message": "No content available for quiz generation"}
+        
         # Update task progress
         current_task.update_state(state="PROGRESS", meta={"status": "Generating questions..."})
         
         # Initialize AI service
-        ai_service = AIService()
+        ai_service = get_ai_service()
         
         # Generate questions using AI
         ai_questions = ai_service.generate_quiz_questions(content, difficulty, num_questions)
         
-        # Create questions
-        for ai_question in ai_questions:
-            question = QuizQuestion(
-                quiz_id=quiz.id,
-                type=ai_question["type"],
-                question=ai_question["question"],
-                options=ai_question["options"],
-                correct_answer=ai_question["correct_answer"],
-                explanation=ai_question["explanation"],
-                difficulty=ai_question["difficulty"],
-                points=ai_question.get("points", 1),
-                ai_generated=True
-            )
-            db.add(question)
+        # Create questions in one batched INSERT
+        question_rows = [
+            {
+                "quiz_id": quiz.id,
+                "type": ai_question.type,
+                "question": ai_question.question,
+                "options": ai_question.options,
+                "correct_answer": ai_question.correct_answer,
+                "explanation": ai_question.explanation,
+                "difficulty": ai_question.difficulty,
+                "points": ai_question.points,
+                "ai_generated": True
+            }
+            for ai_question in ai_questions
+        ]
+        if question_rows:
+            db.execute(insert(QuizQuestion), question_rows)
         
         db.commit()
         
@@ -49,15 +69,12 @@ def generate_quiz_async(self, quiz_id: str, content: str, difficulty: str, num_q
     
     except Exception as e:
         return {"status": "error", "message": str(e)}
-    
-    finally:
-        db.close()
 
 
-@celery.task(bind=True)
-def generate_concept_map_async(self, concept_map_id: str, content: str):
+@celery.task(base=DBTask, bind=True)
+def generate_concept_map_async(self, concept_map_id: str, source_upload_ids: List[str]):
     """Generate concept map asynchronously"""
-    db = SessionLocal()
+    db = self.db
     try:
         from app.models.concept_map import ConceptMap, ConceptNode, ConceptConnection
         
@@ -65,48 +82,59 @@ def generate_concept_map_async(self, concept_map_id: str, content: str):
         if not concept_map:
             return {"status": "error", "message": "Concept map not found"}
         
+        content = _source_content(db, source_upload_ids, concept_map.user_id)
+        if not content:
+            return {"status": "error", "message": "No content available for concept map generation"}
+        
         # Update task progress
         current_task.update_state(state="PROGRESS", meta={"status": "Generating concept map..."})
         
         # Initialize AI service
-        ai_service = AIService()
+        ai_service = get_ai_service()
         
         # Generate concept map using AI
         ai_concept_map = ai_service.generate_concept_map(content)
         
-        # Create nodes
+        # Create nodes (IDs assigned up front so connections need no flush)
         node_id_mapping = {}
-        for i, ai_node in enumerate(ai_concept_map.get("nodes", [])):
-            node = ConceptNode(
-                concept_map_id=concept_map.id,
-                label=ai_node["label"],
-                x=ai_node.get("x", i * 100),
-                y=ai_node.get("y", i * 100),
-                type=ai_node.get("type", "main"),
-                color=ai_node.get("color", "#3B82F6"),
-                description=ai_node.get("description", ""),
-                examples=ai_node.get("examples", []),
-                ai_generated=True
-            )
-            db.add(node)
-            db.flush()  # Get the ID
-            node_id_mapping[ai_node["id"]] = str(node.id)
+        node_rows = []
+        for i, ai_node in enumerate(ai_concept_map.nodes):
+            node_id = str(uuid.uuid4())
+            node_id_mapping[ai_node.id] = node_id
+            node_rows.append({
+                "id": node_id,
+                "concept_map_id": concept_map.id,
+                "label": ai_node.label,
+                "x": ai_node.x if ai_node.x is not None else i * 100,
+                "y": ai_node.y if ai_node.y is not None else i * 100,
+                "type": ai_node.type,
+                "color": ai_node.color,
+                "description": ai_node.description,
+                "examples": ai_node.examples,
+                "ai_generated": True
+            })
         
         # Create connections
-        for ai_connection in ai_concept_map.get("connections", []):
-            from_node_id = node_id_mapping.get(ai_connection["from"])
-            to_node_id = node_id_mapping.get(ai_connection["to"])
+        connection_rows = []
+        for ai_connection in ai_concept_map.connections:
+            from_node_id = node_id_mapping.get(ai_connection.from_node)
+            to_node_id = node_id_mapping.get(ai_connection.to_node)
             
             if from_node_id and to_node_id:
-                connection = ConceptConnection(
-                    concept_map_id=concept_map.id,
-                    from_node_id=from_node_id,
-                    to_node_id=to_node_id,
-                    label=ai_connection.get("label", ""),
-                    type=ai_connection.get("type", "direct"),
-                    strength=ai_connection.get("strength", 1.0)
-                )
-                db.add(connection)
+                connection_rows.append({
+                    "concept_map_id": concept_map.id,
+                    "from_node_id": from_node_id,
+                    "to_node_id": to_node_id,
+                    "label": ai_connection.label,
+                    "type": ai_connection.type,
+                    "strength": ai_connection.strength
+                })
+        
+        # One executemany per table instead of a flush per node
+        if node_rows:
+            db.execute(insert(ConceptNode), node_rows)
+        if connection_rows:
+            db.execute(insert(ConceptConnection), connection_rows)
         
         db.commit()
         
@@ -114,15 +142,12 @@ def generate_concept_map_async(self, concept_map_id: str, content: str):
     
     except Exception as e:
         return {"status": "error", "message": str(e)}
-    
-    finally:
-        db.close()
 
 
 @celery.task
 def analyze_content_difficulty(content: str):
     """Analyze content difficulty level"""
-    ai_service = AIService()
+    ai_service = get_ai_service()
     
     try:
         # This would implement difficulty analysis
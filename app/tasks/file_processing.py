@@ -2,18 +2,24 @@
 File processing background tasks
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List
 from celery import current_task
-from app.core.celery import celery
-from app.core.database import SessionLocal
-from app.models.upload import Upload
-from app.services.ai_service import AIService
-from app.services.storage_service import StorageService
+from app.core.celery import DBTask, celery
+from app.models.upload import Upload, UploadMetadata
+from app.services.ai_service import get_ai_service
+from app.services.storage_service import get_storage_service
+from app.services.upload_service import UploadService
 
+# Tesseract runs as a subprocess per image, so threads overlap the OCR work
+_OCR_BATCH_WORKERS = 4
 
-@celery.task(bind=True)
+
+@celery.task(base=DBTask, bind=True)
 def process_upload_file(self, upload_id: str):
     """Process uploaded file asynchronously"""
-    db = SessionLocal()
+    db = self.db
     try:
         upload = db.query(Upload).filter(Upload.id == upload_id).first()
         if not upload:
@@ -23,17 +29,17 @@ def process_upload_file(self, upload_id: str):
         current_task.update_state(state="PROGRESS", meta={"status": "Processing file..."})
         
         # Initialize services
-        storage_service = StorageService()
-        ai_service = AIService()
+        storage_service = get_storage_service()
+        ai_service = get_ai_service()
         
         # Download file content
         file_content = storage_service.download_file(upload.url)
         
         # Process based on file type
-        metadata = extract_file_metadata(file_content, upload.type, ai_service)
+        metadata = ai_service.extract_metadata(file_content, upload.type)
         
         # Update upload with metadata
-        upload.file_metadata = metadata
+        upload.file_metadata = UploadMetadata.from_dict(metadata)
         upload.status = "completed"
         upload.processed_at = datetime.utcnow()
         db.commit()
@@ -48,56 +54,54 @@ def process_upload_file(self, upload_id: str):
             db.commit()
         
         return {"status": "error", "message": str(e)}
-    
-    finally:
-        db.close()
 
 
-def extract_file_metadata(file_content: bytes, file_type: str, ai_service: AIService) -> dict:
-    """Extract metadata from file content"""
-    metadata = {
-        "keywords": [],
-        "language": "it"
-    }
-    
+@celery.task(base=DBTask, bind=True)
+def process_image_batch(self, upload_ids: List[str]):
+    """Process several image uploads in one task, running their OCR concurrently"""
+    db = self.db
     try:
-            if file_type == "pdf":
-                # Extract text from PDF
-                text = ai_service.extract_pdf_text(file_content)
-                metadata["extracted_text"] = text
-                metadata["pages"] = ai_service.count_pdf_pages(file_content)
-                
-            elif file_type in ["image"]:
-                # Extract text from image using OCR
-                text = ai_service.extract_image_text(file_content)
-                metadata["extracted_text"] = text
-                metadata["dimensions"] = ai_service.get_image_dimensions(file_content)
-                
-            elif file_type == "video":
-                # Extract audio and convert to text
-                text = ai_service.extract_video_text(file_content)
-                metadata["extracted_text"] = text
-                metadata["duration"] = ai_service.get_video_duration(file_content)
-            
-        elif file_type == "text":
-            # Process text content
-            text = file_content.decode('utf-8')
-            metadata["extracted_text"] = text
+        uploads = db.query(Upload).filter(Upload.id.in_(upload_ids), Upload.type == "image").all()
+        storage_service = get_storage_service()
+        ai_service = get_ai_service()
+        
+        def extract(upload):
+            try:
+                file_content = storage_service.download_file(upload.url)
+                return ai_service.extract_metadata(file_content, upload.type), None
+            except Exception as e:
+                return None, str(e)
+        
+        with ThreadPoolExecutor(max_workers=_OCR_BATCH_WORKERS) as pool:
+            results = list(pool.map(extract, uploads))
+        
+        processed_at = datetime.utcnow()
+        for upload, (metadata, error) in zip(uploads, results):
+            if error is None:
+                upload.file_metadata = UploadMetadata.from_dict(metadata)
+                upload.status = "completed"
+                upload.processed_at = processed_at
+            else:
+                upload.status = "failed"
+                upload.processing_error = error
+        db.commit()
         
-            # Generate summary and keywords
-            if metadata.get("extracted_text"):
-                summary = ai_service.generate_summary(metadata["extracted_text"])
-                keywords = ai_service.extract_keywords(metadata["extracted_text"])
-                
-                metadata["summary"] = summary
-                metadata["keywords"] = keywords
-                metadata["language"] = ai_service.detect_language(metadata["extracted_text"])
+        return {"status": "success", "message": f"Processed {len(uploads)} images"}
     
     except Exception as e:
-        # If metadata extraction fails, still mark as completed
-        pass
+        return {"status": "error", "message": str(e)}
+
+
+@celery.task(base=DBTask, bind=True)
+def backfill_upload_metadata(self):
+    """One-off copy of pre-upload_metadata JSON blobs into the metadata tables"""
+    db = self.db
+    try:
+        copied = UploadService(db).backfill_legacy_metadata()
+        return {"status": "success", "message": f"Backfilled {copied} uploads"}
     
-    return metadata
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
 
 @celery.task
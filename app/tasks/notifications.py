@@ -2,15 +2,32 @@
 Notification background tasks
 """
 
+import orjson
 from celery import current_task
-from app.core.celery import celery
-from app.core.database import SessionLocal
+from app.core.celery import DBTask, celery
+from app.core.database import get_redis
 
+# Redis list drained by flush_email_queue, so one mail session serves many emails
+_EMAIL_QUEUE_KEY = "email_queue"
+_EMAIL_BATCH_SIZE = 200
 
-@celery.task
-def send_email_notification(user_id: str, subject: str, message: str):
+
+def enqueue_email(user_id: str, subject: str, message: str) -> None:
+    """Queue an email for the next flush, sending it directly without Redis"""
+    redis_client = get_redis()
+    if redis_client is None:
+        send_email_notification.delay(user_id, subject, message)
+        return
+    redis_client.rpush(
+        _EMAIL_QUEUE_KEY,
+        orjson.dumps({"user_id": user_id, "subject": subject, "message": message})
+    )
+
+
+@celery.task(base=DBTask, bind=True)
+def send_email_notification(self, user_id: str, subject: str, message: str):
     """Send email notification to user"""
-    db = SessionLocal()
+    db = self.db
     try:
         from app.models.user import User
         
@@ -26,15 +43,12 @@ def send_email_notification(user_id: str, subject: str, message: str):
     
     except Exception as e:
         return {"status": "error", "message": str(e)}
-    
-    finally:
-        db.close()
 
 
-@celery.task
-def send_processing_complete_notification(user_id: str, upload_id: str):
+@celery.task(base=DBTask, bind=True)
+def send_processing_complete_notification(self, user_id: str, upload_id: str):
     """Send notification when file processing is complete"""
-    db = SessionLocal()
+    db = self.db
     try:
         from app.models.user import User
         from app.models.upload import Upload
@@ -49,21 +63,18 @@ def send_processing_complete_notification(user_id: str, upload_id: str):
         message = f"Your file '{upload.name}' has been processed successfully."
         
         # Send notification
-        send_email_notification.delay(user_id, subject, message)
+        enqueue_email(user_id, subject, message)
         
         return {"status": "success", "message": "Notification sent"}
     
     except Exception as e:
         return {"status": "error", "message": str(e)}
-    
-    finally:
-        db.close()
 
 
-@celery.task
-def send_achievement_notification(user_id: str, achievement_id: str):
+@celery.task(base=DBTask, bind=True)
+def send_achievement_notification(self, user_id: str, achievement_id: str):
     """Send notification when user unlocks an achievement"""
-    db = SessionLocal()
+    db = self.db
     try:
         from app.models.user import User
         
@@ -75,21 +86,18 @@ def send_achievement_notification(user_id: str, achievement_id: str):
         message = f"Congratulations! You've unlocked a new achievement."
         
         # Send notification
-        send_email_notification.delay(user_id, subject, message)
+        enqueue_email(user_id, subject, message)
         
         return {"status": "success", "message": "Achievement notification sent"}
     
     except Exception as e:
         return {"status": "error", "message": str(e)}
-    
-    finally:
-        db.close()
 
 
-@celery.task
-def send_goal_reminder(user_id: str, goal_id: str):
+@celery.task(base=DBTask, bind=True)
+def send_goal_reminder(self, user_id: str, goal_id: str):
     """Send reminder for user goals"""
-    db = SessionLocal()
+    db = self.db
     try:
         from app.models.user import User
         from app.models.progress import Goal
@@ -104,12 +112,53 @@ def send_goal_reminder(user_id: str, goal_id: str):
         message = f"Don't forget about your goal: {goal.title}"
         
         # Send notification
-        send_email_notification.delay(user_id, subject, message)
+        enqueue_email(user_id, subject, message)
         
         return {"status": "success", "message": "Goal reminder sent"}
     
     except Exception as e:
         return {"status": "error", "message": str(e)}
+
+
+@celery.task(base=DBTask, bind=True)
+def flush_email_queue(self):
+    """Send up to a batch of queued emails over a single mail session"""
+    db = self.db
+    items = []
+    try:
+        from app.models.user import User
+        
+        redis_client = get_redis()
+        if redis_client is None:
+            return {"status": "success", "message": "No email queue"}
+        
+        # Claim the batch atomically so overlapping flushes never read the same entries
+        pipe = redis_client.pipeline()
+        pipe.lrange(_EMAIL_QUEUE_KEY, 0, _EMAIL_BATCH_SIZE - 1)
+        pipe.ltrim(_EMAIL_QUEUE_KEY, _EMAIL_BATCH_SIZE, -1)
+        items, _ = pipe.execute()
+        emails = [orjson.loads(item) for item in items]
+        if not emails:
+            return {"status": "success", "message": "No queued emails"}
+        
+        # One query for every recipient instead of one per email
+        addresses = dict(
+            db.query(User.id, User.email).filter(User.id.in_({email["user_id"] for email in emails}))
+        )
+        
+        # This would open one SMTP connection and send the whole batch over it
+        # For now, just log the notifications
+        sent = 0
+        for email in emails:
+            address = addresses.get(email["user_id"])
+            if address:
+                print(f"Sending email to {address}: {email['subject']}")
+                sent += 1
+        
+        return {"status": "success", "message": f"Sent {sent} emails"}
     
-    finally:
-        db.close()
+    except Exception as e:
+        # Put a claimed batch back at the head of the queue for the next flush
+        if items:
+            redis_client.lpush(_EMAIL_QUEUE_KEY, *reversed(items))
+        return {"status": "error", "message": str(e)}
@@ -0,0 +1,31 @@
+"""
+Statistics maintenance background tasks
+"""
+
+from app.core.celery import DBTask, celery
+from app.services.progress_service import ProgressService
+from app.services.subject_service import SubjectService
+
+
+@celery.task(base=DBTask, bind=True)
+def refresh_subject_stats(self):
+    """Recompute subject roll-ups from source rows to correct any drift"""
+    db = self.db
+    try:
+        updated = SubjectService(db).refresh_subject_stats()
+        return {"status": "success", "message": f"Refreshed {updated} subjects"}
+    
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+@celery.task(base=DBTask, bind=True)
+def refresh_progress_view(self):
+    """Refresh the user progress materialized view"""
+    db = self.db
+    try:
+        ProgressService(db).refresh_progress_view()
+        return {"status": "success", "message": "Progress view refreshed"}
+    
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
@@ -0,0 +1,64 @@
+"""
+Shared test database
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.user import User
+from app.models.subject import Subject
+from app.models import user, subject, upload, quiz, exam, concept_map, session, progress, grade  # noqa: F401 - register tables
+
+# Test database: in memory, one shared connection
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class QueryCounter:
+    """Count SQL statements emitted on the test engine"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+@contextmanager
+def count_queries():
+    """Count the statements emitted on the test engine inside the block"""
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+
+@pytest.fixture
+def db():
+    """Fresh tables with one user and one subject"""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+
+    user = User(email="student@example.com", name="Student")
+    db.add(user)
+    db.flush()
+
+    subject = Subject(name="Analisi", user_id=user.id)
+    db.add(subject)
+    db.commit()
+
+    yield db, user.id, subject.id
+
+    db.close()
+    Base.metadata.drop_all(bind=engine)
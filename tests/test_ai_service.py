@@ -0,0 +1,93 @@
+"""
+AI service tests
+"""
+
+from types import SimpleNamespace
+
+from app.schemas.concept_map import GeneratedConceptMap
+from app.services import ai_service
+from app.services.ai_service import QUIZ_QUESTIONS_PAYLOAD, AIService, _strip_json_fences
+
+
+def test_quiz_payload_accepts_fenced_json():
+    """Fenced AI replies validate in one pass"""
+    reply = '```json\n[{"type": "single", "question": "Q?", "options": ["a", "b"], "correct_answer": 1}]\n```'
+    questions = QUIZ_QUESTIONS_PAYLOAD.validate_json(_strip_json_fences(reply))
+    assert questions[0].correct_answer == 1
+    assert questions[0].points == 1
+
+
+def test_concept_map_payload_aliases():
+    """Connections use the from/to keys the prompt asks for"""
+    concept_map = GeneratedConceptMap.model_validate_json(
+        '{"nodes": [{"id": "1", "label": "A"}], "connections": [{"from": "1", "to": "2"}]}'
+    )
+    assert concept_map.connections[0].from_node == "1"
+    assert concept_map.nodes[0].x is None
+
+
+def test_simple_fallbacks_return_payloads():
+    """Fallbacks produce the same types as the AI path"""
+    service = AIService()
+    questions = service._generate_simple_quiz("Questa frase ha abbastanza parole per una domanda.", 1)
+    assert questions[0].type == "single"
+    assert isinstance(service._generate_simple_concept_map("fotosintesi clorofilla"), GeneratedConceptMap)
+
+
+def test_analyze_content_without_ai():
+    """Offline analysis fills summary, keywords and language together"""
+    analysis = AIService().analyze_content("La fotosintesi avviene nelle foglie. La fotosintesi produce ossigeno.")
+    assert analysis.summary.startswith("La fotosintesi")
+    assert analysis.keywords[0] == "fotosintesi"
+    assert analysis.language == "it"
+
+
+def test_extract_metadata_dispatches_on_type():
+    """Known types go through their extractor, unknown ones keep the defaults"""
+    service = AIService()
+    metadata = service.extract_metadata("La fotosintesi avviene nelle foglie.".encode(), "text")
+    assert metadata["extracted_text"].startswith("La fotosintesi")
+    assert metadata["keywords"][0] == "fotosintesi"
+    assert service.extract_metadata(b"", "link") == {"keywords": [], "language": "it"}
+
+
+def test_detect_language_matches_whole_words():
+    """Substrings such as 'il' in 'filosofia' no longer count"""
+    service = AIService()
+    assert service.detect_language("La filosofia di Kant e la critica della ragione") == "it"
+    assert service.detect_language("The philosophy of Kant is in the critique") == "en"
+
+
+class _FakeRedis(dict):
+    def setex(self, key, ttl, value):
+        self[key] = value
+
+
+def test_cached_chat_reuses_identical_requests(monkeypatch):
+    """Identical prompts hit OpenAI once"""
+    calls = []
+
+    def create(**request):
+        calls.append(request)
+        message = SimpleNamespace(content=" Riassunto ")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    redis_client = _FakeRedis()
+    monkeypatch.setattr(ai_service, "get_redis", lambda: redis_client)
+    monkeypatch.setattr(ai_service, "_openai", lambda: SimpleNamespace(ChatCompletion=SimpleNamespace(create=create)))
+
+    service = AIService()
+    request = {"model": "gpt-3.5-turbo", "messages": [{"role": "user", "content": "testo"}], "temperature": 0.7}
+    assert service._cached_chat(**request) == "Riassunto"
+    assert service._cached_chat(**request) == "Riassunto"
+    assert service._cached_chat(**{**request, "temperature": 0.3}) == "Riassunto"
+    assert len(calls) == 2
+
+
+def test_analyze_content_detects_language_locally(monkeypatch):
+    """The AI reply supplies summary and keywords; language comes from the text"""
+    monkeypatch.setattr(ai_service.settings, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(AIService, "_cached_chat", lambda self, **request: '{"summary": "Sintesi", "keywords": ["kant"]}')
+
+    analysis = AIService().analyze_content("The philosophy of Kant is in the critique")
+    assert (analysis.summary, analysis.keywords, analysis.language) == ("Sintesi", ["kant"], "en")
@@ -4,17 +4,11 @@ Authentication tests
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 from app.main import app
 from app.core.database import get_db, Base
 from app.core.config import settings
-
-# Test database
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+from tests.conftest import TestingSessionLocal, engine
 
 # Override database dependency
 def override_get_db():
@@ -130,3 +124,93 @@ def test_get_current_user(setup_database):
     data = response.json()
     assert data["email"] == "test2@example.com"
     assert data["name"] == "Test User 2"
+
+
+def test_refresh_token_reuses_verified_payload(setup_database, monkeypatch):
+    """Refreshing twice with one token decodes the JWT once"""
+    from app.services import auth_service
+
+    login_response = client.post(
+        "/api/v1/auth/login",
+        json={
+            "email": "test@example.com",
+            "password": "testpassword123"
+        }
+    )
+    refresh_token = login_response.json()["refresh_token"]
+    
+    calls = []
+    verify_token = auth_service.verify_token
+    monkeypatch.setattr(auth_service, "verify_token", lambda *args: calls.append(args) or verify_token(*args))
+    
+    for _ in range(2):
+        response = client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 200
+        assert response.json()["user"]["email"] == "test@example.com"
+    
+    assert len(calls) == 1
+
+
+def test_bcrypt_hashes_upgrade_to_argon2id():
+    """New hashes use Argon2id and legacy bcrypt hashes get a replacement"""
+    from passlib.context import CryptContext
+    from app.core.security import get_password_hash, verify_and_update_password
+
+    assert get_password_hash("testpassword123").startswith("$argon2id$")
+    
+    legacy_hash = CryptContext(schemes=["bcrypt"]).hash("testpassword123")
+    verified, new_hash = verify_and_update_password("testpassword123", legacy_hash)
+    assert verified
+    assert new_hash.startswith("$argon2id$")
+    assert verify_and_update_password("wrongpassword", legacy_hash) == (False, None)
+
+
+def test_login_records_last_login(setup_database):
+    """The atomic last-login update is reflected in the login response"""
+    response = client.post(
+        "/api/v1/auth/login",
+        json={
+            "email": "test@example.com",
+            "password": "testpassword123"
+        }
+    )
+    
+    assert response.status_code == 200
+    assert response.json()["user"]["last_login_at"] is not None
+
+
+def test_register_duplicate_email(setup_database):
+    """A second registration with the same email, in any case, is rejected"""
+    response = client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": "TEST@example.com",
+            "name": "Test User",
+            "password": "testpassword123"
+        }
+    )
+    
+    assert response.status_code == 400
+    assert "already exists" in response.json()["detail"]
+
+
+def test_oauth_login_links_and_creates_users(setup_database):
+    """OAuth logins link an existing email and upsert new users"""
+    import asyncio
+    from app.services.oauth_service import OAuthService
+
+    db = TestingSessionLocal()
+    try:
+        service = OAuthService(db)
+        linked = asyncio.run(service._find_or_create_oauth_user(
+            "google", "google-1", "Test@Example.com", "Test User", None, {"id": "google-1"}
+        ))
+        assert (linked.email, linked.google_id) == ("test@example.com", "google-1")
+        
+        created = asyncio.run(service._find_or_create_oauth_user(
+            "apple", "apple-1", "oauth@example.com", "OAuth User", None, {"sub": "apple-1"}
+        ))
+        assert created.apple_id == "apple-1"
+        assert created.hashed_password is None and created.is_verified
+    finally:
+        db.close()
@@ -0,0 +1,151 @@
+"""
+Grade model tests
+"""
+
+import pytest
+from datetime import date
+
+from app.core.config import settings
+from app.models.subject import Subject
+from app.models.grade import Grade
+from app.core.exceptions import NotFoundError
+from app.schemas.grade import GradeCreate, GradeResponse, GradeUpdate
+from app.services.grade_service import GradeService
+
+
+def _add_grade(db, user_id, subject_id, grade, max_grade=None):
+    row = Grade(
+        user_id=user_id,
+        subject_id=subject_id,
+        exam_name="Esame",
+        grade=grade,
+        max_grade=max_grade,
+        exam_date=date(2024, 6, 1),
+        academic_year="2023-2024"
+    )
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    return row
+
+
+def test_generated_columns(db):
+    """percentage and is_passed are computed by the database"""
+    session, user_id, subject_id = db
+
+    out_of_thirty = _add_grade(session, user_id, subject_id, 17)
+    assert out_of_thirty.percentage is None
+    assert out_of_thirty.is_passed is False
+
+    out_of_hundred = _add_grade(session, user_id, subject_id, 75, max_grade=100)
+    assert out_of_hundred.percentage == 75
+    assert out_of_hundred.is_passed is True
+
+
+def test_filter_grades_by_passed(db):
+    """Passed/failed filtering happens in SQL"""
+    session, user_id, subject_id = db
+    _add_grade(session, user_id, subject_id, 28)
+    _add_grade(session, user_id, subject_id, 12)
+
+    service = GradeService(session)
+    assert [g.grade for g in service.get_grades(user_id, is_passed=True)] == [28]
+    assert [g.grade for g in service.get_grades(user_id, is_passed=False)] == [12]
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_grade_response_from_orm(db, monkeypatch, fast):
+    """Fast and validated construction produce the same response"""
+    session, user_id, subject_id = db
+    row = _add_grade(session, user_id, subject_id, 28)
+    monkeypatch.setattr(settings, "FAST_RESPONSE_CONSTRUCTION", fast)
+
+    response = GradeResponse.from_orm_fast(row, subject_name="Analisi")
+    assert response.id == row.id
+    assert response.subject_name == "Analisi"
+    assert response.is_passed is True
+    assert response.model_dump()["exam_date"] == date(2024, 6, 1)
+
+
+def test_grade_stats_aggregate_in_sql(db):
+    """Totals, semester and subject breakdowns come from GROUP BY queries"""
+    session, user_id, subject_id = db
+    first = _add_grade(session, user_id, subject_id, 24)
+    first.credits, first.semester = 6, "primo"
+    second = _add_grade(session, user_id, subject_id, 30)
+    second.credits, second.exam_date = 12, date(2024, 7, 1)
+    _add_grade(session, user_id, subject_id, 15)
+    session.commit()
+
+    stats = GradeService(session).get_grade_stats(user_id)
+    assert (stats.total_exams, stats.passed_exams, stats.failed_exams) == (3, 2, 1)
+    assert (stats.total_credits, stats.earned_credits) == (18, 18)
+    assert stats.average_grade == 27
+    assert stats.weighted_average == 28
+    assert stats.by_semester["2023-2024_primo"] == {"exams": 1, "average": 24.0, "credits": 6, "passed": 1}
+    assert stats.by_semester["2023-2024_unknown"]["exams"] == 2
+    assert stats.by_subject["Analisi"]["last_grade"] == 30
+    assert stats.by_subject["Analisi"]["last_exam_date"] == date(2024, 7, 1)
+
+
+def test_grade_stats_without_grades(db):
+    """An empty transcript yields zeroed statistics"""
+    session, user_id, _ = db
+    stats = GradeService(session).get_grade_stats(user_id)
+    assert stats.total_exams == 0
+    assert stats.average_grade == 0.0
+    assert stats.by_subject == {}
+
+
+def test_grade_summary_groups_by_subject(db):
+    """Dashboard summaries skip subjects without grades and keep the latest grade"""
+    session, user_id, subject_id = db
+    session.add(Subject(name="Chimica", user_id=user_id))
+    _add_grade(session, user_id, subject_id, 15)
+    latest = _add_grade(session, user_id, subject_id, 28)
+    latest.credits, latest.exam_date = 9, date(2024, 9, 1)
+    session.commit()
+
+    summaries = GradeService(session).get_grade_summary(user_id)
+    assert len(summaries) == 1
+    summary = summaries[0]
+    assert (summary.subject_name, summary.total_exams, summary.credits) == ("Analisi", 2, 9)
+    assert summary.average_grade == 28
+    assert (summary.last_grade, summary.last_exam_date) == (28, date(2024, 9, 1))
+    assert summary.is_passed is False
+
+
+def test_update_grade_returns_recomputed_row(db):
+    """Updates are one UPDATE ... RETURNING that brings back the generated columns"""
+    session, user_id, subject_id = db
+    row = _add_grade(session, user_id, subject_id, 12)
+
+    updated = GradeService(session).update_grade(row.id, user_id, GradeUpdate(grade=27))
+    assert (updated.grade, updated.is_passed) == (27, True)
+    with pytest.raises(NotFoundError):
+        GradeService(session).update_grade("missing", user_id, GradeUpdate(grade=27))
+
+
+def test_delete_grade_reports_missing_rows(db):
+    """Deletes are a single statement scoped to the owner"""
+    session, user_id, subject_id = db
+    grade_id = _add_grade(session, user_id, subject_id, 25).id
+
+    service = GradeService(session)
+    assert service.delete_grade(grade_id, "someone-else") is False
+    assert service.delete_grade(grade_id, user_id) is True
+    assert service.delete_grade(grade_id, user_id) is False
+
+
+def test_grade_stats_cached_until_write(db):
+    """Repeat dashboard loads reuse the statistics until a grade changes"""
+    session, user_id, subject_id = db
+    service = GradeService(session)
+    first = service.get_grade_stats(user_id)
+    assert service.get_grade_stats(user_id) is first
+
+    service.create_grade(user_id, GradeCreate(
+        subject_id=subject_id, exam_name="Esame", grade=27,
+        exam_date=date(2024, 6, 1), academic_year="2023-2024"
+    ))
+    assert service.get_grade_stats(user_id).total_exams == 1
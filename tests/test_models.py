@@ -0,0 +1,33 @@
+"""
+Model registry tests
+"""
+
+from collections import Counter
+
+from sqlalchemy.orm import configure_mappers
+
+from app.core.database import Base
+from app.models import user, subject, upload, quiz, exam, concept_map, session, progress, grade  # noqa: F401 - register mappers
+
+
+def test_one_mapper_per_table():
+    """Every table is mapped by exactly one class"""
+    configure_mappers()
+
+    tables = Counter(
+        mapper.local_table.name
+        for mapper in Base.registry.mappers
+        if not mapper.inherits
+    )
+    duplicates = [name for name, count in tables.items() if count > 1]
+
+    assert duplicates == []
+
+
+def test_study_session_relationships_resolve_to_single_class():
+    """Back-references to StudySession all target the same mapped class"""
+    configure_mappers()
+
+    for model in (user.User, subject.Subject, quiz.Quiz, exam.Exam, concept_map.ConceptMap):
+        relationship = model.__mapper__.relationships["study_sessions"]
+        assert relationship.mapper.class_ is session.StudySession
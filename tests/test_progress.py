@@ -0,0 +1,44 @@
+"""
+Progress and achievement tests
+"""
+
+import pytest
+from datetime import datetime
+
+from app.models.session import StudySession
+from app.schemas.progress import ProgressStats
+from app.services.progress_service import ProgressService
+
+
+def test_progress_stats_validate(db):
+    """Stats built from the achievement constant match the response schema"""
+    session, user_id, _ = db
+    stats = ProgressStats.model_validate(ProgressService(session).get_progress_stats(user_id))
+    assert [a.name for a in stats.recent_achievements] == ["First Quiz"]
+    assert stats.total_study_time == 0
+
+
+def test_progress_totals_come_from_completed_sessions(db):
+    """Progress figures aggregate completed sessions, as user_progress_mv does"""
+    session, user_id, subject_id = db
+    session.add(StudySession(user_id=user_id, subject_id=subject_id, type="summary", content_id=subject_id))
+    for duration, score in ((30, 60.0), (20, 90.0)):
+        session.add(StudySession(user_id=user_id, subject_id=subject_id, type="quiz", content_id=subject_id,
+                                 duration=duration, score=score, is_completed=True, completed_at=datetime.utcnow()))
+    session.commit()
+
+    service = ProgressService(session)
+    stats = ProgressStats.model_validate(service.get_progress_stats(user_id))
+    assert (stats.total_study_time, stats.overall_progress.total_sessions) == (50, 2)
+    assert stats.overall_progress.average_score == pytest.approx(75.0)
+    subject_progress = service.get_subject_progress(user_id, subject_id)
+    assert (subject_progress.total_sessions, subject_progress.total_time) == (2, 50)
+
+
+def test_achievements_are_copies(db):
+    """Mutating returned achievements leaves the placeholders untouched"""
+    session, user_id, _ = db
+    service = ProgressService(session)
+    service.get_achievements(user_id)[0]["unlocked"] = False
+
+    assert service.get_achievements(user_id)[0]["unlocked"] is True
@@ -0,0 +1,234 @@
+"""
+Query loading tests for list endpoints
+"""
+
+import pytest
+from datetime import date, datetime
+from sqlalchemy.exc import InvalidRequestError
+
+from app.models.subject import Subject
+from app.models.grade import Grade
+from app.models.session import StudySession
+from app.models.exam import Exam, ExamQuestion, ExamUserAnswer
+from app.models.concept_map import ConceptMap, ConceptNode, ConceptConnection
+from app.models.quiz import Quiz, QuizQuestion, QuizUserAnswer
+from app.models.upload import Upload, UploadMetadata
+from app.services.auth_service import AuthService
+from app.services.concept_map_service import ConceptMapService
+from app.services.exam_service import ExamService
+from app.services.grade_service import GradeService
+from app.services.quiz_service import QuizService
+from app.services.session_service import SessionService
+from app.services.subject_service import SubjectService
+from app.services.upload_service import UploadService
+from tests.conftest import count_queries
+
+
+@pytest.fixture
+def db(db):
+    """Shared user and subject with grades and sessions, detached from the session"""
+    session, user_id, subject_id = db
+    for i in range(5):
+        session.add(Grade(
+            user_id=user_id,
+            subject_id=subject_id,
+            exam_name=f"Esame {i}",
+            grade=24,
+            exam_date=date(2024, 1, i + 1),
+            academic_year="2023-2024"
+        ))
+        session.add(StudySession(
+            user_id=user_id,
+            subject_id=subject_id,
+            type="summary",
+            content_id=subject_id
+        ))
+    session.commit()
+    session.expunge_all()
+
+    return session, user_id, subject_id
+
+
+def test_grade_list_serialization_emits_no_queries(db):
+    """Reading the subject name of listed grades does not hit the database"""
+    session, user_id, subject_id = db
+    grades = GradeService(session).get_grades(user_id)
+
+    with count_queries() as counter:
+        names = [grade.subject.name for grade in grades]
+
+    assert names == ["Analisi"] * 5
+    assert counter.count == 0
+
+
+def test_single_grade_loads_subject_with_it(db):
+    """A single fetched grade carries its subject"""
+    session, user_id, subject_id = db
+    service = GradeService(session)
+    grade_id = service.get_grades(user_id)[0].id
+    session.expunge_all()
+
+    grade = service.get_grade(grade_id, user_id)
+    with count_queries() as counter:
+        assert grade.subject.name == "Analisi"
+
+    assert counter.count == 0
+
+
+def test_grade_list_raises_on_unplanned_lazy_load(db):
+    """Relationships not eagerly loaded by the list query raise"""
+    session, user_id, subject_id = db
+    grades = GradeService(session).get_grades(user_id)
+
+    with pytest.raises(InvalidRequestError):
+        grades[0].user
+
+
+def test_session_list_raises_on_unplanned_lazy_load(db):
+    """Session lists load no relationships at all"""
+    session, user_id, subject_id = db
+    sessions = SessionService(session).get_sessions(user_id)
+
+    assert len(sessions) == 5
+    with pytest.raises(InvalidRequestError):
+        sessions[0].subject
+
+
+def test_session_list_pages_by_started_at(db):
+    """Session pages follow the started_at cursor"""
+    session, user_id, subject_id = db
+    for day in range(1, 5):
+        session.add(StudySession(user_id=user_id, subject_id=subject_id, type="quiz", content_id=subject_id,
+                                 started_at=datetime(2024, 1, day)))
+    session.commit()
+    
+    service = SessionService(session)
+    first = service.get_sessions(user_id, subject_id, limit=2, cursor=datetime(2024, 2, 1))
+    rest = service.get_sessions(user_id, subject_id, limit=2, cursor=first[-1].started_at)
+    
+    assert [s.started_at.day for s in first] == [4, 3]
+    assert [s.started_at.day for s in rest] == [2, 1]
+
+
+def test_exam_stats_use_fixed_number_of_queries(db):
+    """Exam stats are aggregated in SQL regardless of exam and answer counts"""
+    session, user_id, subject_id = db
+    for passing_score, answers in ((60, [True, True, False]), (80, [True, False])):
+        exam_row = Exam(user_id=user_id, subject_id=subject_id, title="Prova",
+                        time_limit=30, passing_score=passing_score)
+        session.add(exam_row)
+        session.flush()
+        for is_correct in answers:
+            question = ExamQuestion(exam_id=exam_row.id, type="single", question="Q?")
+            session.add(question)
+            session.flush()
+            session.add(ExamUserAnswer(user_id=user_id, exam_question_id=question.id,
+                                       answer=0, is_correct=is_correct))
+    session.commit()
+
+    with count_queries() as counter:
+        stats = ExamService(session).get_exam_stats(user_id)
+
+    assert stats["total_exams"] == 2
+    assert stats["total_questions"] == 5
+    assert stats["average_score"] == 60
+    assert stats["pass_rate"] == 50
+    assert counter.count == 5
+
+
+def test_quiz_stats_aggregate_in_sql(db):
+    """Quiz stats never load quizzes, questions or answers"""
+    session, user_id, subject_id = db
+    for difficulty, answers in (("easy", [True, False]), ("hard", [True, True])):
+        quiz_row = Quiz(user_id=user_id, subject_id=subject_id, title="Quiz", difficulty=difficulty)
+        session.add(quiz_row)
+        session.flush()
+        for is_correct in answers:
+            question = QuizQuestion(quiz_id=quiz_row.id, type="single", question="Q?",
+                                    options=["a", "b"], correct_answer=0)
+            session.add(question)
+            session.flush()
+            session.add(QuizUserAnswer(user_id=user_id, quiz_question_id=question.id,
+                                       answer=0, is_correct=is_correct))
+    session.commit()
+
+    with count_queries() as counter:
+        stats = QuizService(session).get_quiz_stats(user_id)
+
+    assert (stats["total_quizzes"], stats["total_questions"]) == (2, 4)
+    assert stats["average_score"] == 75
+    assert stats["difficulty_distribution"] == {"easy": 1, "hard": 1}
+    assert counter.count == 3
+
+
+def test_concept_map_stats_count_in_sql(db):
+    """Concept map stats never load node or connection collections"""
+    session, user_id, subject_id = db
+    for is_public in (True, False, False):
+        concept_map = ConceptMap(user_id=user_id, subject_id=subject_id, title="Mappa", is_public=is_public)
+        session.add(concept_map)
+        session.flush()
+        nodes = [ConceptNode(concept_map_id=concept_map.id, label=label, x=0, y=0) for label in "ab"]
+        session.add_all(nodes)
+        session.flush()
+        session.add(ConceptConnection(concept_map_id=concept_map.id,
+                                      from_node_id=nodes[0].id, to_node_id=nodes[1].id))
+    session.commit()
+
+    with count_queries() as counter:
+        stats = ConceptMapService(session).get_concept_map_stats(user_id)
+
+    assert (stats["total_maps"], stats["public_maps"], stats["private_maps"]) == (3, 1, 2)
+    assert (stats["total_nodes"], stats["total_connections"]) == (6, 3)
+    assert stats["average_nodes_per_map"] == 2
+    assert counter.count == 3
+
+
+def test_repeated_user_lookups_hit_request_cache(db):
+    """Id and email lookups of the same user query once per service"""
+    session, user_id, subject_id = db
+    service = AuthService(session)
+
+    with count_queries() as counter:
+        user = service.get_user_by_id(user_id)
+        assert service.get_user_by_id(user_id) is user
+        assert service.get_user_by_email("Student@example.com") is user
+
+    assert counter.count == 1
+    assert service.deactivate_user(user_id)
+    assert service.get_user_by_id(user_id).is_active is False
+
+
+def test_subject_stats_use_one_query(db):
+    """Subject counts are scalar subqueries on the subject row"""
+    session, user_id, subject_id = db
+    session.add(ConceptMap(user_id=user_id, subject_id=subject_id, title="Mappa"))
+    session.query(StudySession).filter(StudySession.user_id == user_id).limit(1).one().is_completed = True
+    session.commit()
+    session.expunge_all()
+
+    with count_queries() as counter:
+        stats = SubjectService(session).get_subject_stats(subject_id, user_id)
+
+    assert (stats.total_uploads, stats.total_concept_maps) == (0, 1)
+    assert counter.count == 1
+
+
+def test_upload_status_reads_one_row(db):
+    """Status polls skip the subject load and return metadata with the row"""
+    session, user_id, subject_id = db
+    upload_row = Upload(user_id=user_id, subject_id=subject_id, name="appunti.txt", type="text",
+                        size=10, url="uploads/appunti.txt", status="completed")
+    upload_row.file_metadata = UploadMetadata.from_dict({"extracted_text": "testo", "language": "it"})
+    session.add(upload_row)
+    session.commit()
+    upload_id = upload_row.id
+    session.expunge_all()
+
+    with count_queries() as counter:
+        status_info = UploadService(session).get_upload_status(upload_id, user_id)
+
+    assert status_info["status"] == "completed"
+    assert status_info["metadata"].extracted_text == "testo"
+    assert UploadService(session).get_upload_status(upload_id, subject_id) is None
+    assert counter.count == 2  # the row, then the metadata's keywords
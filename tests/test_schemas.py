@@ -0,0 +1,78 @@
+"""
+Schema tests
+"""
+
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from pydantic import ValidationError
+
+from app.schemas.base import MAX_SOURCE_UPLOADS
+from app.schemas.exam import EXAM_QUESTIONS_ADAPTER, ExamAnswer, ExamGenerationRequest, ExamQuestionBase, ExamQuestionResponse
+from app.schemas.quiz import QUIZ_QUESTIONS_ADAPTER, QuizAnswer, QuizQuestionBase, QuizQuestionResponse
+from app.schemas.subject import SubjectCreate, SubjectUpdate
+
+
+def _question_row(**fields):
+    now = datetime(2024, 6, 1)
+    return SimpleNamespace(
+        id="q1",
+        type="single",
+        question="Quanto fa 2+2?",
+        options=["3", "4"],
+        correct_answer=1,
+        explanation=None,
+        difficulty="easy",
+        points=1,
+        source_upload_id=None,
+        ai_generated=False,
+        created_at=now,
+        updated_at=now,
+        **fields
+    )
+
+
+def test_question_adapters_validate_rows():
+    """Cached adapters read question rows by attribute"""
+    quiz_questions = QUIZ_QUESTIONS_ADAPTER.validate_python([_question_row(quiz_id="z1")])
+    assert isinstance(quiz_questions[0], QuizQuestionResponse)
+    assert quiz_questions[0].correct_answer == 1
+
+    exam_questions = EXAM_QUESTIONS_ADAPTER.validate_python([_question_row(exam_id="e1")] * 2)
+    assert [q.exam_id for q in exam_questions] == ["e1", "e1"]
+    assert isinstance(exam_questions[0], ExamQuestionResponse)
+
+
+def test_subject_color_must_be_hex():
+    """Colors are checked by the shared HexColor constraint"""
+    assert SubjectCreate(name="Storia", color="#a1B2c3").color == "#a1B2c3"
+    assert SubjectUpdate(color=None).color is None
+    for schema in (SubjectCreate, SubjectUpdate):
+        with pytest.raises(ValidationError):
+            schema(name="Storia", color="#xyz")
+
+
+def test_correct_answer_must_index_options():
+    """Quiz and exam questions share the answer range check"""
+    with pytest.raises(ValidationError):
+        QuizQuestionBase(type="single", question="Q?", options=["a", "b"], correct_answer=2)
+    with pytest.raises(ValidationError):
+        ExamQuestionBase(type="multiple", question="Q?", options=["a", "b"], correct_answer=[0, 5])
+    assert ExamQuestionBase(type="open", question="Q?", correct_answer="libera").options is None
+
+
+def test_answer_union_dispatches_on_value_type():
+    """Answers keep their wire format and land in the matching arm"""
+    assert QuizAnswer(question_id="q", answer=[0, 2]).answer == [0, 2]
+    assert ExamAnswer(question_id="q", answer="3").answer == "3"
+    assert ExamAnswer(question_id="q", answer=1).answer == 1
+    with pytest.raises(ValidationError):
+        ExamAnswer(question_id="q", answer=1.5)
+
+
+def test_source_upload_ids_are_bounded():
+    """Generation requests cap the upload ids sent to the database"""
+    ids = [str(i) for i in range(MAX_SOURCE_UPLOADS)]
+    assert len(ExamGenerationRequest(subject_id="s", title="t", source_upload_ids=ids).source_upload_ids) == MAX_SOURCE_UPLOADS
+    with pytest.raises(ValidationError):
+        ExamGenerationRequest(subject_id="s", title="t", source_upload_ids=ids + ["extra"])
@@ -0,0 +1,55 @@
+"""
+Study session tests
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+from app.models.subject import Subject
+from app.models.session import StudySession
+from app.schemas.session import StudySessionUpdate
+from app.services.session_service import SessionService
+
+
+def test_session_stats_group_by_type(db):
+    """Session totals come from one grouped query; only the recent list loads rows"""
+    session, user_id, subject_id = db
+    for _ in range(2):
+        session.add(StudySession(user_id=user_id, subject_id=subject_id, type="summary", content_id=subject_id))
+    session.add(StudySession(user_id=user_id, subject_id=subject_id, type="quiz", content_id=subject_id,
+                             duration=30, score=80, is_completed=True))
+    session.commit()
+
+    stats = SessionService(session).get_session_stats(user_id)
+    assert stats["sessions_by_type"] == {"summary": 2, "quiz": 1}
+    assert (stats["total_sessions"], stats["total_time"]) == (3, 30)
+    assert stats["average_score"] == 80
+    assert stats["completion_rate"] == pytest.approx(100 / 3)
+    assert len(stats["recent_sessions"]) == 3
+
+
+def test_study_streak_counts_distinct_days(db):
+    """Several sessions on one day count once and a gap ends the streak"""
+    session, user_id, subject_id = db
+    now = datetime.utcnow()
+    for days_ago in (0, 0, 1, 2, 4):
+        session.add(StudySession(user_id=user_id, subject_id=subject_id, type="quiz", content_id=subject_id,
+                                 is_completed=True, completed_at=now - timedelta(days=days_ago)))
+    session.commit()
+
+    assert SessionService(session).get_study_streak(user_id) == 3
+
+
+def test_completing_through_update_rolls_up_subject(db):
+    """PUT with is_completed folds the session into its subject like complete_session"""
+    session, user_id, subject_id = db
+    study_session = StudySession(user_id=user_id, subject_id=subject_id, type="quiz", content_id=subject_id)
+    session.add(study_session)
+    session.commit()
+    session_id = study_session.id
+
+    service = SessionService(session)
+    assert service.update_session(session_id, user_id, StudySessionUpdate(notes="ripasso")).notes == "ripasso"
+    assert service.update_session(session_id, user_id, StudySessionUpdate(is_completed=True)).is_completed
+    session.expire_all()
+    assert session.get(Subject, subject_id).total_quizzes == 1
@@ -0,0 +1,28 @@
+"""
+Subject statistics tests
+"""
+
+from datetime import datetime
+
+from app.models.subject import Subject
+from app.models.session import StudySession
+from app.services.subject_service import SubjectService
+
+
+def test_refresh_only_rewrites_drifted_subjects(db):
+    """The nightly refresh leaves up-to-date subjects and every updated_at alone"""
+    session, user_id, drifted_id = db
+    session.add(Subject(name="Latino", user_id=user_id))
+    session.add(StudySession(user_id=user_id, subject_id=drifted_id, type="quiz", content_id=drifted_id,
+                             duration=15, score=70.0, is_completed=True, completed_at=datetime(2024, 3, 1)))
+    session.commit()
+    session.get(Subject, drifted_id).total_quizzes = 5
+    session.commit()
+    stamps = {row.id: row.updated_at for row in session.query(Subject)}
+
+    assert SubjectService(session).refresh_subject_stats() == 1
+    session.expire_all()
+    drifted = session.get(Subject, drifted_id)
+    assert (drifted.total_quizzes, drifted.study_time, drifted.average_score) == (1, 15, 70.0)
+    assert {row.id: row.updated_at for row in session.query(Subject)} == stamps
+    assert SubjectService(session).refresh_subject_stats() == 0
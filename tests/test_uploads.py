@@ -0,0 +1,147 @@
+"""
+Upload metadata tests
+"""
+
+import asyncio
+import io
+from types import SimpleNamespace
+
+import pytest
+from fastapi import BackgroundTasks, UploadFile
+from sqlalchemy import text
+from sqlalchemy.orm import scoped_session
+
+from app.core import celery as celery_module
+from app.models.upload import Upload, UploadMetadata
+from app.schemas.upload import UploadCreate
+from app.services import upload_service
+from app.services.upload_service import UploadService
+from app.tasks import file_processing
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def db(db):
+    """Shared user and subject with two processed uploads"""
+    session, user_id, subject_id = db
+    for name, metadata in [
+        ("acids.pdf", {"extracted_text": "Acidi e basi", "keywords": ["acidi", "ph", "acidi"]}),
+        ("bonds.pdf", {"extracted_text": "Legami covalenti", "keywords": ["legami"]}),
+    ]:
+        upload = Upload(
+            user_id=user_id,
+            subject_id=subject_id,
+            name=name,
+            type="pdf",
+            size=1,
+            url=f"s3://bucket/{name}"
+        )
+        upload.file_metadata = UploadMetadata.from_dict(metadata)
+        session.add(upload)
+    session.commit()
+    session.expunge_all()
+
+    return session, user_id, subject_id
+
+
+def test_keywords_are_deduplicated_in_order(db):
+    """Keywords keep extraction order without duplicates"""
+    session, user_id, subject_id = db
+    uploads = UploadService(session).get_uploads(user_id, keyword="ph")
+
+    assert [u.name for u in uploads] == ["acids.pdf"]
+    assert uploads[0].file_metadata.keywords == ["acidi", "ph"]
+
+
+def test_search_extracted_text(db):
+    """Text search matches on the metadata table"""
+    session, user_id, subject_id = db
+    uploads = UploadService(session).get_uploads(user_id, search="covalenti")
+
+    assert [u.name for u in uploads] == ["bonds.pdf"]
+
+
+def test_deleting_upload_removes_metadata(db):
+    """Metadata and keywords are owned by the upload"""
+    session, user_id, subject_id = db
+    for upload in session.query(Upload).all():
+        session.delete(upload)
+    session.commit()
+
+    assert session.query(UploadMetadata).count() == 0
+
+
+def test_create_upload_processes_in_background(db, monkeypatch, tmp_path):
+    """The upload is returned as processing and finished by the queued task"""
+    session, user_id, subject_id = db
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(upload_service, "SessionLocal", TestingSessionLocal)
+    background_tasks = BackgroundTasks()
+    file = UploadFile(io.BytesIO("Appunti di chimica organica".encode()), filename="appunti.txt")
+
+    upload = asyncio.run(UploadService(session).create_upload(
+        user_id, UploadCreate(subject_id=subject_id, name="appunti", type="text"), file, background_tasks
+    ))
+    assert upload.status == "processing"
+
+    asyncio.run(background_tasks())
+    status_info = UploadService(session).get_upload_status(upload.id, user_id)
+    assert status_info["status"] == "completed"
+    assert status_info["metadata"].extracted_text == "Appunti di chimica organica"
+
+
+def test_backfill_copies_legacy_metadata_column(db):
+    """Blobs in the pre-migration file_metadata column move into the metadata tables"""
+    session, user_id, subject_id = db
+    legacy = Upload(user_id=user_id, subject_id=subject_id, name="old.pdf", type="pdf",
+                    size=1, url="s3://bucket/old.pdf", status="completed")
+    session.add(legacy)
+    session.commit()
+    legacy_id = legacy.id
+    session.execute(text("ALTER TABLE uploads ADD COLUMN file_metadata JSON"))
+    session.execute(
+        text("UPDATE uploads SET file_metadata = :data WHERE id = :id"),
+        {"data": '{"extracted_text": "Ossidazione", "keywords": ["redox", "redox", "elettroni"]}', "id": legacy_id}
+    )
+    session.commit()
+
+    service = UploadService(session)
+    assert service.backfill_legacy_metadata(batch_size=1) == 1
+    assert service.backfill_legacy_metadata() == 0
+
+    session.expunge_all()
+    metadata = session.get(Upload, legacy_id).file_metadata
+    assert metadata.extracted_text == "Ossidazione"
+    assert metadata.keywords == ["redox", "elettroni"]
+
+
+def test_image_batch_isolates_failures(db, monkeypatch):
+    """A failing image is marked failed while the rest of the batch completes"""
+    session, user_id, subject_id = db
+    images = [Upload(user_id=user_id, subject_id=subject_id, name=name, type="image", size=1,
+                     url=f"s3://bucket/{name}") for name in ("lavagna.png", "corrotta.png")]
+    session.add_all(images)
+    session.commit()
+    image_ids = [image.id for image in images]
+
+    def download_file(url):
+        if url.endswith("corrotta.png"):
+            raise IOError("object missing")
+        return b"png"
+
+    task_sessions = scoped_session(TestingSessionLocal)
+    monkeypatch.setattr(celery_module, "_task_sessions", task_sessions)
+    monkeypatch.setattr(file_processing, "get_storage_service", lambda: SimpleNamespace(download_file=download_file))
+    monkeypatch.setattr(file_processing, "get_ai_service", lambda: SimpleNamespace(
+        extract_metadata=lambda content, file_type: {"extracted_text": "Equazioni di Maxwell"}
+    ))
+    try:
+        result = file_processing.process_image_batch.run(image_ids)
+    finally:
+        task_sessions.remove()
+
+    assert result["status"] == "success"
+    session.expire_all()
+    done, failed = (session.get(Upload, image_id) for image_id in image_ids)
+    assert (done.status, done.file_metadata.extracted_text) == ("completed", "Equazioni di Maxwell")
+    assert (failed.status, failed.processing_error, failed.file_metadata) == ("failed", "object missing", None)